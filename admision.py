@@ -0,0 +1,199 @@
+"""
+Control de admisión de consultas por base de datos.
+
+Cada base (DATOSACADEMICOS, umasnet, el almacén embebido) admite como máximo ECAS_MAX_CONSULTAS_BD
+consultas a la vez por proceso; las demás esperan su turno en una cola de largo ECAS_MAX_COLA_BD.
+Si la cola está llena, o la espera supera ECAS_ESPERA_MAX_BD segundos, la lectura falla con TimeoutError
+en vez de acumular trabajo que SQL Server no alcanza a atender.
+Los límites se pueden ajustar por base con el nombre en mayúsculas: ECAS_MAX_CONSULTAS_BD_UMASNET, etc.
+
+Cuando hay cola, el turno se da por clase de consulta y luego por orden de llegada: primero "kpi"
+(tarjetas y selectores), después "grafico" (la clase por defecto) y al final "segundo_plano"
+(precalentamiento y recalculos de la caché). Cada ECAS_ENVEJECIMIENTO_BD segundos de espera una
+consulta sube una clase, para que el trabajo de fondo no quede esperando para siempre.
+"""
+from contextlib import contextmanager
+from functools import wraps
+from conn_db import POOL_SIZE, POOL_TIMEOUT
+from cancelacion import verificar_vigente
+import itertools
+import os
+import threading
+import time
+
+ADMISION_ACTIVA = os.getenv("ECAS_ADMISION", "1") == "1"
+MAX_CONSULTAS_BD = int(os.getenv("ECAS_MAX_CONSULTAS_BD", str(POOL_SIZE)))
+MAX_COLA_BD = int(os.getenv("ECAS_MAX_COLA_BD", "32"))
+ESPERA_MAX_BD = float(os.getenv("ECAS_ESPERA_MAX_BD", str(POOL_TIMEOUT)))
+ENVEJECIMIENTO_BD = float(os.getenv("ECAS_ENVEJECIMIENTO_BD", "5"))
+
+# Clases de consulta, de más a menos urgente
+CLASES = ("kpi", "grafico", "segundo_plano")
+CLASE_POR_DEFECTO = "grafico"
+
+_contexto = threading.local()
+_llegadas = itertools.count()
+
+# Estado por base: nombre -> dict con la condición, consultas activas, cola de turnos y contadores
+_bases = {}
+_bases_lock = threading.Lock()
+
+# --- Clases de consulta ---
+
+def clase_actual():
+    return getattr(_contexto, "clase", None) or CLASE_POR_DEFECTO
+
+@contextmanager
+def prioridad(clase):
+    """
+    Marca las consultas del bloque con `clase`. Un bloque anidado nunca sube la urgencia:
+    una consulta "kpi" llamada desde el precalentamiento sigue siendo de segundo plano.
+    """
+    if clase not in CLASES:
+        raise ValueError(f"Clase de consulta no válida: {clase}")
+    anterior = getattr(_contexto, "clase", None)
+    if anterior is not None and CLASES.index(anterior) > CLASES.index(clase):
+        clase = anterior
+    _contexto.clase = clase
+    try:
+        yield
+    finally:
+        _contexto.clase = anterior
+
+def con_prioridad(clase):
+    """Decorador para las funciones de queries_*: declara la clase de todas sus consultas."""
+    if clase not in CLASES:
+        raise ValueError(f"Clase de consulta no válida: {clase}")
+
+    def decorador(f):
+        @wraps(f)
+        def envoltura(*args, **kwargs):
+            with prioridad(clase):
+                return f(*args, **kwargs)
+        envoltura.clase_consulta = clase
+        return envoltura
+    return decorador
+
+# --- Cola por base ---
+
+def _config(base, variable, defecto, tipo):
+    return tipo(os.getenv(f"{variable}_{base.upper()}", defecto))
+
+def _estado(base):
+    estado = _bases.get(base)
+    if estado is not None:
+        return estado
+    with _bases_lock:
+        if base not in _bases:
+            _bases[base] = {
+                "condicion": threading.Condition(),
+                "limite": max(1, _config(base, "ECAS_MAX_CONSULTAS_BD", MAX_CONSULTAS_BD, int)),
+                "max_cola": _config(base, "ECAS_MAX_COLA_BD", MAX_COLA_BD, int),
+                "espera_max": _config(base, "ECAS_ESPERA_MAX_BD", ESPERA_MAX_BD, float),
+                "activas": 0,
+                "cola": [],
+                "admitidas": 0, "rechazadas": 0, "vencidas": 0,
+                "esperas": 0, "segundos_espera": 0.0, "espera_maxima": 0.0, "cola_maxima": 0,
+                # Por clase: [esperas, segundos esperados]
+                "por_clase": {clase: [0, 0.0] for clase in CLASES},
+            }
+        return _bases[base]
+
+def _orden(turno, ahora):
+    nivel, llegada, inicio = turno
+    if ENVEJECIMIENTO_BD > 0:
+        nivel -= int((ahora - inicio) / ENVEJECIMIENTO_BD)
+    return (nivel, llegada)
+
+def _puede_entrar(estado, turno):
+    if estado["activas"] >= estado["limite"]:
+        return False
+    ahora = time.perf_counter()
+    return min(estado["cola"], key=lambda t: _orden(t, ahora)) is turno
+
+def _esperar_turno(base, estado, clase):
+    # Se llama con la condición tomada; retorna los segundos esperados
+    cola = estado["cola"]
+    if estado["activas"] < estado["limite"] and not cola:
+        return 0.0
+    if len(cola) >= estado["max_cola"]:
+        estado["rechazadas"] += 1
+        raise TimeoutError(f"Base {base} saturada: {estado['activas']} consultas activas y {len(cola)} en cola")
+
+    inicio = time.perf_counter()
+    turno = (CLASES.index(clase), next(_llegadas), inicio)
+    cola.append(turno)
+    estado["cola_maxima"] = max(estado["cola_maxima"], len(cola))
+    try:
+        while not _puede_entrar(estado, turno):
+            restante = estado["espera_max"] - (time.perf_counter() - inicio)
+            if restante <= 0:
+                estado["vencidas"] += 1
+                raise TimeoutError(f"Base {base}: se esperaron {estado['espera_max']:.0f} s sin obtener turno")
+            # Espera en tramos cortos para dejar la cola apenas la solicitud sea reemplazada
+            estado["condicion"].wait(min(restante, 0.2))
+            verificar_vigente()
+    finally:
+        cola.remove(turno)
+        # El siguiente en la cola puede tener lugar (o ahora ser el primero)
+        estado["condicion"].notify_all()
+
+    espera = time.perf_counter() - inicio
+    estado["esperas"] += 1
+    estado["segundos_espera"] += espera
+    estado["espera_maxima"] = max(estado["espera_maxima"], espera)
+    estado["por_clase"][clase][0] += 1
+    estado["por_clase"][clase][1] += espera
+    return espera
+
+@contextmanager
+def admitir(base, clase=None):
+    """
+    Ocupa un lugar de consulta en `base` mientras dura el bloque, esperando en la cola si no hay lugar.
+    Sin `clase` se usa la del contexto (con_prioridad / prioridad) o "grafico".
+    """
+    if not ADMISION_ACTIVA:
+        yield
+        return
+
+    estado = _estado(base)
+    with estado["condicion"]:
+        _esperar_turno(base, estado, clase or clase_actual())
+        estado["activas"] += 1
+        estado["admitidas"] += 1
+    try:
+        yield
+    finally:
+        with estado["condicion"]:
+            estado["activas"] -= 1
+            estado["condicion"].notify_all()
+
+def estadisticas_admision():
+    """{base: contadores}, con la profundidad actual de la cola y las consultas activas."""
+    resultado = {}
+    with _bases_lock:
+        bases = list(_bases.items())
+    for base, estado in bases:
+        with estado["condicion"]:
+            resultado[base] = {
+                clave: valor for clave, valor in estado.items() if clave not in ("condicion", "cola", "por_clase")
+            }
+            resultado[base]["en_cola"] = len(estado["cola"])
+            resultado[base]["por_clase"] = {clase: tuple(valores) for clase, valores in estado["por_clase"].items()}
+    return resultado
+
+def reporte_admision():
+    """Imprime, por base, consultas activas y en cola, esperas y rechazos."""
+    estadisticas = estadisticas_admision()
+    print("--- Admisión de consultas por base ---")
+    for base, s in sorted(estadisticas.items()):
+        promedio = s["segundos_espera"] / s["esperas"] if s["esperas"] else 0.0
+        print(
+            f"{base:<20} activas {s['activas']}/{s['limite']} cola {s['en_cola']}/{s['max_cola']} "
+            f"(máx {s['cola_maxima']}) admitidas {s['admitidas']} esperaron {s['esperas']} "
+            f"(prom {promedio:.3f} s, máx {s['espera_maxima']:.3f} s) rechazadas {s['rechazadas']} vencidas {s['vencidas']}"
+        )
+        for clase, (esperas, segundos) in s["por_clase"].items():
+            if esperas:
+                print(f"{'':<20}   {clase:<14} esperaron {esperas:>5} (prom {segundos / esperas:.3f} s)")
+    return estadisticas
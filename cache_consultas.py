@@ -0,0 +1,466 @@
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import wraps
+from conn_db import TABLAS_EMBEBIDAS, TABLA_VERSIONES, leer_versiones_datos
+from lectura import tabla_a_pandas
+from admision import prioridad
+from cancelacion import ConsultaCancelada, verificar_vigente
+from trazas import medir_consulta
+import pandas as pd
+import numpy as np
+import copy
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import re
+import threading
+import time
+
+# Si es "0", las funciones decoradas consultan siempre la base
+CACHE_ACTIVA = os.getenv("ECAS_CACHE", "1") == "1"
+# Presupuesto de memoria del nivel en proceso (por worker)
+CACHE_MEMORIA_MB = float(os.getenv("ECAS_CACHE_MEMORIA_MB", "256"))
+# Nivel en disco compartido por todos los workers de gunicorn
+CACHE_DISCO_ACTIVA = os.getenv("ECAS_CACHE_DISCO", "1") == "1"
+CACHE_DIR = os.getenv(
+    "ECAS_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache_consultas")
+)
+CACHE_DISCO_MB = float(os.getenv("ECAS_CACHE_DISCO_MB", "2048"))
+# Antigüedad máxima de un resultado en segundos (0 = sin vencimiento)
+CACHE_TTL = float(os.getenv("ECAS_CACHE_TTL", "21600"))
+# Cada cuántos segundos se consulta la tabla data_version
+VERSIONES_INTERVALO = float(os.getenv("ECAS_VERSIONES_INTERVALO", "30"))
+# Aciertos a partir de los cuales una entrada se recalcula apenas cambia la versión de sus tablas
+CACHE_ACIERTOS_CALIENTE = int(os.getenv("ECAS_CACHE_ACIERTOS_CALIENTE", "2"))
+CACHE_HILOS_REVALIDACION = int(os.getenv("ECAS_CACHE_HILOS_REVALIDACION", "2"))
+# Si es "1", las llamadas idénticas simultáneas esperan una sola ejecución (también con la caché apagada)
+UN_VUELO_ACTIVO = os.getenv("ECAS_UN_VUELO", "1") == "1"
+
+# Tablas cuya versión se sigue (las derivadas y la proyección de matriculas_mrun)
+TABLAS_VERSIONADAS = [t for t in TABLAS_EMBEBIDAS if t != TABLA_VERSIONES]
+
+# Nivel en memoria: clave -> entrada (dict con valor, bytes, creado, versiones, aciertos y la llamada original)
+_memoria = OrderedDict()
+_memoria_bytes = 0
+_lock = threading.Lock()
+
+# Contadores por función: aciertos en memoria y disco, fallos, desalojos y resultados servidos obsoletos
+_estadisticas = {}
+
+# Funciones decoradas: nombre -> (función original, tablas de las que depende, usa disco)
+_funciones = {}
+
+# Versiones vistas por última vez y cuándo se leyeron
+_versiones = {}
+_versiones_leidas = 0.0
+_versiones_lock = threading.Lock()
+
+# Recalculos en segundo plano, sin repetir la misma clave
+_revalidador = None
+_en_revalidacion = set()
+
+# Consultas en curso: clave -> Future con el resultado que esperan las llamadas idénticas
+_en_vuelo = {}
+
+def _stats(funcion):
+    if funcion not in _estadisticas:
+        _estadisticas[funcion] = {
+            "hits_memoria": 0, "hits_disco": 0, "misses": 0, "obsoletos": 0, "revalidaciones": 0,
+            "desalojos_memoria": 0, "desalojos_disco": 0, "segundos_consulta": 0.0, "coalescidas": 0,
+        }
+    return _estadisticas[funcion]
+
+def _contar(funcion, campo, cantidad=1):
+    with _lock:
+        _stats(funcion)[campo] += cantidad
+
+def normalizar_argumento(valor):
+    """Forma estable de un argumento: listas y tuplas se igualan, los tipos de numpy pasan a Python."""
+    if valor is None or isinstance(valor, (str, bool)):
+        return valor
+    if isinstance(valor, np.generic):
+        return valor.item()
+    if isinstance(valor, (int, float)):
+        return valor
+    if isinstance(valor, (list, tuple)):
+        return tuple(normalizar_argumento(v) for v in valor)
+    if isinstance(valor, (set, frozenset)):
+        return tuple(sorted((normalizar_argumento(v) for v in valor), key=repr))
+    if isinstance(valor, dict):
+        return tuple(sorted((str(k), normalizar_argumento(v)) for k, v in valor.items()))
+    return repr(valor)
+
+def clave_consulta(funcion, firma, args, kwargs):
+    """Clave de caché: nombre de la función más sus argumentos normalizados, con los valores por defecto aplicados."""
+    argumentos = firma.bind(*args, **kwargs)
+    argumentos.apply_defaults()
+    normalizados = tuple((nombre, normalizar_argumento(valor)) for nombre, valor in argumentos.arguments.items())
+    return f"{funcion}|{normalizados!r}"
+
+def tablas_de_funcion(f):
+    """Tablas versionadas que aparecen en el código de la función (el SQL está embebido en ella)."""
+    try:
+        fuente = inspect.getsource(f)
+    except (OSError, TypeError):
+        return ()
+    return tuple(t for t in TABLAS_VERSIONADAS if re.search(rf"\b{t}\b", fuente))
+
+# --- Versiones de datos ---
+
+def versiones_actuales(tablas):
+    """Versión vigente de cada tabla, releyendo data_version como máximo cada VERSIONES_INTERVALO segundos."""
+    global _versiones, _versiones_leidas
+    if not tablas:
+        return ()
+    if time.time() - _versiones_leidas > VERSIONES_INTERVALO:
+        # Un solo hilo relee; los demás siguen con las versiones conocidas
+        if _versiones_lock.acquire(blocking=False):
+            try:
+                nuevas = leer_versiones_datos()
+                if nuevas is None:
+                    # Error transitorio: se conservan las versiones conocidas (si no, toda la caché
+                    # parecería vencida) y se reintenta en el próximo intervalo
+                    _versiones_leidas = time.time()
+                    return tuple((t, _versiones.get(t, 0)) for t in tablas)
+                anteriores = _versiones
+                _versiones, _versiones_leidas = nuevas, time.time()
+                cambiadas = {t for t in set(nuevas) | set(anteriores) if nuevas.get(t) != anteriores.get(t)}
+                if anteriores and cambiadas:
+                    _revalidar_calientes(cambiadas)
+            finally:
+                _versiones_lock.release()
+    return tuple((t, _versiones.get(t, 0)) for t in tablas)
+
+# --- Recalculo en segundo plano ---
+
+def _get_revalidador():
+    global _revalidador
+    if _revalidador is None:
+        with _lock:
+            if _revalidador is None:
+                _revalidador = ThreadPoolExecutor(max_workers=CACHE_HILOS_REVALIDACION, thread_name_prefix="ecas-revalidacion")
+    return _revalidador
+
+def _programar_revalidacion(nombre, clave, args, kwargs):
+    with _lock:
+        if clave in _en_revalidacion:
+            return
+        _en_revalidacion.add(clave)
+    _get_revalidador().submit(_revalidar, nombre, clave, args, kwargs)
+
+def _revalidar(nombre, clave, args, kwargs):
+    f, tablas, disco = _funciones[nombre]
+    try:
+        # Nadie espera este resultado: cede el turno a las consultas de los callbacks
+        with prioridad("segundo_plano"):
+            _calcular(nombre, clave, f, tablas, disco, args, kwargs)
+        _contar(nombre, "revalidaciones")
+    except Exception as e:
+        # Se sigue sirviendo el resultado anterior; el próximo acceso lo reintenta
+        print(f"⚠️ Error al recalcular {nombre} en segundo plano: {e}")
+    finally:
+        with _lock:
+            _en_revalidacion.discard(clave)
+
+def _revalidar_calientes(tablas_cambiadas):
+    # Las entradas más consultadas se recalculan antes de que alguien las vuelva a pedir
+    with _lock:
+        calientes = [
+            (clave, entrada) for clave, entrada in _memoria.items()
+            if entrada["aciertos"] >= CACHE_ACIERTOS_CALIENTE
+            and tablas_cambiadas & {t for t, _ in entrada["versiones"]}
+        ]
+    for clave, entrada in calientes:
+        _programar_revalidacion(clave.split("|", 1)[0], clave, entrada["args"], entrada["kwargs"])
+
+# --- Una sola ejecución por clave ---
+
+def _en_un_vuelo(nombre, clave, calcular):
+    """
+    Ejecuta calcular() una sola vez por clave entre las llamadas simultáneas: la primera consulta
+    y las demás esperan su resultado (o su excepción). Cada espera cuenta como una ejecución ahorrada.
+    """
+    if not UN_VUELO_ACTIVO:
+        return calcular()
+    while True:
+        with _lock:
+            futuro = _en_vuelo.get(clave)
+            propio = futuro is None
+            if propio:
+                futuro = _en_vuelo[clave] = Future()
+            else:
+                _stats(nombre)["coalescidas"] += 1
+        if propio:
+            break
+        try:
+            return futuro.result()
+        except ConsultaCancelada:
+            # Se canceló la solicitud que ejecutaba la consulta, no esta: se vuelve a intentar
+            verificar_vigente()
+    try:
+        valor = calcular()
+    except BaseException as e:
+        futuro.set_exception(e)
+        raise
+    else:
+        futuro.set_result(valor)
+        return valor
+    finally:
+        with _lock:
+            _en_vuelo.pop(clave, None)
+
+# --- Utilidades de valores ---
+
+def _tamano(valor):
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        uso = valor.memory_usage(deep=True)
+        return int(uso.sum()) if isinstance(uso, pd.Series) else int(uso)
+    try:
+        return len(pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 0
+
+def _copia(valor):
+    # Los callbacks modifican los DataFrames que reciben; nunca se entrega el objeto guardado
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        return valor.copy(deep=True)
+    return copy.deepcopy(valor)
+
+def _vencido(creado):
+    return CACHE_TTL > 0 and time.time() - creado > CACHE_TTL
+
+# --- Nivel en memoria ---
+
+def _leer_memoria(clave):
+    with _lock:
+        entrada = _memoria.get(clave)
+        if entrada is None:
+            return None
+        if _vencido(entrada["creado"]):
+            _quitar_memoria(clave)
+            return None
+        _memoria.move_to_end(clave)
+        entrada["aciertos"] += 1
+        return entrada
+
+def _quitar_memoria(clave):
+    global _memoria_bytes
+    entrada = _memoria.pop(clave)
+    _memoria_bytes -= entrada["bytes"]
+
+def _guardar_memoria(clave, valor, creado, versiones, args, kwargs):
+    global _memoria_bytes
+    bytes_valor = _tamano(valor)
+    limite = CACHE_MEMORIA_MB * 1024 * 1024
+    if bytes_valor > limite:
+        return
+    with _lock:
+        aciertos = 0
+        if clave in _memoria:
+            aciertos = _memoria[clave]["aciertos"]
+            _quitar_memoria(clave)
+        _memoria[clave] = {
+            "valor": valor, "bytes": bytes_valor, "creado": creado, "versiones": versiones,
+            "aciertos": aciertos, "args": args, "kwargs": kwargs,
+        }
+        _memoria_bytes += bytes_valor
+        # Se desaloja lo usado hace más tiempo hasta volver al presupuesto
+        while _memoria_bytes > limite and _memoria:
+            clave_vieja = next(iter(_memoria))
+            _quitar_memoria(clave_vieja)
+            _stats(clave_vieja.split("|", 1)[0])["desalojos_memoria"] += 1
+
+# --- Nivel en disco ---
+
+def _ruta_disco(funcion, clave):
+    resumen = hashlib.sha1(clave.encode("utf-8")).hexdigest()[:20]
+    return os.path.join(CACHE_DIR, f"{funcion}__{resumen}")
+
+def _leer_disco(funcion, clave):
+    """Retorna (valor, creado, versiones) o None."""
+    base = _ruta_disco(funcion, clave)
+    for extension in (".parquet", ".pkl"):
+        ruta = base + extension
+        try:
+            creado = os.path.getmtime(ruta)
+            if _vencido(creado):
+                return None
+            if extension == ".parquet":
+                import pyarrow.parquet as pq
+                tabla = pq.read_table(ruta)
+                # Las versiones viajan en los metadatos del Parquet
+                versiones = json.loads((tabla.schema.metadata or {}).get(b"ecas_versiones", b"[]"))
+                return tabla_a_pandas(tabla), creado, tuple(tuple(v) for v in versiones)
+            with open(ruta, "rb") as f:
+                versiones, valor = pickle.load(f)
+            return valor, creado, versiones
+        except FileNotFoundError:
+            continue
+        except Exception as e:
+            print(f"⚠️ Caché en disco ilegible ({os.path.basename(ruta)}): {e}")
+            return None
+    return None
+
+def _guardar_disco(funcion, clave, valor, versiones):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    base = _ruta_disco(funcion, clave)
+    # Escritura atómica: los demás workers ven el archivo completo o ninguno
+    temporal = f"{base}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        if isinstance(valor, pd.DataFrame):
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                tabla = pa.Table.from_pandas(valor)
+                metadatos = dict(tabla.schema.metadata or {})
+                metadatos[b"ecas_versiones"] = json.dumps(versiones).encode("utf-8")
+                pq.write_table(tabla.replace_schema_metadata(metadatos), temporal)
+                os.replace(temporal, base + ".parquet")
+                _quitar_archivo(base + ".pkl")
+                _podar_disco()
+                return
+            except Exception:
+                # Columnas que Parquet no admite (nombres no texto, objetos mixtos): se guarda con pickle
+                pass
+        with open(temporal, "wb") as f:
+            pickle.dump((versiones, valor), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporal, base + ".pkl")
+        _quitar_archivo(base + ".parquet")
+        _podar_disco()
+    except Exception as e:
+        print(f"⚠️ No se pudo escribir la caché en disco de {funcion}: {e}")
+    finally:
+        _quitar_archivo(temporal)
+
+def _quitar_archivo(ruta):
+    try:
+        os.remove(ruta)
+    except FileNotFoundError:
+        pass
+
+def _podar_disco():
+    limite = CACHE_DISCO_MB * 1024 * 1024
+    archivos = []
+    total = 0
+    for entrada in os.scandir(CACHE_DIR):
+        if entrada.is_file() and not entrada.name.endswith(".tmp"):
+            info = entrada.stat()
+            archivos.append((info.st_mtime, info.st_size, entrada))
+            total += info.st_size
+    if total <= limite:
+        return
+    for _, tamano, entrada in sorted(archivos, key=lambda a: a[0]):
+        try:
+            os.remove(entrada.path)
+        except FileNotFoundError:
+            continue
+        total -= tamano
+        _contar(entrada.name.split("__", 1)[0], "desalojos_disco")
+        if total <= limite:
+            break
+
+# --- API ---
+
+def _calcular(nombre, clave, f, tablas, disco, args, kwargs):
+    # La versión se toma antes de consultar: si cambia durante la consulta, el resultado queda marcado como viejo
+    versiones = versiones_actuales(tablas)
+    inicio = time.perf_counter()
+    valor = f(*args, **kwargs)
+    _contar(nombre, "segundos_consulta", time.perf_counter() - inicio)
+
+    _guardar_memoria(clave, valor, time.time(), versiones, args, kwargs)
+    if disco and CACHE_DISCO_ACTIVA:
+        _guardar_disco(nombre, clave, valor, versiones)
+    return valor
+
+def _resolver_fallo(nombre, clave, f, tablas, disco, versiones, args, kwargs):
+    if disco and CACHE_DISCO_ACTIVA:
+        encontrado = _leer_disco(nombre, clave)
+        if encontrado is not None:
+            valor, creado, versiones_disco = encontrado
+            _contar(nombre, "hits_disco")
+            _guardar_memoria(clave, valor, creado, versiones_disco, args, kwargs)
+            if versiones_disco != versiones:
+                _contar(nombre, "obsoletos")
+                _programar_revalidacion(nombre, clave, args, kwargs)
+            return valor
+
+    _contar(nombre, "misses")
+    return _calcular(nombre, clave, f, tablas, disco, args, kwargs)
+
+def cachear_consulta(funcion=None, *, disco=True, tablas=None):
+    """
+    Decorador de caché en dos niveles para las funciones de queries_*: LRU en memoria con presupuesto
+    en bytes y Parquet en disco compartido entre procesos. Cada resultado guarda la versión de las tablas
+    de las que depende (`tablas`, o las que aparecen en el código de la función); si la versión cambió,
+    se entrega el resultado anterior y se recalcula en segundo plano. Las llamadas idénticas simultáneas
+    comparten una sola consulta a la base.
+    Se usa como @cachear_consulta o @cachear_consulta(disco=False).
+    """
+    def decorador(f):
+        nombre = f"{f.__module__.rsplit('.', 1)[-1]}.{f.__name__}"
+        firma = inspect.signature(f)
+        dependencias = tuple(tablas) if tablas is not None else tablas_de_funcion(f)
+        _funciones[nombre] = (f, dependencias, disco)
+
+        @wraps(f)
+        def envoltura(*args, **kwargs):
+            with medir_consulta(nombre):
+                return _consultar(args, kwargs)
+
+        def _consultar(args, kwargs):
+            clave = clave_consulta(nombre, firma, args, kwargs)
+            if not CACHE_ACTIVA:
+                return _copia(_en_un_vuelo(nombre, clave, lambda: f(*args, **kwargs)))
+
+            versiones = versiones_actuales(dependencias)
+
+            entrada = _leer_memoria(clave)
+            if entrada is not None:
+                _contar(nombre, "hits_memoria")
+                if entrada["versiones"] != versiones:
+                    _contar(nombre, "obsoletos")
+                    _programar_revalidacion(nombre, clave, args, kwargs)
+                return _copia(entrada["valor"])
+
+            # Sin acierto en memoria: disco o base, una sola vez aunque lleguen varias llamadas iguales
+            return _copia(_en_un_vuelo(nombre, clave, lambda: _resolver_fallo(nombre, clave, f, dependencias, disco, versiones, args, kwargs)))
+
+        envoltura.nombre_cache = nombre
+        envoltura.tablas_cache = dependencias
+        envoltura.sin_cache = f
+        return envoltura
+
+    return decorador(funcion) if funcion is not None else decorador
+
+def limpiar_cache(disco=True):
+    """Vacía el nivel en memoria de este proceso y, si se indica, el directorio compartido."""
+    global _memoria_bytes
+    with _lock:
+        _memoria.clear()
+        _memoria_bytes = 0
+    if disco and os.path.isdir(CACHE_DIR):
+        for entrada in os.scandir(CACHE_DIR):
+            if entrada.is_file():
+                _quitar_archivo(entrada.path)
+
+def estadisticas_cache():
+    with _lock:
+        return {funcion: dict(valores) for funcion, valores in _estadisticas.items()}
+
+def reporte_cache():
+    """Imprime aciertos, fallos, ejecuciones ahorradas, obsoletos servidos y desalojos por función, y el uso del nivel en memoria."""
+    estadisticas = estadisticas_cache()
+    print(f"--- Caché de consultas: {len(_memoria)} entradas, {_memoria_bytes / 1024 / 1024:.1f} de {CACHE_MEMORIA_MB:.0f} MB ---")
+    for funcion, s in sorted(estadisticas.items()):
+        total = s["hits_memoria"] + s["hits_disco"] + s["misses"]
+        tasa = (s["hits_memoria"] + s["hits_disco"]) / total * 100 if total else 0
+        print(
+            f"{funcion:<60} mem {s['hits_memoria']:>5} disco {s['hits_disco']:>5} miss {s['misses']:>5} "
+            f"({tasa:5.1f}% aciertos) ahorradas {s['coalescidas']} obsoletos {s['obsoletos']} revalidados {s['revalidaciones']} "
+            f"desalojos {s['desalojos_memoria']}/{s['desalojos_disco']}"
+        )
+    return estadisticas
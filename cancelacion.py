@@ -0,0 +1,238 @@
+"""
+Cancelación de consultas de solicitudes reemplazadas.
+
+Cada ejecución de un callback marcado con @cancelable abre una solicitud identificada por
+(pestaña del navegador, callback). Si llega una más nueva con la misma identidad (por ejemplo al
+arrastrar slider-años-desertores), la anterior se marca como cancelada: sus sentencias en curso se
+interrumpen en el servidor (cursor.cancel() en pyodbc, interrupt() en DuckDB), las que esperaban turno
+salen de la cola y las que no han empezado no se envían. El callback reemplazado termina con PreventUpdate.
+
+La pestaña la identifica el campo ecas_pestana que el renderer de Dash agrega a cada solicitud de callback
+(RENDERER_PESTANA, que index.py asigna a app.renderer), así dos pestañas en la misma página no se reemplazan
+entre sí; si no viene (clientes sin ese renderer) se usa la cookie de sesión del navegador.
+
+La solicitud viaja en un contextvar, así que la heredan las tareas de ejecutar_en_paralelo y las de
+consultar_async (puente asyncio -> hilos para usar las funciones de queries_* desde código async).
+"""
+from contextvars import ContextVar, copy_context
+from functools import partial, wraps
+from sqlalchemy import event
+import asyncio
+import os
+import threading
+import uuid
+
+CANCELACION_ACTIVA = os.getenv("ECAS_CANCELACION", "1") == "1"
+# Cookie que identifica al navegador (la asigna index.py)
+COOKIE_SESION = "ecas_sesion"
+# Campo del cuerpo de /_dash-update-component con el identificador de la pestaña
+CAMPO_PESTANA = "ecas_pestana"
+# Renderer de Dash que agrega CAMPO_PESTANA a cada solicitud; el identificador vive lo que la página cargada
+# (sessionStorage se copiaría al duplicar la pestaña, y crypto.randomUUID exige HTTPS)
+RENDERER_PESTANA = f"""
+var ecasPestana = Date.now().toString(36) + Math.random().toString(36).slice(2);
+var renderer = new DashRenderer({{
+    request_pre: function(payload) {{ payload["{CAMPO_PESTANA}"] = ecasPestana; }}
+}});
+"""
+
+class ConsultaCancelada(Exception):
+    """La solicitud a la que pertenecía la consulta fue reemplazada o cancelada."""
+
+_solicitud_actual = ContextVar("ecas_solicitud", default=None)
+
+# Solicitud vigente por (sesión, callback)
+_vigentes = {}
+_lock = threading.Lock()
+_engines_instrumentados = set()
+
+# Contadores: solicitudes reemplazadas y sentencias interrumpidas en el servidor
+_estadisticas = {"reemplazadas": 0, "sentencias_interrumpidas": 0, "consultas_evitadas": 0}
+
+def _nueva_solicitud(clave=None, padre=None):
+    solicitud = {
+        "clave": clave,
+        "cancelada": threading.Event(),
+        # Sentencias en curso: (cursor DBAPI, conexión DBAPI)
+        "cursores": set(),
+        "hijas": [],
+        "lock": threading.Lock(),
+    }
+    if padre is not None:
+        with padre["lock"]:
+            padre["hijas"].append(solicitud)
+        if padre["cancelada"].is_set():
+            solicitud["cancelada"].set()
+    return solicitud
+
+def solicitud_actual():
+    return _solicitud_actual.get()
+
+def esta_cancelada(solicitud=None):
+    solicitud = solicitud or _solicitud_actual.get()
+    return solicitud is not None and solicitud["cancelada"].is_set()
+
+def verificar_vigente():
+    """Lanza ConsultaCancelada si la solicitud actual ya fue reemplazada."""
+    if esta_cancelada():
+        with _lock:
+            _estadisticas["consultas_evitadas"] += 1
+        raise ConsultaCancelada("Solicitud reemplazada por una más reciente")
+
+def _interrumpir(cursor, dbapi_conn):
+    # pyodbc cancela la sentencia desde otro hilo con SQLCancel; DuckDB interrumpe la conexión
+    try:
+        cancelar = getattr(cursor, "cancel", None)
+        if cancelar is not None:
+            cancelar()
+            return True
+        interrumpir = getattr(dbapi_conn, "interrupt", None)
+        if interrumpir is not None:
+            interrumpir()
+            return True
+    except Exception as e:
+        print(f"⚠️ No se pudo interrumpir una consulta: {e}")
+    return False
+
+def cancelar(solicitud):
+    """Marca la solicitud (y las que dependen de ella) como cancelada e interrumpe sus sentencias en curso."""
+    pendientes = [solicitud]
+    while pendientes:
+        actual = pendientes.pop()
+        actual["cancelada"].set()
+        with actual["lock"]:
+            cursores = list(actual["cursores"])
+            pendientes.extend(actual["hijas"])
+        interrumpidas = sum(1 for cursor, dbapi_conn in cursores if _interrumpir(cursor, dbapi_conn))
+        if interrumpidas:
+            with _lock:
+                _estadisticas["sentencias_interrumpidas"] += interrumpidas
+
+# --- Registro de sentencias en curso ---
+
+def instrumentar_engine(engine):
+    """Registra cada sentencia del engine en la solicitud actual para poder interrumpirla."""
+    if id(engine) in _engines_instrumentados:
+        return
+    with _lock:
+        if id(engine) in _engines_instrumentados:
+            return
+        _engines_instrumentados.add(id(engine))
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _registrar(conn, cursor, statement, parameters, context, executemany):
+        solicitud = _solicitud_actual.get()
+        if solicitud is None:
+            return
+        entrada = (cursor, conn.connection.dbapi_connection)
+        with solicitud["lock"]:
+            solicitud["cursores"].add(entrada)
+        conn.info.setdefault("ecas_cursores", []).append((solicitud, entrada))
+        # Reemplazada justo antes de enviar: se interrumpe igual
+        if solicitud["cancelada"].is_set():
+            _interrumpir(*entrada)
+
+    # Al volver al pool la conexión puede pasar a otra sesión: ninguna solicitud debe poder interrumpirla.
+    # Cubre las sentencias ejecutadas fuera de leer_sql (p. ej. leer_versiones_datos) que nadie libera.
+    @event.listens_for(engine, "checkin")
+    def _liberar_al_devolver(dbapi_connection, connection_record):
+        _liberar(connection_record.info)
+
+def _liberar(info):
+    for solicitud, entrada in info.pop("ecas_cursores", []):
+        with solicitud["lock"]:
+            solicitud["cursores"].discard(entrada)
+
+def liberar_cursores(conn):
+    """Quita de su solicitud las sentencias registradas en la conexión (al terminar de leer)."""
+    _liberar(conn.info)
+
+# --- Callbacks ---
+
+def _sesion():
+    """Pestaña que hizo la solicitud (CAMPO_PESTANA) o, si no viene, la cookie de sesión del navegador."""
+    try:
+        from flask import request, has_request_context
+        if has_request_context():
+            cuerpo = request.get_json(silent=True)
+            pestana = cuerpo.get(CAMPO_PESTANA) if isinstance(cuerpo, dict) else None
+            if isinstance(pestana, str) and pestana:
+                return f"pestana:{pestana}"
+            return request.cookies.get(COOKIE_SESION)
+    except ImportError:
+        pass
+    return None
+
+def nueva_sesion():
+    return uuid.uuid4().hex
+
+def cancelable(f):
+    """
+    Decorador para callbacks (debajo de @callback): cada ejecución reemplaza a la anterior del mismo
+    callback en la misma pestaña, cuyas consultas se cancelan y cuyo resultado se descarta.
+    """
+    nombre = f"{f.__module__.rsplit('.', 1)[-1]}.{f.__name__}"
+
+    @wraps(f)
+    def envoltura(*args, **kwargs):
+        sesion = _sesion()
+        if not CANCELACION_ACTIVA or sesion is None:
+            return f(*args, **kwargs)
+
+        from dash.exceptions import PreventUpdate
+
+        clave = (sesion, nombre)
+        solicitud = _nueva_solicitud(clave)
+        with _lock:
+            anterior = _vigentes.get(clave)
+            _vigentes[clave] = solicitud
+            if anterior is not None:
+                _estadisticas["reemplazadas"] += 1
+        if anterior is not None:
+            cancelar(anterior)
+
+        token = _solicitud_actual.set(solicitud)
+        try:
+            resultado = f(*args, **kwargs)
+            # Terminó, pero ya hay una más reciente en curso: su resultado no se muestra
+            if solicitud["cancelada"].is_set():
+                raise PreventUpdate
+            return resultado
+        except PreventUpdate:
+            raise
+        except Exception as e:
+            # Cualquier error de una solicitud reemplazada (incluida la sentencia interrumpida) se descarta
+            if solicitud["cancelada"].is_set():
+                raise PreventUpdate from e
+            raise
+        finally:
+            _solicitud_actual.reset(token)
+            with _lock:
+                if _vigentes.get(clave) is solicitud:
+                    del _vigentes[clave]
+
+    return envoltura
+
+# --- Puente asyncio ---
+
+async def consultar_async(funcion, *args, **kwargs):
+    """
+    Ejecuta una función de queries_* en el pool de hilos de consultas sin bloquear el event loop.
+    Si la tarea que espera se cancela, también se cancela su SQL en el servidor.
+    """
+    from ejecucion import _get_executor, _ejecutar_tarea
+
+    solicitud = _nueva_solicitud(padre=_solicitud_actual.get())
+    contexto = copy_context()
+    contexto.run(_solicitud_actual.set, solicitud)
+    loop = asyncio.get_running_loop()
+    futuro = loop.run_in_executor(_get_executor(), partial(contexto.run, _ejecutar_tarea, partial(funcion, *args, **kwargs)))
+    try:
+        return await futuro
+    except asyncio.CancelledError:
+        cancelar(solicitud)
+        raise
+
+def estadisticas_cancelacion():
+    with _lock:
+        return dict(_estadisticas, vigentes=len(_vigentes))
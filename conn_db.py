@@ -1,30 +1,154 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql.elements import TextClause
+from functools import lru_cache
 import urllib
+import os
+import threading
+import time
 
 SERVER = 'QUPARDO'
 DATABASE1 = 'DBMatriculas'
 DATABASE2 = 'DATOSACADEMICOS'
-DRIVER_NAME = 'ODBC Driver 17 for SQL Server' 
+DRIVER_NAME = 'ODBC Driver 17 for SQL Server'
 
 SERVER2 = '192.168.1.194'
 USERNAME2 = 'jraby'
 DATABASE3 = 'umasnet'
 PASSWORD2 = '123'
 
+# Configuración del pool compartido por proceso (se puede sobrescribir con variables de entorno)
+POOL_SIZE = int(os.getenv("ECAS_POOL_SIZE", "5"))
+POOL_MAX_OVERFLOW = int(os.getenv("ECAS_POOL_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = int(os.getenv("ECAS_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.getenv("ECAS_POOL_RECYCLE", "1800"))
+POOL_PRE_PING = os.getenv("ECAS_POOL_PRE_PING", "1") == "1"
+
+# Aislamiento de las conexiones de lectura de los dashboards en SQL Server:
+# "auto" usa SNAPSHOT si la base lo permite (y si no READ COMMITTED, que con READ_COMMITTED_SNAPSHOT
+# también lee versiones de filas); "snapshot", "read committed", etc. lo fijan; "ninguno" no lo toca.
+AISLAMIENTO_LECTURA = os.getenv("ECAS_AISLAMIENTO_LECTURA", "auto").upper()
+# Reconstrucción de tablas derivadas: "intercambio" arma la tabla nueva aparte y la cambia por la actual
+# con sp_rename al final; "directa" borra y recrea la tabla en su lugar (comportamiento original)
+MODO_RECONSTRUCCION = os.getenv("ECAS_RECONSTRUCCION", "intercambio").lower()
+# Milisegundos que el intercambio espera a que los lectores suelten la tabla antes de reintentar
+LOCK_TIMEOUT_INTERCAMBIO_MS = int(os.getenv("ECAS_LOCK_TIMEOUT_INTERCAMBIO_MS", "5000"))
+REINTENTOS_INTERCAMBIO = int(os.getenv("ECAS_REINTENTOS_INTERCAMBIO", "3"))
+
+# Backend de lectura de los dashboards: "mssql" (SQL Server) o "duckdb" (almacén embebido local)
+BACKEND = os.getenv("ECAS_BACKEND", "mssql").lower()
+BASE_EMBEBIDA = 'embebida'
+EMBEBIDO_DIR = os.getenv(
+    "ECAS_EMBEBIDO_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "datos_embebidos")
+)
+# Si es "1", cada reconstrucción de tablas_derivadas.py exporta su tabla al almacén embebido
+EXPORTAR_EMBEBIDO = os.getenv("ECAS_EXPORTAR_EMBEBIDO", "0") == "1"
+
+# Tablas que se replican en el almacén embebido: nombre -> consulta de origen en SQL Server.
+# matriculas_mrun no es derivada, pero get_metrica_exito_captacion la consulta; se exporta solo
+# la proyección que necesita para los alumnos de ECAS.
+TABLAS_EMBEBIDAS = {
+    "tabla_matriculas_competencia_unificada": None,
+    "tabla_dashboard_titulados": None,
+    "tabla_alumnos_egresados_unificada": None,
+    "tabla_abandono_total_ecas": None,
+    "tabla_fuga_detallada_ecas": None,
+    "tabla_titulados_externos_desertores": None,
+    "tabla_origenes_estudiantes_ecas": None,
+    "tabla_trayectoria_post_titulado": None,
+    "matriculas_mrun": """
+        SELECT v.mrun, v.cat_periodo, v.cod_inst
+        FROM matriculas_mrun v
+        WHERE v.mrun IN (SELECT DISTINCT mrun FROM tabla_matriculas_competencia_unificada WHERE cod_inst = 104)
+    """,
+    "data_version": None,
+}
+
+# Tabla con la versión de cada tabla derivada; se incrementa en cada reconstrucción
+TABLA_VERSIONES = "data_version"
+
+# Registro de motores: un único Engine por base de datos, creado en el primer uso
+_engines = {}
+_engines_lock = threading.Lock()
+_tiempos_conexion = {}
+_engine_lectura = None
+
+def _url_datosacademicos():
+    DRIVER = urllib.parse.quote_plus(DRIVER_NAME)
+    return f"mssql+pyodbc://{SERVER}/{DATABASE2}?driver={DRIVER}&trusted_connection=yes"
+
+def _url_umasnet():
+    return (
+        f"mssql+pyodbc://{USERNAME2}:{PASSWORD2}@{SERVER2}/{DATABASE3}"
+        "?driver=ODBC+Driver+17+for+SQL+Server"
+        "&MultipleActiveResultSets=True"
+    )
+
+def _url_embebida():
+    # Cada conexión es una base DuckDB en memoria con vistas sobre los Parquet exportados
+    return "duckdb:///:memory:"
+
+# Bases registradas: nombre -> (constructor de URL, argumentos extra de create_engine)
+BASES_REGISTRADAS = {
+    DATABASE2: (_url_datosacademicos, {"fast_executemany": True}),
+    DATABASE3: (_url_umasnet, {}),
+    BASE_EMBEBIDA: (_url_embebida, {"poolclass": QueuePool}),
+}
+
+def _crear_engine(nombre):
+    constructor_url, extra = BASES_REGISTRADAS[nombre]
+    engine = create_engine(
+        constructor_url(),
+        pool_size=POOL_SIZE,
+        max_overflow=POOL_MAX_OVERFLOW,
+        pool_timeout=POOL_TIMEOUT,
+        pool_recycle=POOL_RECYCLE,
+        pool_pre_ping=POOL_PRE_PING,
+        **extra
+    )
+    if nombre == BASE_EMBEBIDA:
+        _configurar_engine_embebido(engine)
+    # Sentencias interrumpibles cuando la solicitud que las pidió es reemplazada
+    import cancelacion
+    cancelacion.instrumentar_engine(engine)
+    # Tiempos, filas y huella de cada sentencia (perfilador.reporte_consultas)
+    import perfilador
+    perfilador.instrumentar_engine(engine, nombre)
+    return engine
+
+def bases_activas():
+    """Bases que usa la app con el backend configurado."""
+    if BACKEND == "duckdb":
+        return [BASE_EMBEBIDA, DATABASE3]
+    return [DATABASE2, DATABASE3]
+
+def get_engine(nombre=DATABASE2):
+    """Devuelve el Engine compartido de la base indicada, creándolo (sin conectar) la primera vez."""
+    engine = _engines.get(nombre)
+    if engine is not None:
+        return engine
+
+    with _engines_lock:
+        engine = _engines.get(nombre)
+        if engine is None:
+            engine = _crear_engine(nombre)
+            _engines[nombre] = engine
+    return engine
+
+def nombre_base(con):
+    """Nombre registrado de la base de un Engine o Connection (para métricas y control de admisión)."""
+    engine = getattr(con, "engine", con)
+    for nombre, registrado in list(_engines.items()):
+        if registrado is engine:
+            return nombre
+    return engine.url.database or str(engine.url)
+
 def get_db_engine():
     """Establece y devuelve el motor de conexión (Engine) a SQL Server usando Autenticación de Windows."""
     try:
-        
-        DRIVER = urllib.parse.quote_plus(DRIVER_NAME)
-        
-        DB_URL = f"mssql+pyodbc://{SERVER}/{DATABASE2}?driver={DRIVER}&trusted_connection=yes"
-        
-        engine = create_engine(DB_URL, fast_executemany=True)
-        
-        # Probar la conexión
-        with engine.connect():
-            return engine
-            
+        return get_engine(DATABASE2)
+
     except Exception as e:
         print("="*50)
         print(f"ERROR DE CONEXIÓN A SQL SERVER: {e}")
@@ -33,12 +157,361 @@ def get_db_engine():
         return None
 
 def get_db_engine_umasnet():
-        connection_string = (
-            f"mssql+pyodbc://{USERNAME2}:{PASSWORD2}@{SERVER2}/{DATABASE3}"
-            "?driver=ODBC+Driver+17+for+SQL+Server"
-            "&MultipleActiveResultSets=True"
-                )
-        engine = create_engine(connection_string)
-        
-        with engine.connect():
-            return engine
\ No newline at end of file
+    return get_engine(DATABASE3)
+
+def get_db_engine_lectura():
+    """
+    Motor de solo lectura para los dashboards: SQL Server o el almacén embebido según ECAS_BACKEND.
+    En SQL Server comparte el pool de get_db_engine(), pero cada conexión que entrega lee versiones de
+    filas (ver ECAS_AISLAMIENTO_LECTURA), así una reconstrucción de tablas_derivadas.py no la bloquea.
+    """
+    global _engine_lectura
+    if BACKEND == "duckdb":
+        return get_engine(BASE_EMBEBIDA)
+    engine = get_db_engine()
+    if engine is None or AISLAMIENTO_LECTURA == "NINGUNO":
+        return engine
+    if _engine_lectura is None:
+        with _engines_lock:
+            if _engine_lectura is None:
+                _engine_lectura = _crear_engine_lectura(engine)
+    return _engine_lectura
+
+def _crear_engine_lectura(engine):
+    # Mismo pool que el engine principal; el nivel se aplica al tomar la conexión y se restablece al devolverla
+    lectura = engine.execution_options()
+    nivel = {}
+
+    @event.listens_for(lectura, "engine_connect")
+    def _aislar(conn):
+        if "valor" not in nivel:
+            nivel["valor"] = _nivel_aislamiento_lectura(engine)
+        if nivel["valor"]:
+            conn.execution_options(isolation_level=nivel["valor"])
+
+    return lectura
+
+def _nivel_aislamiento_lectura(engine):
+    """Nivel de aislamiento para los lectores según ECAS_AISLAMIENTO_LECTURA y la configuración de la base."""
+    if AISLAMIENTO_LECTURA != "AUTO":
+        return AISLAMIENTO_LECTURA.replace("_", " ")
+    try:
+        with engine.connect() as conn:
+            snapshot, rcsi = conn.execute(text(
+                "SELECT snapshot_isolation_state, is_read_committed_snapshot_on FROM sys.databases WHERE name = DB_NAME()"
+            )).one()
+    except Exception as e:
+        print(f"⚠️ No se pudo consultar el aislamiento de la base, se usa el del servidor: {e}")
+        return None
+    if snapshot == 1:
+        return "SNAPSHOT"
+    if not rcsi:
+        print(
+            f"⚠️ {engine.url.database} no tiene versiones de filas: los dashboards pueden bloquearse durante las reconstrucciones. "
+            f"Actívelas con: ALTER DATABASE {engine.url.database} SET ALLOW_SNAPSHOT_ISOLATION ON"
+        )
+    return "READ COMMITTED"
+
+# --- BACKEND EMBEBIDO (DuckDB sobre Parquet) ---
+
+def ruta_parquet(tabla):
+    return os.path.join(EMBEBIDO_DIR, f"{tabla}.parquet")
+
+def _configurar_engine_embebido(engine):
+    # Las consultas de los dashboards están escritas en T-SQL: se traducen al vuelo
+    @event.listens_for(engine, "before_execute", retval=True)
+    def _traducir(conn, clauseelement, multiparams, params, execution_options):
+        if isinstance(clauseelement, TextClause):
+            clauseelement = text(traducir_sql(clauseelement.text))
+        elif isinstance(clauseelement, str):
+            clauseelement = traducir_sql(clauseelement)
+        return clauseelement, multiparams, params
+
+    # Cada conexión nueva expone los Parquet exportados como vistas con el nombre original
+    @event.listens_for(engine, "connect")
+    def _crear_vistas(dbapi_conn, connection_record):
+        for tabla in TABLAS_EMBEBIDAS:
+            ruta = ruta_parquet(tabla)
+            if os.path.exists(ruta):
+                ruta_sql = ruta.replace("\\", "/").replace("'", "''")
+                dbapi_conn.execute(f"CREATE OR REPLACE VIEW {tabla} AS SELECT * FROM read_parquet('{ruta_sql}')")
+
+@lru_cache(maxsize=1024)
+def traducir_sql(sql, dialecto="duckdb"):
+    """
+    Traduce una consulta T-SQL al dialecto indicado conservando los parámetros :nombre.
+    Corrige además las diferencias que sqlglot no resuelve solo: FLOAT de T-SQL es de 64 bits,
+    la concatenación con '+' debe pasar a '||', REPLACE convierte implícitamente su argumento a texto
+    y OPENJSON(:lista) (filtros de varios valores) se lee como una lista JSON de texto.
+    """
+    import sqlglot
+    from sqlglot import exp
+
+    def ajustar(nodo):
+        if isinstance(nodo, exp.Table) and isinstance(nodo.this, exp.OpenJSON):
+            lista = nodo.this.this
+            desde = sqlglot.parse_one("""SELECT UNNEST(from_json(lista, '["VARCHAR"]')) AS value""", read="duckdb")
+            desde.find(exp.Column).replace(exp.var(f":{lista.name}") if isinstance(lista, exp.Placeholder) else lista)
+            return desde.subquery(alias=nodo.alias or None)
+        if isinstance(nodo, exp.Placeholder) and nodo.name:
+            return exp.var(f":{nodo.name}")
+        if isinstance(nodo, exp.DataType) and nodo.this == exp.DataType.Type.FLOAT:
+            return exp.DataType.build("DOUBLE")
+        if isinstance(nodo, exp.Add) and any(
+            isinstance(lado, (exp.GroupConcat, exp.Concat)) or (isinstance(lado, exp.Literal) and lado.is_string)
+            for lado in (nodo.left, nodo.right)
+        ):
+            return exp.DPipe(this=nodo.left, expression=nodo.right)
+        if isinstance(nodo, exp.Replace) and not isinstance(nodo.this, exp.Cast):
+            nodo.set("this", exp.cast(nodo.this, "VARCHAR"))
+        return nodo
+
+    sentencias = sqlglot.parse(sql, read="tsql")
+    return ";\n".join(s.transform(ajustar).sql(dialect=dialecto) for s in sentencias if s is not None)
+
+def _tipo_arrow(tipo_python, muestra):
+    """Tipo Arrow para una columna según el type_code del cursor (pyodbc entrega clases de Python)."""
+    import pyarrow as pa
+    import datetime
+    import decimal
+
+    tipos = {
+        int: pa.int64(),
+        float: pa.float64(),
+        decimal.Decimal: pa.float64(),
+        bool: pa.bool_(),
+        str: pa.string(),
+        datetime.datetime: pa.timestamp("us"),
+        datetime.date: pa.date32(),
+        bytes: pa.binary(),
+    }
+    if tipo_python in tipos:
+        return tipos[tipo_python]
+
+    # Drivers que no informan el tipo: se infiere del primer lote
+    inferido = pa.array(muestra).type
+    return pa.string() if pa.types.is_null(inferido) else inferido
+
+def exportar_tabla_embebida(tabla, consulta=None, lote=200_000):
+    """
+    Copia una tabla de SQL Server a Parquet en EMBEBIDO_DIR, por lotes y con el esquema tomado del cursor.
+    Se escribe en un archivo temporal y se reemplaza al final, así los lectores nunca ven un archivo a medias.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import decimal
+
+    consulta = consulta or TABLAS_EMBEBIDAS.get(tabla) or f"SELECT * FROM {tabla}"
+    os.makedirs(EMBEBIDO_DIR, exist_ok=True)
+    destino = ruta_parquet(tabla)
+    temporal = destino + ".tmp"
+
+    inicio = time.perf_counter()
+    filas = 0
+    escritor = None
+    try:
+        with get_engine(DATABASE2).connect() as conn:
+            resultado = conn.execution_options(stream_results=True).execute(text(consulta))
+            descripcion = resultado.cursor.description
+            decimales = [i for i, col in enumerate(descripcion) if col[1] is decimal.Decimal]
+
+            while True:
+                filas_lote = resultado.fetchmany(lote)
+                if not filas_lote:
+                    break
+                columnas = [list(c) for c in zip(*filas_lote)]
+                for i in decimales:
+                    columnas[i] = [None if v is None else float(v) for v in columnas[i]]
+
+                if escritor is None:
+                    esquema = pa.schema([
+                        (col[0], _tipo_arrow(col[1], columnas[i])) for i, col in enumerate(descripcion)
+                    ])
+                    escritor = pq.ParquetWriter(temporal, esquema)
+                escritor.write_table(pa.table(columnas, schema=esquema))
+                filas += len(filas_lote)
+
+            if escritor is None:
+                # Tabla vacía: se deja un Parquet con las columnas para que la vista exista igual
+                esquema = pa.schema([(col[0], _tipo_arrow(col[1], [])) for col in descripcion])
+                escritor = pq.ParquetWriter(temporal, esquema)
+    finally:
+        if escritor is not None:
+            escritor.close()
+
+    os.replace(temporal, destino)
+    print(f"Tabla '{tabla}' exportada al almacén embebido: {filas} filas en {time.perf_counter() - inicio:.1f} s")
+    return filas
+
+def exportar_si_configurado(tabla):
+    """Exporta la tabla recién reconstruida si ECAS_EXPORTAR_EMBEBIDO está activo; nunca interrumpe la reconstrucción."""
+    if not EXPORTAR_EMBEBIDO:
+        return
+    try:
+        exportar_tabla_embebida(tabla)
+    except Exception as e:
+        print(f"Error al exportar '{tabla}' al almacén embebido: {e}")
+
+def exportar_tablas_embebidas():
+    """Exporta todas las tablas del almacén embebido (carga inicial o re-sincronización completa)."""
+    for tabla in TABLAS_EMBEBIDAS:
+        try:
+            exportar_tabla_embebida(tabla)
+        except Exception as e:
+            print(f"Error al exportar '{tabla}' al almacén embebido: {e}")
+
+# --- VERSIONES DE DATOS ---
+
+def marcar_version_datos(tabla):
+    """Incrementa la versión de una tabla recién reconstruida en data_version (la crea si no existe)."""
+    sql_tabla = text(f"""
+    IF OBJECT_ID('{TABLA_VERSIONES}', 'U') IS NULL
+        CREATE TABLE {TABLA_VERSIONES} (
+            tabla VARCHAR(128) NOT NULL PRIMARY KEY,
+            version BIGINT NOT NULL,
+            actualizado DATETIME NOT NULL
+        );
+    """)
+    sql_version = text(f"""
+    MERGE {TABLA_VERSIONES} AS d
+    USING (SELECT :tabla AS tabla) AS s ON d.tabla = s.tabla
+    WHEN MATCHED THEN UPDATE SET version = d.version + 1, actualizado = GETDATE()
+    WHEN NOT MATCHED THEN INSERT (tabla, version, actualizado) VALUES (s.tabla, 1, GETDATE());
+    """)
+    with get_engine(DATABASE2).begin() as conn:
+        conn.execute(sql_tabla)
+        conn.execute(sql_version, {"tabla": tabla})
+    print(f"Versión de '{tabla}' actualizada.")
+
+def publicar_tabla_derivada(tabla):
+    """
+    Deja visible una tabla recién reconstruida: la exporta al almacén embebido (si corresponde) y luego
+    sube su versión, para que ningún lector vea la versión nueva con los datos anteriores.
+    """
+    exportar_si_configurado(tabla)
+    try:
+        marcar_version_datos(tabla)
+    except Exception as e:
+        print(f"Error al marcar la versión de '{tabla}': {e}")
+        return
+    exportar_si_configurado(TABLA_VERSIONES)
+
+# --- RECONSTRUCCIÓN DE TABLAS DERIVADAS ---
+
+def _nombre_temporal(tabla, sufijo):
+    return f"{tabla}__{sufijo}"
+
+def reconstruir_tabla(conn, tabla, *sentencias):
+    """
+    Ejecuta las sentencias que reconstruyen `tabla` (DROP, SELECT ... INTO, CREATE INDEX) sin dejar a los
+    lectores sin tabla. En modo "intercambio" se ejecutan sobre <tabla>__nueva y al final se cambia por la
+    actual con sp_rename, que solo necesita un bloqueo de esquema breve; la anterior se borra después.
+    El commit queda a cargo del llamador, igual que con conn.execute.
+    """
+    if MODO_RECONSTRUCCION != "intercambio":
+        for sentencia in sentencias:
+            conn.execute(sentencia if isinstance(sentencia, TextClause) else text(sentencia))
+        return
+
+    import re
+    nueva = _nombre_temporal(tabla, "nueva")
+    patron = re.compile(rf"\b{re.escape(tabla)}\b")
+    for sentencia in sentencias:
+        sql = sentencia.text if isinstance(sentencia, TextClause) else sentencia
+        conn.execute(text(patron.sub(nueva, sql)))
+    _intercambiar_tabla(conn, tabla)
+
+def _intercambiar_tabla(conn, tabla):
+    nueva = _nombre_temporal(tabla, "nueva")
+    anterior = _nombre_temporal(tabla, "anterior")
+    intercambio = text(f"""
+    SET LOCK_TIMEOUT {LOCK_TIMEOUT_INTERCAMBIO_MS};
+    IF OBJECT_ID('{anterior}', 'U') IS NOT NULL
+        DROP TABLE {anterior};
+    IF OBJECT_ID('{tabla}', 'U') IS NOT NULL
+        EXEC sp_rename '{tabla}', '{anterior}';
+    EXEC sp_rename '{nueva}', '{tabla}';
+    SET LOCK_TIMEOUT -1;
+    """)
+    for intento in range(1, REINTENTOS_INTERCAMBIO + 1):
+        try:
+            conn.execute(intercambio)
+            break
+        except Exception as e:
+            # 1222: lectores largos aún tienen la tabla; el lote se puede repetir sin efectos parciales
+            if "1222" not in str(e) or intento == REINTENTOS_INTERCAMBIO:
+                conn.exec_driver_sql("SET LOCK_TIMEOUT -1")
+                raise
+            print(f"⚠️ '{tabla}' en uso, reintentando el intercambio ({intento}/{REINTENTOS_INTERCAMBIO})...")
+            time.sleep(1)
+    conn.execute(text(f"IF OBJECT_ID('{anterior}', 'U') IS NOT NULL DROP TABLE {anterior};"))
+
+def _tabla_inexistente(error):
+    # FileNotFoundError: almacén embebido sin data_version.parquet; 42S02 / 208: "Invalid object name" en SQL Server
+    texto = str(error)
+    return isinstance(error, FileNotFoundError) or "42S02" in texto or "Invalid object name" in texto
+
+def leer_versiones_datos():
+    """
+    Versiones actuales de las tablas derivadas según el backend de lectura: {tabla: version}.
+    Retorna {} si no existe la tabla de versiones y None si no se pudo leer (p. ej. la base no responde),
+    para que quien llama conserve las versiones que ya conocía.
+    """
+    try:
+        if BACKEND == "duckdb":
+            # Se lee el archivo directamente: la vista solo existe en conexiones abiertas después de exportarlo
+            import pyarrow.parquet as pq
+            datos = pq.read_table(ruta_parquet(TABLA_VERSIONES), columns=["tabla", "version"]).to_pydict()
+            filas = zip(datos["tabla"], datos["version"])
+        else:
+            with get_db_engine_lectura().connect() as conn:
+                filas = conn.execute(text(f"SELECT tabla, version FROM {TABLA_VERSIONES}")).fetchall()
+    except Exception as e:
+        if _tabla_inexistente(e):
+            # Sin tabla de versiones (base antigua o almacén sin exportar) se trabaja sin versiones
+            return {}
+        print(f"⚠️ No se pudieron leer las versiones de datos: {e}")
+        return None
+    return {tabla: int(version) for tabla, version in filas}
+
+def medir_conexion(nombre):
+    """Abre una conexión del pool indicado y registra cuánto tardó (en segundos)."""
+    engine = get_engine(nombre)
+    inicio = time.perf_counter()
+    with engine.connect():
+        pass
+    duracion = time.perf_counter() - inicio
+    _tiempos_conexion[nombre] = duracion
+    return duracion
+
+def reporte_pools(bases=None):
+    """
+    Conecta cada pool registrado y muestra el tiempo de conexión junto a su configuración.
+    Pensado para ejecutarse una vez al arrancar la app; un fallo en una base no detiene a las demás.
+    """
+    bases = bases or bases_activas()
+    reporte = {}
+
+    print("="*50)
+    print(f"Pools SQL [backend={BACKEND}] (size={POOL_SIZE}, overflow={POOL_MAX_OVERFLOW}, "
+          f"pre_ping={POOL_PRE_PING}, recycle={POOL_RECYCLE}s)")
+    for nombre in bases:
+        try:
+            duracion = medir_conexion(nombre)
+            reporte[nombre] = duracion
+            print(f"  {nombre:<20} conectado en {duracion:.3f} s")
+        except Exception as e:
+            reporte[nombre] = None
+            print(f"  {nombre:<20} ERROR DE CONEXIÓN: {e}")
+    print("="*50)
+
+    return reporte
+
+def dispose_engines():
+    """Cierra todos los pools (útil tras un fork de workers o al apagar la app)."""
+    global _engine_lectura
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+        _engine_lectura = None
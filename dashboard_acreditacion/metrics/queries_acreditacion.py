@@ -1,18 +1,18 @@
-from conn_db import get_db_engine
-from sqlalchemy import text
-import pandas as pd
+from conn_db import get_db_engine_lectura
+from lectura import leer_sql, sql_estable, filtro_opcional, valor_filtro
+from cache_consultas import cachear_consulta
+from admision import con_prioridad
 from typing import Optional, List
 
-db_engine = get_db_engine()
+db_engine = get_db_engine_lectura()
 
+@cachear_consulta
 def get_movilidad_acreditacion_estricta(anio_seleccionado, jornada="Todas", tipo_inst="Todas"):
-    params = {"anio_seleccionado": anio_seleccionado}
+    params = {"anio_seleccionado": anio_seleccionado, "jornada": valor_filtro(jornada), "tipo_inst": valor_filtro(tipo_inst)}
     
-    f_jornada = "AND f.jornada_ecas = :jornada" if jornada != "Todas" else ""
-    if jornada != "Todas": params["jornada"] = jornada
+    f_jornada = "AND " + filtro_opcional("f.jornada_ecas", "jornada")
     
-    f_tipo = "AND f.tipo_inst_1 = :tipo_inst" if tipo_inst != "Todas" else ""
-    if tipo_inst != "Todas": params["tipo_inst"] = tipo_inst
+    f_tipo = "AND " + filtro_opcional("f.tipo_inst_1", "tipo_inst")
 
     sql_query = f"""
     WITH Acred_ECAS AS (
@@ -66,11 +66,13 @@ def get_movilidad_acreditacion_estricta(anio_seleccionado, jornada="Todas", tipo
             ELSE 'Menos Acreditada'
         END
     """
-    df = pd.read_sql(text(sql_query), db_engine, params=params)
+    df = leer_sql(sql_estable(sql_query), db_engine, params=params)
     return df
 
 #print(get_movilidad_acreditacion_estricta(anio_seleccionado=2007))
 
+@con_prioridad("kpi")
+@cachear_consulta
 def get_metrics_acreditacion(periodo_seleccionado, jornada_filtro="Todas"):
     periodo_actual = int(periodo_seleccionado)
     periodo_siguiente = periodo_actual + 1
@@ -82,9 +84,8 @@ def get_metrics_acreditacion(periodo_seleccionado, jornada_filtro="Todas"):
         "periodo_siguiente": periodo_siguiente
     }
 
-    f_jornada = "AND UltimaJornada.jornada = :jornada" if jornada_filtro != "Todas" else ""
-    if jornada_filtro != "Todas":
-        params["jornada"] = jornada_filtro
+    f_jornada = "AND " + filtro_opcional("UltimaJornada.jornada", "jornada")
+    params["jornada"] = valor_filtro(jornada_filtro)
 
     sql_query = f"""
     WITH Titulados_ECAS AS (
@@ -133,19 +134,20 @@ def get_metrics_acreditacion(periodo_seleccionado, jornada_filtro="Todas"):
         (SELECT total_desertores FROM Desertores) as cant_desertores
     """
 
-    df = pd.read_sql(text(sql_query), db_engine, params=params).iloc[0]
+    df = leer_sql(sql_estable(sql_query), db_engine, params=params).iloc[0]
 
     return df
 
+@cachear_consulta
 def get_detalle_instituciones_fuga(periodo_sel, categoria_sel, jornada="Todas"):
     params = {
         "periodo": periodo_sel,
-        "categoria": categoria_sel
+        "categoria": categoria_sel,
+        "jornada": valor_filtro(jornada)
     }
     
     # Filtro opcional de jornada basado en permanencia
-    f_jornada = "AND f.jornada_ecas = :jornada" if jornada != "Todas" else ""
-    if jornada != "Todas": params["jornada"] = jornada
+    f_jornada = "AND " + filtro_opcional("f.jornada_ecas", "jornada")
 
     sql_query = f"""
     WITH Acred_ECAS AS (
@@ -190,4 +192,4 @@ def get_detalle_instituciones_fuga(periodo_sel, categoria_sel, jornada="Todas"):
     GROUP BY inst_destino
     ORDER BY cantidad_alumnos DESC
     """
-    return pd.read_sql(text(sql_query), db_engine, params=params)
\ No newline at end of file
+    return leer_sql(sql_estable(sql_query), db_engine, params=params)
\ No newline at end of file
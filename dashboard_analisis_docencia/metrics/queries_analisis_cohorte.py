@@ -1,14 +1,16 @@
 from conn_db import *
-import pandas as pd
+from lectura import leer_sql, sql_estable, filtro_opcional, valor_filtro
+from cache_consultas import cachear_consulta
 
 db_engine = get_db_engine_umasnet()
 
 limite_año= 2019
 
+@cachear_consulta
 def obtener_distribucion_historica_ingreso(jornada="Todas", genero="Todos"):
     
-    filtro_j = f"AND t1.JORNADA = '{jornada}'" if jornada != "Todas" else ""
-    filtro_g = f"AND t2.SEXO = '{genero}'" if genero != "Todos" else ""
+    filtro_j = "AND " + filtro_opcional("t1.JORNADA", "jornada")
+    filtro_g = "AND " + filtro_opcional("t2.SEXO", "genero")
 
     sql_query = f"""
     WITH COHORTES_VALIDAS AS (
@@ -33,16 +35,17 @@ def obtener_distribucion_historica_ingreso(jornada="Todas", genero="Todos"):
     ORDER BY t1.ANO DESC, t1.JORNADA, t2.SEXO
     """
 
-    df = pd.read_sql(sql_query, db_engine)
+    df = leer_sql(sql_estable(sql_query), db_engine, params={"jornada": valor_filtro(jornada), "genero": valor_filtro(genero)})
 
     return df
 
 #print(obtener_distribucion_historica_ingreso())
 
+@cachear_consulta
 def obtener_distribucion_nacionalidad_ingreso(jornada="Todas", genero="Todos"):
 
-    filtro_j = f"AND t1.JORNADA = '{jornada}'" if jornada != "Todas" else ""
-    filtro_g = f"AND t2.SEXO = '{genero}'" if genero != "Todos" else ""
+    filtro_j = "AND " + filtro_opcional("t1.JORNADA", "jornada")
+    filtro_g = "AND " + filtro_opcional("t2.SEXO", "genero")
 
     sql_query = f"""
     WITH COHORTES_VALIDAS AS (
@@ -69,16 +72,17 @@ def obtener_distribucion_nacionalidad_ingreso(jornada="Todas", genero="Todos"):
     ORDER BY t1.ANO DESC, t2.NACIONALIDAD ASC
     """
 
-    df = pd.read_sql(sql_query, db_engine)
+    df = leer_sql(sql_estable(sql_query), db_engine, params={"jornada": valor_filtro(jornada), "genero": valor_filtro(genero)})
 
     return df 
 
 #print(obtener_distribucion_nacionalidad_ingreso())
 
+@cachear_consulta
 def obtener_distribucion_comuna_historica(jornada="Todas", genero="Todos"):
     
-    filtro_j = f"AND t1.JORNADA = '{jornada}'" if jornada != "Todas" else ""
-    filtro_g = f"AND t2.SEXO = '{genero}'" if genero != "Todos" else ""
+    filtro_j = "AND " + filtro_opcional("t1.JORNADA", "jornada")
+    filtro_g = "AND " + filtro_opcional("t2.SEXO", "genero")
 
     sql_query = f"""
     WITH COHORTES_VALIDAS AS (
@@ -105,7 +109,7 @@ def obtener_distribucion_comuna_historica(jornada="Todas", genero="Todos"):
     GROUP BY t1.ANO, t2.COMUNA, t1.JORNADA, t2.SEXO
     ORDER BY t1.ANO DESC, t2.COMUNA ASC
     """
-    df = pd.read_sql(sql_query, db_engine)
+    df = leer_sql(sql_estable(sql_query), db_engine, params={"jornada": valor_filtro(jornada), "genero": valor_filtro(genero)})
 
     return df
 
@@ -161,17 +165,18 @@ def obtener_distribucion_comuna_historica(jornada="Todas", genero="Todos"):
 #     ORDER BY t1.ANO DESC, EDAD ASC
 #     """
 
-#     df = pd.read_sql(sql_query, db_engine)
+#     df = leer_sql(sql_query, db_engine)
 
 #     return df
 
 #print(obtener_distribucion_edad_historica())
 
 #La versión incluida en el dashboard anterior calculaba edades actuales, no de ingreso.
+@cachear_consulta
 def obtener_distribucion_edad_historica(jornada="Todas", genero="Todos"):
     
-    filtro_j = f"AND t1.JORNADA = '{jornada}'" if jornada != "Todas" else ""
-    filtro_g = f"AND t2.SEXO = '{genero}'" if genero != "Todos" else ""
+    filtro_j = "AND " + filtro_opcional("t1.JORNADA", "jornada")
+    filtro_g = "AND " + filtro_opcional("t2.SEXO", "genero")
 
     sql_query = f"""
     WITH COHORTES_VALIDAS AS (
@@ -205,13 +210,14 @@ def obtener_distribucion_edad_historica(jornada="Todas", genero="Todos"):
     ORDER BY t1.ANO DESC, EDAD ASC
     """
 
-    df = pd.read_sql(sql_query, db_engine)
+    df = leer_sql(sql_estable(sql_query), db_engine, params={"jornada": valor_filtro(jornada), "genero": valor_filtro(genero)})
     return df
 
+@cachear_consulta
 def obtener_distribucion_via_admision_historica(jornada="Todas", genero="Todos"):
 
-    filtro_j = f"AND t1.JORNADA = '{jornada}'" if jornada != "Todas" else ""
-    filtro_g = f"AND t2.SEXO = '{genero}'" if genero != "Todos" else ""
+    filtro_j = "AND " + filtro_opcional("t1.JORNADA", "jornada")
+    filtro_g = "AND " + filtro_opcional("t2.SEXO", "genero")
 
     sql_query = f"""
     WITH COHORTES_VALIDAS AS (
@@ -244,14 +250,15 @@ def obtener_distribucion_via_admision_historica(jornada="Todas", genero="Todos")
     ORDER BY t1.ANO DESC, CANTIDAD DESC
     """
 
-    df = pd.read_sql(sql_query, db_engine)
+    df = leer_sql(sql_estable(sql_query), db_engine, params={"jornada": valor_filtro(jornada), "genero": valor_filtro(genero)})
 
     return df
 
+@cachear_consulta
 def obtener_distribucion_modalidad_historica(jornada="Todas", genero="Todos"):
     
-    filtro_j = f"AND t1.JORNADA = '{jornada}'" if jornada != "Todas" else ""
-    filtro_g = f"AND t2.SEXO = '{genero}'" if genero != "Todos" else ""
+    filtro_j = "AND " + filtro_opcional("t1.JORNADA", "jornada")
+    filtro_g = "AND " + filtro_opcional("t2.SEXO", "genero")
 
     sql_query = f"""
     WITH COHORTES_VALIDAS AS (
@@ -284,18 +291,19 @@ def obtener_distribucion_modalidad_historica(jornada="Todas", genero="Todos"):
     ORDER BY t1.ANO DESC, CANTIDAD DESC
     """
 
-    df = pd.read_sql(sql_query, db_engine)
+    df = leer_sql(sql_estable(sql_query), db_engine, params={"jornada": valor_filtro(jornada), "genero": valor_filtro(genero)})
     
     return df
 
+@cachear_consulta
 def obtener_metricas_titulacion_seguimiento(jornada="Todas", genero="Todos", anios_seguimiento=4):
     """
     Calcula la tasa de titulación para una cohorte X tras N años de seguimiento.
     Ejemplo: Para cohorte 2010 con anios_seguimiento=4, cuenta titulados hasta 2014 inclusive.
     """
     
-    filtro_j = f"AND t1.JORNADA = '{jornada}'" if jornada != "Todas" else ""
-    filtro_g = f"AND t2.SEXO = '{genero}'" if genero != "Todos" else ""
+    filtro_j = "AND " + filtro_opcional("t1.JORNADA", "jornada")
+    filtro_g = "AND " + filtro_opcional("t2.SEXO", "genero")
 
     sql_query = f"""
     WITH COHORTES_VALIDAS AS (
@@ -313,11 +321,11 @@ def obtener_metricas_titulacion_seguimiento(jornada="Todas", genero="Todos", ani
         COUNT(1) AS CANTIDAD,
         COUNT(CASE 
             WHEN t1.ESTACAD = 'TITULADO' 
-            AND t1.ANOTIT <= (t1.ANO + {anios_seguimiento}) THEN 1 
+            AND t1.ANOTIT <= (t1.ANO + :anios_seguimiento) THEN 1 
         END) AS TITULADOS_PLAZO,
         COUNT(1) - COUNT(CASE 
             WHEN t1.ESTACAD = 'TITULADO' 
-            AND t1.ANOTIT <= (t1.ANO + {anios_seguimiento}) THEN 1 
+            AND t1.ANOTIT <= (t1.ANO + :anios_seguimiento) THEN 1 
         END) AS RESTO_COHORTE
     FROM [umasnet].[dbo].[MT_ALUMNO] t1
     JOIN [umasnet].[dbo].[MT_CLIENT] t2 ON t2.[CODCLI] = t1.[RUT]
@@ -335,7 +343,7 @@ def obtener_metricas_titulacion_seguimiento(jornada="Todas", genero="Todos", ani
         t2.SEXO
     """
 
-    df = pd.read_sql(sql_query, db_engine)
+    df = leer_sql(sql_estable(sql_query), db_engine, params={"jornada": valor_filtro(jornada), "genero": valor_filtro(genero), "anios_seguimiento": anios_seguimiento})
         
     return df
 
@@ -1,10 +1,12 @@
 from conn_db import *
-import pandas as pd
+from lectura import leer_sql, sql_estable, filtro_opcional, valor_filtro
+from cache_consultas import cachear_consulta
 
 db_engine = get_db_engine_umasnet()
 
 limite_anio = 2015
 
+@cachear_consulta
 def query_matriculas_totales():
     
     sql_query = f"""
@@ -42,16 +44,17 @@ def query_matriculas_totales():
         ORDER BY añomat DESC
     """
 
-    df = pd.read_sql(sql_query, db_engine)
+    df = leer_sql(sql_query, db_engine)
 
     return df
 
 #print(query_matriculas_totales())
 
+@cachear_consulta
 def query_alumnos_nuevos(jornada="Todas", genero="Todos"):
     
-    filtro_j = f"AND t1.JORNADA = '{jornada}'" if jornada != "Todas" else ""
-    filtro_g = f"AND t2.SEXO = '{genero}'" if genero != "Todos" else ""
+    filtro_j = "AND " + filtro_opcional("t1.JORNADA", "jornada")
+    filtro_g = "AND " + filtro_opcional("t2.SEXO", "genero")
 
     sql_query = f"""
     WITH COHORTES_VALIDAS AS (
@@ -83,16 +86,17 @@ def query_alumnos_nuevos(jornada="Todas", genero="Todos"):
         t2.SEXO
     """
 
-    df = pd.read_sql(sql_query, db_engine)
+    df = leer_sql(sql_estable(sql_query), db_engine, params={"jornada": valor_filtro(jornada), "genero": valor_filtro(genero)})
         
     return df
 
 #print(query_alumnos_nuevos())
 
+@cachear_consulta
 def query_distribucion_demora_titulacion(jornada="Todas", genero="Todos"):
     
-    filtro_j = f"AND t1.JORNADA = '{jornada}'" if jornada != "Todas" else ""
-    filtro_g = f"AND t2.SEXO = '{genero}'" if genero != "Todos" else ""
+    filtro_j = "AND " + filtro_opcional("t1.JORNADA", "jornada")
+    filtro_g = "AND " + filtro_opcional("t2.SEXO", "genero")
 
     sql_query = f"""
     WITH COHORTES_VALIDAS AS (
@@ -128,12 +132,13 @@ def query_distribucion_demora_titulacion(jornada="Todas", genero="Todos"):
         ANIOS_DEMORA ASC
     """
 
-    df = pd.read_sql(sql_query, db_engine)
+    df = leer_sql(sql_estable(sql_query), db_engine, params={"jornada": valor_filtro(jornada), "genero": valor_filtro(genero)})
     
     return df
 
 #print(query_distribucion_demora_titulacion())
 
+@cachear_consulta
 def obtener_metricas_vias_admision_vacantes(limite_anio=2019):
     """
     Calcula la cantidad de alumnos y el porcentaje de ocupación de vacantes
@@ -154,7 +159,7 @@ def obtener_metricas_vias_admision_vacantes(limite_anio=2019):
         JOIN [umasnet].[dbo].[MT_ALUMNO] t2 ON t1.CODCLI = t2.CODCLI
         WHERE t1.PERIODO = 1 
           AND t1.ANO = t2.ANO 
-          AND t2.ANO >= {limite_anio}
+          AND t2.ANO >= :limite_anio
     ) 
     SELECT 
         t1.ANO AS COHORTE,
@@ -176,19 +181,20 @@ def obtener_metricas_vias_admision_vacantes(limite_anio=2019):
         CANTIDAD_MATRICULADOS DESC
     """
 
-    df = pd.read_sql(sql_query, db_engine)
+    df = leer_sql(sql_estable(sql_query), db_engine, params={"limite_anio": limite_anio})
         
     return df
 
 #print(obtener_metricas_vias_admision_vacantes())
 
+@cachear_consulta
 def obtener_persistencia_retencion_historica(jornada="Todas", genero="Todos"):
     """
     Calcula la persistencia año a año incluyendo la CANTIDAD_INICIAL de la cohorte.
     """
     
-    filtro_j = f"AND t1.JORNADA = '{jornada}'" if jornada != "Todas" else ""
-    filtro_g = f"AND t4.SEXO = '{genero}'" if genero != "Todos" else ""
+    filtro_j = "AND " + filtro_opcional("t1.JORNADA", "jornada")
+    filtro_g = "AND " + filtro_opcional("t4.SEXO", "genero")
 
     columnas_seguimiento = ", ".join([
         f"COUNT(DISTINCT CASE WHEN t2.ano_mat = t1.ANO + {i} "
@@ -232,7 +238,7 @@ def obtener_persistencia_retencion_historica(jornada="Todas", genero="Todos"):
     ORDER BY t1.ANO DESC
     """
 
-    df = pd.read_sql(sql_query, db_engine)
+    df = leer_sql(sql_estable(sql_query), db_engine, params={"jornada": valor_filtro(jornada), "genero": valor_filtro(genero)})
 
     if not df.empty:
         # Al hacer el melt, incluimos CANTIDAD_INICIAL en id_vars para que no se pierda
@@ -251,6 +257,7 @@ def obtener_persistencia_retencion_historica(jornada="Todas", genero="Todos"):
 
 print(obtener_persistencia_retencion_historica(jornada="Todas", genero="Todos"))
 
+@cachear_consulta
 def query_docentes_area_formacion():
 
     sql_query = f"""
@@ -271,10 +278,11 @@ def query_docentes_area_formacion():
     ORDER BY t1.[ano] DESC
     """
 
-    df = pd.read_sql(sql_query, db_engine)
+    df = leer_sql(sql_query, db_engine)
 
     return df
 
+@cachear_consulta
 def query_docentes_tipo_contrato():
 
     sql_query = f"""
@@ -293,12 +301,13 @@ def query_docentes_tipo_contrato():
     ORDER BY t1.[ano] DESC
     """
 
-    df = pd.read_sql(sql_query, db_engine)
+    df = leer_sql(sql_query, db_engine)
 
     return df
 
 #print(query_docentes_tipo_contrato())
 
+@cachear_consulta
 def query_docentes_tasa_rotacion():
 
     sql_query = f"""
@@ -345,10 +354,11 @@ def query_docentes_tasa_rotacion():
         ano_actual DESC;
     """
 
-    df = pd.read_sql(sql_query, db_engine)
+    df = leer_sql(sql_query, db_engine)
 
     return df
 
+@cachear_consulta
 def query_docentes_horario():
 
     sql_query = f"""
@@ -366,14 +376,15 @@ def query_docentes_horario():
     GROUP BY t1.[ano]
     ORDER BY t1.[ano] DESC"""
 
-    df = pd.read_sql(sql_query, db_engine)
+    df = leer_sql(sql_query, db_engine)
 
     return df
 
+@cachear_consulta
 def query_reprobados_primer_anio_filtrada(jornada="Todas", genero="Todos"):
     
-    filtro_j = f"AND t2.JORNADA = '{jornada}'" if jornada != "Todas" else ""
-    filtro_g = f"AND t3.SEXO = '{genero}'" if genero != "Todos" else ""
+    filtro_j = "AND " + filtro_opcional("t2.JORNADA", "jornada")
+    filtro_g = "AND " + filtro_opcional("t3.SEXO", "genero")
 
     sql_query = f"""
     WITH Equivalencias AS (
@@ -432,16 +443,17 @@ def query_reprobados_primer_anio_filtrada(jornada="Todas", genero="Todos"):
     ORDER BY R.COHORTE ASC, R.CODRAMO;
     """
 
-    df = pd.read_sql(sql_query, db_engine)
+    df = leer_sql(sql_estable(sql_query), db_engine, params={"jornada": valor_filtro(jornada), "genero": valor_filtro(genero)})
 
     return df
 
 #print(query_reprobados_primer_anio_filtrada(jornada="V", genero="F"))
 
+@cachear_consulta
 def query_reprobados_historico_simple(jornada="Todas", genero="Todos"):
     
-    filtro_j = f"AND T2.JORNADA = '{jornada}'" if jornada != "Todas" else ""
-    filtro_g = f"AND T4.SEXO = '{genero}'" if genero != "Todos" else ""
+    filtro_j = "AND " + filtro_opcional("T2.JORNADA", "jornada")
+    filtro_g = "AND " + filtro_opcional("T4.SEXO", "genero")
 
     sql_query = f"""
     WITH Equivalencias AS (
@@ -471,6 +483,6 @@ def query_reprobados_historico_simple(jornada="Todas", genero="Todos"):
         T2.JORNADA
     ORDER BY T2.ANO ASC;
     """
-    return pd.read_sql(sql_query, db_engine)
+    return leer_sql(sql_estable(sql_query), db_engine, params={"jornada": valor_filtro(jornada), "genero": valor_filtro(genero)})
 
 #print(query_reprobados_historico_simple(jornada="D", genero="F"))
\ No newline at end of file
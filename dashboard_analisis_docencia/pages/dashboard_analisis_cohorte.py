@@ -4,6 +4,7 @@ from dash import dcc, html, callback, Output, Input, State
 from dashboard_analisis_docencia.metrics.queries_analisis_cohorte import *
 from dashboard_analisis_docencia.graphics.graphics_cohorte import *
 from dash import callback_context
+import pandas as pd
 
 CONTENT_STYLE = {
     "min-height": "100vh",
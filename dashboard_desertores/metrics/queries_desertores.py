@@ -1,46 +1,40 @@
 from conn_db import *
-from sqlalchemy import text
+from lectura import leer_sql, sql_estable, filtro_opcional, valor_filtro, filtro_lista, valor_lista
+from cache_consultas import cachear_consulta
+from admision import con_prioridad
 import pandas as pd
 from typing import Optional, List
-import time
 
-db_engine = get_db_engine()
+db_engine = get_db_engine_lectura()
 
+@con_prioridad("kpi")
+@cachear_consulta
 def get_regiones_disponibles():
     sql = "SELECT DISTINCT region_sede FROM tabla_matriculas_competencia_unificada ORDER BY region_sede ASC"
-    df = pd.read_sql(sql, db_engine)
+    df = leer_sql(sql_estable(sql), db_engine)
     return df['region_sede'].dropna().tolist()
 
 #print(get_regiones_disponibles())
 
+@cachear_consulta
 def get_ingresos_competencia_parametrizado(top_n=10, anio_min=2007, anio_max=2025, jornada=None, genero="Todos", region_sede=None):
-    
-    inicio = time.time()
 
-    params = {"top_n": top_n, "anio_min": anio_min, "anio_max": anio_max, "region_sede": region_sede}
-    
-    filtro_jornada = "AND jornada = :jornada" if jornada and jornada != "Todas" else ""
-    if filtro_jornada: params["jornada"] = jornada
+    params = {
+        "top_n": top_n, "anio_min": anio_min, "anio_max": anio_max,
+        "jornada": valor_filtro(jornada), "genero": valor_filtro(genero),
+        "regiones": valor_lista(region_sede)
+    }
 
-    filtro_genero = "AND genero = :genero" if genero and genero != "Todos" else ""
-    if filtro_genero: params["genero"] = genero
-
-    if region_sede and isinstance(region_sede, list) and len(region_sede) > 0:
-        region_keys = [f"reg{i}" for i in range(len(region_sede))]
-        for i, val in enumerate(region_sede):
-            params[f"reg{i}"] = val
-        
-        filtro_sede = f"AND (region_sede IN ({', '.join([':' + k for k in region_keys])}) OR cod_inst = 104)"
-    else:
-        filtro_sede = ""
+    # Regiones como una sola lista JSON: el mismo texto sirve para 0, 1 o 16 regiones (ECAS siempre se incluye)
+    filtro_sede = f"AND (:regiones IS NULL OR {filtro_lista('region_sede', 'regiones')} OR cod_inst = 104)"
 
     sql_query = f"""
     WITH base AS (
         SELECT cohorte, cod_inst, nomb_inst, COUNT(DISTINCT mrun) AS total_ingresos
         FROM tabla_matriculas_competencia_unificada
         WHERE cohorte BETWEEN :anio_min AND :anio_max
-        {filtro_jornada}
-        {filtro_genero}
+        AND {filtro_opcional("jornada", "jornada")}
+        AND {filtro_opcional("genero", "genero")}
         {filtro_sede}
         GROUP BY cohorte, cod_inst, nomb_inst
     ),
@@ -59,17 +53,13 @@ def get_ingresos_competencia_parametrizado(top_n=10, anio_min=2007, anio_max=202
     ORDER BY b.cohorte, b.total_ingresos DESC;
     """
 
-    
-    df = pd.read_sql(text(sql_query), db_engine, params=params)
-
-    fin = time.time()
 
-    #print(f"Tiempo total: {fin-inicio:.4f} segundos")
-    
-    return df
+    # Tiempos por consulta: perfilador.reporte_consultas()
+    return leer_sql(sql_estable(sql_query), db_engine, params=params)
 
 #print(get_ingresos_competencia_parametrizado(anio_min=2007, anio_max=2007))
 
+@cachear_consulta
 def get_permanencia_n_n1_competencia(anio_min= 2007, anio_max= 2025, jornada= None, genero="Todos", region_sede=None) -> pd.DataFrame:
     
     anio_max_ajustado = min(anio_max, 2024)
@@ -78,22 +68,12 @@ def get_permanencia_n_n1_competencia(anio_min= 2007, anio_max= 2025, jornada= No
         "anio_min": anio_min,
         "anio_max": anio_max_ajustado,
         "anio_max_ext": anio_max_ajustado + 1,
-        "genero": genero,
-        "jornada": jornada
+        "genero": valor_filtro(genero),
+        "jornada": valor_filtro(jornada),
+        "regiones": valor_lista(region_sede)
     }
 
-    filtro_jornada_cohorte = "AND jornada = :jornada" if jornada and jornada != "Todas" else ""
-    if filtro_jornada_cohorte: params["jornada"] = jornada
-
-    filtro_genero = "AND genero = :genero" if genero and genero != "Todos" else ""
-
-    if region_sede and isinstance(region_sede, list) and len(region_sede) > 0:
-        region_keys = [f"reg{i}" for i in range(len(region_sede))]
-        for i, val in enumerate(region_sede):
-            params[f"reg{i}"] = val
-        filtro_sede = f"AND (region_sede IN ({', '.join([':' + k for k in region_keys])}) OR cod_inst = 104)"
-    else:
-        filtro_sede = ""
+    filtro_sede = f"AND (:regiones IS NULL OR {filtro_lista('region_sede', 'regiones')} OR cod_inst = 104)"
 
     sql_query = f"""
         WITH universo_cohortes AS (
@@ -101,8 +81,8 @@ def get_permanencia_n_n1_competencia(anio_min= 2007, anio_max= 2025, jornada= No
         FROM tabla_matriculas_competencia_unificada
         WHERE cohorte BETWEEN :anio_min AND :anio_max
         AND periodo = cohorte
-        {filtro_jornada_cohorte}
-        {filtro_genero}
+        AND {filtro_opcional("jornada", "jornada")}
+        AND {filtro_opcional("genero", "genero")}
         {filtro_sede}
     ),
     retencion_n1 AS (
@@ -123,30 +103,21 @@ def get_permanencia_n_n1_competencia(anio_min= 2007, anio_max= 2025, jornada= No
     """
     
    
-    df = pd.read_sql(text(sql_query), db_engine, params=params)
+    df = leer_sql(sql_estable(sql_query), db_engine, params=params)
     
     df['tasa_permanencia_pct'] = (df['retenidos_n1'] * 100.0 / df['base_n'].replace(0, pd.NA)).fillna(0).round(2)
     
     return df
 
 #Cambios de jornada evaluados por cohorte
+@cachear_consulta
 def get_distribucion_cambio_jornada_ecas(anio_min, anio_max, jornada_filtro=None, genero="Todos"):
     params = {
         "anio_min": anio_min, 
         "anio_max": min(anio_max, 2024),
+        "jornada_filtro": valor_filtro(jornada_filtro),
+        "genero": valor_filtro(genero)
     }
-    
-    # Filtro dinámico de Jornada
-    filtro_jornada = ""
-    if jornada_filtro and jornada_filtro != "Todas":
-        filtro_jornada = "AND t1.jornada_origen = :jornada_filtro"
-        params["jornada_filtro"] = jornada_filtro
-
-    # Filtro dinámico de Género
-    filtro_genero = ""
-    if genero and genero != "Todos":
-        filtro_genero = "AND t1.genero = :genero"
-        params["genero"] = genero
 
     sql_query = f"""
     WITH cohorte_inicial AS (
@@ -176,9 +147,8 @@ def get_distribucion_cambio_jornada_ecas(anio_min, anio_max, jornada_filtro=None
     LEFT JOIN seguimiento_n1 t2 
         ON t1.mrun = t2.mrun 
         AND t2.periodo = t1.cohorte + 1
-    WHERE 1=1 
-    {filtro_jornada}
-    {filtro_genero}
+    WHERE {filtro_opcional("t1.jornada_origen", "jornada_filtro")}
+    AND {filtro_opcional("t1.genero", "genero")}
     GROUP BY t1.jornada_origen, t1.cohorte, t1.genero,
              CASE 
                 WHEN t2.jornada_destino IS NULL THEN 'Deserción'
@@ -187,12 +157,13 @@ def get_distribucion_cambio_jornada_ecas(anio_min, anio_max, jornada_filtro=None
              END
     """
     with db_engine.connect() as conn:
-        df = pd.read_sql(text(sql_query), conn, params=params)
+        df = leer_sql(sql_estable(sql_query), conn, params=params)
 
     return df
 
 #print(get_distribucion_cambio_jornada_ecas(anio_min=2007, anio_max=2025))
 
+@cachear_consulta
 def get_supervivencia_vs_titulacion_data(anios_rango, instituciones=None, genero="Todos", jornada="Todas", region_sede="region_sede"):
     # Configuración por defecto de la institución
     if not instituciones:
@@ -200,35 +171,18 @@ def get_supervivencia_vs_titulacion_data(anios_rango, instituciones=None, genero
     elif isinstance(instituciones, str):
         instituciones = [instituciones]
 
-    # 1. Parámetros de instituciones para la cláusula IN
-    inst_params = {f"inst_{i}": nombre for i, nombre in enumerate(instituciones)}
-    in_clause = ", ".join([f":{k}" for k in inst_params.keys()])
-
-    # 2. Diccionario base de parámetros
+    # 1. Diccionario de parámetros
     params = {
         "anio_min": anios_rango[0],
         "anio_max": anios_rango[1],
-        **inst_params
+        "genero": valor_filtro(genero),
+        "jornada": valor_filtro(jornada),
+        # Instituciones y regiones como listas JSON de un solo parámetro
+        "instituciones": valor_lista(instituciones),
+        "regiones": valor_lista(region_sede)
     }
 
-    filtro_genero = ""
-    if genero and genero != "Todos":
-        filtro_genero = "AND genero = :genero"
-        params["genero"] = genero
-
-    filtro_jornada = ""
-    if jornada and jornada != "Todas":
-        filtro_jornada = "AND jornada = :jornada"
-        params["jornada"] = jornada
-
-    if region_sede and isinstance(region_sede, list) and len(region_sede) > 0:
-        region_keys = [f"reg{i}" for i in range(len(region_sede))]
-        for i, val in enumerate(region_sede):
-            params[f"reg{i}"] = val
-        filtro_sede = f"AND (region_sede IN ({', '.join([':' + k for k in region_keys])}) OR cod_inst = 104)"
-    else:
-        filtro_sede = ""
-        
+    filtro_sede = f"AND (:regiones IS NULL OR {filtro_lista('region_sede', 'regiones')} OR cod_inst = 104)"
 
     # 5. Query SQL con soporte multi-filtro
     sql_query = f"""
@@ -236,9 +190,9 @@ def get_supervivencia_vs_titulacion_data(anios_rango, instituciones=None, genero
         SELECT nomb_inst, cohorte, COUNT(DISTINCT mrun) as total_inicial
         FROM tabla_matriculas_competencia_unificada
         WHERE cohorte BETWEEN :anio_min AND :anio_max 
-          AND nomb_inst IN ({in_clause})
-          {filtro_genero}
-          {filtro_jornada}
+          AND {filtro_lista("nomb_inst", "instituciones")}
+          AND {filtro_opcional("genero", "genero")}
+          AND {filtro_opcional("jornada", "jornada")}
           {filtro_sede}
         GROUP BY nomb_inst, cohorte
     ),
@@ -248,9 +202,9 @@ def get_supervivencia_vs_titulacion_data(anios_rango, instituciones=None, genero
             COUNT(DISTINCT mrun) AS n_matriculados
         FROM tabla_matriculas_competencia_unificada
         WHERE cohorte BETWEEN :anio_min AND :anio_max 
-          AND nomb_inst IN ({in_clause})
-          {filtro_genero}
-          {filtro_jornada}
+          AND {filtro_lista("nomb_inst", "instituciones")}
+          AND {filtro_opcional("genero", "genero")}
+          AND {filtro_opcional("jornada", "jornada")}
         GROUP BY nomb_inst, cohorte, (periodo - cohorte)
     ),
     titulados_por_anio AS (
@@ -259,8 +213,8 @@ def get_supervivencia_vs_titulacion_data(anios_rango, instituciones=None, genero
             COUNT(DISTINCT mrun) AS n_titulados
         FROM tabla_dashboard_titulados
         WHERE cohorte BETWEEN :anio_min AND :anio_max 
-          AND nomb_inst IN ({in_clause})
-          {filtro_genero}
+          AND {filtro_lista("nomb_inst", "instituciones")}
+          AND {filtro_opcional("genero", "genero")}
         GROUP BY anios_para_titularse, nomb_inst, cohorte
     ),
     calculos_por_cohorte AS (
@@ -282,22 +236,28 @@ def get_supervivencia_vs_titulacion_data(anios_rango, instituciones=None, genero
     """
 
     with db_engine.connect() as conn:
-        df = pd.read_sql(text(sql_query), conn, params=params)
+        df = leer_sql(sql_estable(sql_query), conn, params=params)
     
     return df
 
 #print(get_supervivencia_vs_titulacion_data(anios_rango=[2007,2007], region_sede="Metropolitana"))
 
+@con_prioridad("kpi")
+@cachear_consulta
 def get_metrica_titulacion_externa(rango_anios, jornada="Todas", genero="Todos"):
 
-    condiciones = [f"anio_ingreso_ecas BETWEEN {rango_anios[0]} AND {rango_anios[1]}"]
-    
-    if jornada != "Todas":
-        condiciones.append(f"jornada_ecas = '{jornada}'")
-    if genero != "Todos":
-        condiciones.append(f"genero = '{genero}'")
-        
-    where_clause = " AND ".join(condiciones)
+    params = {
+        "anio_min": rango_anios[0],
+        "anio_max": rango_anios[1],
+        "jornada": valor_filtro(jornada),
+        "genero": valor_filtro(genero)
+    }
+
+    where_clause = (
+        "anio_ingreso_ecas BETWEEN :anio_min AND :anio_max "
+        f"AND {filtro_opcional('jornada_ecas', 'jornada')} "
+        f"AND {filtro_opcional('genero', 'genero')}"
+    )
 
     query = f"""
     SELECT 
@@ -305,7 +265,7 @@ def get_metrica_titulacion_externa(rango_anios, jornada="Todas", genero="Todos")
         (SELECT COUNT(DISTINCT mrun) FROM tabla_titulados_externos_desertores WHERE {where_clause}) as total_titulados_ext
     """
     
-    df = pd.read_sql(query, db_engine)
+    df = leer_sql(sql_estable(query), db_engine, params=params)
     
     if not df.empty and df['total_desertores'][0] > 0:
         df['tasa_exito_externo'] = (df['total_titulados_ext'] / df['total_desertores']) * 100
@@ -316,24 +276,27 @@ def get_metrica_titulacion_externa(rango_anios, jornada="Todas", genero="Todos")
 
 #print(get_metrica_titulacion_externa(rango_anios=[2007,2025]))
 
+# Columnas de tabla_fuga_detallada_ecas que se pueden usar como destino en get_fuga_por_rango
+COLUMNAS_DESTINO_FUGA = ("inst_destino", "carrera_destino", "area_conocimiento_destino", "tipo_inst_1", "nivel_estudio_post")
+
+@cachear_consulta
 def get_fuga_por_rango(columna: str, orden: int = 1, rango_anios: list = None, jornada: str = "Todas", genero: str = "Todos", top_n: int = 10):
     """
     Obtiene el ranking de destinos (institución, carrera o área) utilizando SQL.
     """
+    # La columna es un identificador y no se puede enviar como parámetro: solo se aceptan las conocidas
+    if columna not in COLUMNAS_DESTINO_FUGA:
+        raise ValueError(f"Columna de destino no válida: {columna}")
+
     params = {
         "anio_min": rango_anios[0],
         "anio_max": rango_anios[1],
         "orden": orden,
-        "top_n": top_n
+        "top_n": top_n,
+        "jornada": valor_filtro(jornada),
+        "genero": valor_filtro(genero)
     }
 
-    # Filtros dinámicos
-    filtro_jornada = "AND jornada_ecas = :jornada" if jornada != "Todas" else ""
-    if filtro_jornada: params["jornada"] = jornada
-    
-    filtro_genero = "AND genero = :genero" if genero != "Todos" else ""
-    if filtro_genero: params["genero"] = genero
-
     sql_query = f"""
     WITH primer_reingreso AS (
     SELECT 
@@ -343,8 +306,8 @@ def get_fuga_por_rango(columna: str, orden: int = 1, rango_anios: list = None, j
         ROW_NUMBER() OVER (PARTITION BY mrun ORDER BY MIN(anio_matricula_post) ASC) as rn
     FROM tabla_fuga_detallada_ecas
     WHERE anio_ingreso_ecas BETWEEN :anio_min AND :anio_max
-    {filtro_jornada}
-    {filtro_genero}
+    AND {filtro_opcional("jornada_ecas", "jornada")}
+    AND {filtro_opcional("genero", "genero")}
     GROUP BY mrun, {columna} -- Esto colapsa los 3 años en la misma carrera a 1 sola fila
     )
     SELECT TOP (:top_n)
@@ -356,27 +319,24 @@ def get_fuga_por_rango(columna: str, orden: int = 1, rango_anios: list = None, j
     ORDER BY cant DESC
     """
 
-    df = pd.read_sql(text(sql_query), db_engine, params=params)
+    df = leer_sql(sql_estable(sql_query), db_engine, params=params)
 
     return df
 
 #print(get_fuga_por_rango(columna="inst_destino", orden=1, rango_anios=[2007,2007]))
 
+@cachear_consulta
 def get_tiempo_de_descanso_procesado(rango_anios: list, jornada: str = "Todas", genero: str = "Todos") -> pd.DataFrame:
     """
     Calcula la distribución de tiempo de descanso mediante una query SQL directa.
     """
     params = {
         "anio_min": rango_anios[0],
-        "anio_max": rango_anios[1]
+        "anio_max": rango_anios[1],
+        "jornada": valor_filtro(jornada),
+        "genero": valor_filtro(genero)
     }
 
-    filtro_jornada = "AND jornada_ecas = :jornada" if jornada != "Todas" else ""
-    if filtro_jornada: params["jornada"] = jornada
-    
-    filtro_genero = "AND genero = :genero" if genero != "Todos" else ""
-    if filtro_genero: params["genero"] = genero
-
     sql_query = f"""
     WITH primer_contacto AS (
         -- Obtenemos el año del primer reingreso al sistema para cada desertor
@@ -386,8 +346,8 @@ def get_tiempo_de_descanso_procesado(rango_anios: list, jornada: str = "Todas",
             MIN(anio_matricula_post) as primer_ingreso_destino
         FROM tabla_fuga_detallada_ecas
         WHERE anio_ingreso_ecas BETWEEN :anio_min AND :anio_max
-        {filtro_jornada}
-        {filtro_genero}
+        AND {filtro_opcional("jornada_ecas", "jornada")}
+        AND {filtro_opcional("genero", "genero")}
         GROUP BY mrun, anio_fuga_ecas
     ),
     calculo_diferencia AS (
@@ -418,7 +378,7 @@ def get_tiempo_de_descanso_procesado(rango_anios: list, jornada: str = "Todas",
     """
 
     
-    df = pd.read_sql(text(sql_query), db_engine, params=params)
+    df = leer_sql(sql_estable(sql_query), db_engine, params=params)
         
     # Ordenar las categorías manualmente para asegurar consistencia visual en el gráfico
     orden_categorias = ['Inmediato (<=0)', '1 año', '2 años', '3 a 5 años', '6 a 10 años', '+10 años']
@@ -427,27 +387,25 @@ def get_tiempo_de_descanso_procesado(rango_anios: list, jornada: str = "Todas",
 
 #print(get_tiempo_de_descanso_procesado(rango_anios=[2007,2007]))
 
+@con_prioridad("kpi")
+@cachear_consulta
 def get_metrica_exito_captacion(rango_anios, jornada="Todas", genero="Todos"):
     
     params = {
         "anio_min": int(rango_anios[0]),
-        "anio_max": int(rango_anios[1])
+        "anio_max": int(rango_anios[1]),
+        "jornada": valor_filtro(jornada),
+        "genero": valor_filtro(genero)
     }
 
-    filtro_jornada = "AND p.jornada = :jornada" if jornada != "Todas" else ""
-    if filtro_jornada: params["jornada"] = jornada
-    
-    filtro_genero = "AND p.genero = :genero" if genero != "Todos" else ""
-    if filtro_genero: params["genero"] = genero
-
     sql_query = f"""
     WITH estudiantes_captados AS (
         SELECT DISTINCT p.mrun, p.genero, p.jornada, p.cohorte
         FROM tabla_matriculas_competencia_unificada p
         WHERE p.cod_inst = 104
           AND p.cohorte BETWEEN :anio_min AND :anio_max
-          {filtro_jornada}
-          {filtro_genero}
+          AND {filtro_opcional("p.jornada", "jornada")}
+          AND {filtro_opcional("p.genero", "genero")}
           AND EXISTS (
               SELECT 1 FROM matriculas_mrun v
               WHERE v.mrun = p.mrun 
@@ -467,7 +425,7 @@ def get_metrica_exito_captacion(rango_anios, jornada="Todas", genero="Todos"):
     LEFT JOIN tabla_dashboard_titulados t ON e.mrun = t.mrun AND t.cod_inst = 104
     """
 
-    df = pd.read_sql(text(sql_query), db_engine, params=params)
+    df = leer_sql(sql_estable(sql_query), db_engine, params=params)
 
     return df
 
@@ -3,6 +3,8 @@ import dash_bootstrap_components as dbc
 from dash import dcc, html, callback, Output, Input, State
 from dashboard_desertores.metrics.queries_desertores import *
 from dashboard_desertores.graphics.graphics import *
+from ejecucion import ejecutar_en_paralelo
+from cancelacion import cancelable
 import pandas as pd
 import numpy as np
 
@@ -382,6 +384,8 @@ def actualizar_opciones_selector(jornada, top_n, regiones_sel, valor_seleccionad
      Input('selector-instituciones-competencia', 'value'),
      Input('selector-regiones-universo', 'value')]
 )
+# Al arrastrar el slider, cada valor nuevo cancela las consultas del anterior
+@cancelable
 def update_charts_permanencia_e_ingreso(rango, top_n, jornada, genero, inst_manuales, regiones_seleccionadas):
     
     df_ingresos_raw = get_ingresos_competencia_parametrizado(
@@ -420,6 +424,7 @@ def update_charts_permanencia_e_ingreso(rango, top_n, jornada, genero, inst_manu
      Input('radio-jornada-desertores', 'value'),
      Input('radio-genero-desertores', 'value')]
 )
+@cancelable
 def update_jornada_ecas(rango, jornada, genero):
     df_cambio = get_distribucion_cambio_jornada_ecas(rango[0], rango[1], jornada, genero)
     return create_cambio_jornada_charts(df_cambio)
@@ -432,15 +437,19 @@ def update_jornada_ecas(rango, jornada, genero):
      Input('radio-jornada-desertores', 'value'),
      Input('radio-genero-desertores', 'value')]
 )
+@cancelable
 def update_survival_and_rest(rango, inst_surv, jornada, genero):
     target_inst = inst_surv if inst_surv else "IP ESCUELA DE CONTADORES AUDITORES DE SANTIAGO"
     
+    df_survival, df_descanso = ejecutar_en_paralelo([
+        lambda: get_supervivencia_vs_titulacion_data(rango, [target_inst], genero, jornada),
+        lambda: get_tiempo_de_descanso_procesado(rango, jornada, genero),
+    ])
+
     # Supervivencia
-    df_survival = get_supervivencia_vs_titulacion_data(rango, [target_inst], genero, jornada)
     fig_surv = create_survival_graduation_chart(df_survival, target_inst)
     
     # Tiempo de descanso
-    df_descanso = get_tiempo_de_descanso_procesado(rango, jornada, genero)
     fig_descanso = create_tiempo_descanso_horiz_chart(df_descanso)
     
     return fig_surv, fig_descanso
@@ -454,6 +463,7 @@ def update_survival_and_rest(rango, inst_surv, jornada, genero):
      Input('radio-jornada-desertores', 'value'),
      Input('radio-genero-desertores', 'value')]
 )
+@cancelable
 def update_fuga_analysis(rango, dim_fuga, jornada, genero):
     figs_fuga = []
     titulos = ["1er Destino", "2do Destino", "3er Destino"]
@@ -476,12 +486,15 @@ def update_fuga_analysis(rango, dim_fuga, jornada, genero):
      Input('radio-jornada-desertores', 'value'),
      Input('radio-genero-desertores', 'value')]
 )
+@cancelable
 def update_success_gauges(rango, jornada, genero):
    
-    df_metrica_ext = get_metrica_titulacion_externa(rango, jornada, genero)
-    fig_gauge = create_gauge_titulacion_externa(df_metrica_ext)
+    df_metrica_ext, df_captacion = ejecutar_en_paralelo([
+        lambda: get_metrica_titulacion_externa(rango, jornada, genero),
+        lambda: get_metrica_exito_captacion(rango, jornada, genero),
+    ])
 
-    df_captacion = get_metrica_exito_captacion(rango, jornada, genero)
+    fig_gauge = create_gauge_titulacion_externa(df_metrica_ext)
     fig_gauge_int = create_gauge_exito_captacion(df_captacion)
     
     return fig_gauge, fig_gauge_int
\ No newline at end of file
@@ -1,64 +1,63 @@
-from conn_db import get_db_engine
-from sqlalchemy import text
+from conn_db import get_db_engine_lectura
+from lectura import leer_sql, leer_escalar, sql_estable, filtro_opcional, valor_filtro
+from cache_consultas import cachear_consulta
+from admision import con_prioridad
 import pandas as pd
 from typing import Optional, List
 
-db_engine = get_db_engine()
+db_engine = get_db_engine_lectura()
 
-def get_kpis_cabecera(rango_anios, jornada="Todas", genero="Todos", rango_edad="Todos"):
-    params = {
+# Columnas de destino permitidas en get_top_destinos_filtrado (son identificadores, no parámetros)
+DIMENSIONES_DESTINO = ("inst_destino", "carrera_destino", "tipo_inst_1", "area_conocimiento_destino")
+
+def _params_filtros(rango_anios, jornada, genero, rango_edad, **extra):
+    # Los filtros opcionales viajan siempre como parámetros (NULL = sin filtro) para mantener un solo texto SQL
+    return {
         "anio_min": rango_anios[0],
-        "anio_max": rango_anios[1]
+        "anio_max": rango_anios[1],
+        "jornada": valor_filtro(jornada),
+        "genero": valor_filtro(genero),
+        "rango_edad": valor_filtro(rango_edad),
+        **extra
     }
-    
-    # Filtros comunes
-    filtro_j = "AND jornada = :jornada" if jornada != "Todas" else ""
-    if jornada != "Todas": params["jornada"] = jornada
-    
-    filtro_g = "AND genero = :genero" if genero != "Todos" else ""
-    if genero != "Todos": params["genero"] = genero
 
-    filtro_e = "AND rango_edad = :rango_edad" if rango_edad != "Todos" else ""
-    if rango_edad != "Todos": params["rango_edad"] = rango_edad
+def _filtros_sql(col_jornada="jornada_ecas", prefijo=""):
+    return (
+        f"AND {filtro_opcional(prefijo + col_jornada, 'jornada')} "
+        f"AND {filtro_opcional(prefijo + 'genero', 'genero')} "
+        f"AND {filtro_opcional(prefijo + 'rango_edad', 'rango_edad')}"
+    )
+
+@con_prioridad("kpi")
+@cachear_consulta
+def get_kpis_cabecera(rango_anios, jornada="Todas", genero="Todos", rango_edad="Todos"):
+    params = _params_filtros(rango_anios, jornada, genero, rango_edad)
     
     # 1. Total Titulados
-    sql_titulados = f"SELECT COUNT(DISTINCT mrun) FROM tabla_dashboard_titulados WHERE cohorte BETWEEN :anio_min AND :anio_max {filtro_j} {filtro_g} {filtro_e} AND cod_inst=104"
+    sql_titulados = f"SELECT COUNT(DISTINCT mrun) FROM tabla_dashboard_titulados WHERE cohorte BETWEEN :anio_min AND :anio_max {_filtros_sql('jornada')} AND cod_inst=104"
     
     # 2. Total Desertores
-    filtro_j_des = "AND jornada_ecas = :jornada" if jornada != "Todas" else ""
-    sql_desertores = f"SELECT COUNT(DISTINCT mrun) FROM tabla_fuga_detallada_ecas WHERE anio_ingreso_ecas BETWEEN :anio_min AND :anio_max {filtro_j_des} {filtro_g} {filtro_e}"
+    sql_desertores = f"SELECT COUNT(DISTINCT mrun) FROM tabla_fuga_detallada_ecas WHERE anio_ingreso_ecas BETWEEN :anio_min AND :anio_max {_filtros_sql()}"
 
     # 3. Universo Total de Cohorte
-    sql_cohorte = f"SELECT COUNT(DISTINCT mrun) FROM tabla_matriculas_competencia_unificada WHERE cohorte BETWEEN :anio_min AND :anio_max {filtro_j} {filtro_g} {filtro_e} AND cod_inst=104"
+    sql_cohorte = f"SELECT COUNT(DISTINCT mrun) FROM tabla_matriculas_competencia_unificada WHERE cohorte BETWEEN :anio_min AND :anio_max {_filtros_sql('jornada')} AND cod_inst=104"
 
     #4. Universo Total de abandono
-    filtro_j_abandono = "AND jornada_ecas = :jornada" if jornada != "Todas" else ""
-    sql_abandono =f"SELECT COUNT(DISTINCT mrun) FROM tabla_abandono_total_ecas WHERE anio_ingreso_ecas BETWEEN :anio_min AND :anio_max {filtro_j_abandono} {filtro_g} {filtro_e}"
+    sql_abandono =f"SELECT COUNT(DISTINCT mrun) FROM tabla_abandono_total_ecas WHERE anio_ingreso_ecas BETWEEN :anio_min AND :anio_max {_filtros_sql()}"
     
     with db_engine.connect() as conn:
-        total_tit = conn.execute(text(sql_titulados), params).scalar() or 0
-        total_des = conn.execute(text(sql_desertores), params).scalar() or 0
-        total_cohorte = conn.execute(text(sql_cohorte), params).scalar() or 0
-        total_abandono = conn.execute(text(sql_abandono), params).scalar() or 0
+        total_tit = leer_escalar(sql_estable(sql_titulados), conn, params, nombre="queries_titulados.get_kpis_cabecera:titulados") or 0
+        total_des = leer_escalar(sql_estable(sql_desertores), conn, params, nombre="queries_titulados.get_kpis_cabecera:desertores") or 0
+        total_cohorte = leer_escalar(sql_estable(sql_cohorte), conn, params, nombre="queries_titulados.get_kpis_cabecera:cohorte") or 0
+        total_abandono = leer_escalar(sql_estable(sql_abandono), conn, params, nombre="queries_titulados.get_kpis_cabecera:abandono") or 0
         
     return total_cohorte, total_tit, total_des, total_abandono
 
+@cachear_consulta
 def get_nivel_post_salida(rango_anios, tipo_poblacion="Todos", criterio="Primero", jornada="Todas", genero="Todos", rango_edad="Todos"):
-    params = {"anio_min": rango_anios[0], "anio_max": rango_anios[1]}
-    
-    # Construcción de filtros
-    filtros = []
-    if jornada != "Todas":
-        filtros.append("AND jornada_ecas = :jornada")
-        params["jornada"] = jornada
-    if genero != "Todos":
-        filtros.append("AND genero = :genero")
-        params["genero"] = genero
-    if rango_edad != "Todos":
-        filtros.append("AND rango_edad = :rango_edad")
-        params["rango_edad"] = rango_edad
-
-    filtro_sql = " ".join(filtros)
+    params = _params_filtros(rango_anios, jornada, genero, rango_edad)
+    filtro_sql = _filtros_sql()
+
     if criterio == "Primero":
         order_by = "anio_matricula_post ASC"
     else:
@@ -82,24 +81,17 @@ def get_nivel_post_salida(rango_anios, tipo_poblacion="Todos", criterio="Primero
     FROM eventos_filtrados WHERE rn = 1
     GROUP BY nivel_estudio_post ORDER BY cantidad_alumnos DESC
     """
-    return pd.read_sql(text(sql_query), db_engine, params=params)
+    return leer_sql(sql_estable(sql_query), db_engine, params=params)
 
 #print(get_nivel_post_salida(rango_anios=[2007,2007], tipo_poblacion="Titulados", criterio="Primero"))
 
+@cachear_consulta
 def get_top_destinos_filtrado(rango_anios, tipo_poblacion="Todos", dimension="inst_destino", nivel="Todos", jornada="Todas", genero="Todos", rango_edad="Todos", top_n=10):
-    params = {"anio_min": rango_anios[0], "anio_max": rango_anios[1], "top_n": top_n}
+    if dimension not in DIMENSIONES_DESTINO:
+        raise ValueError(f"Dimensión de destino no válida: {dimension}")
 
-    filtros = []
-    if jornada != "Todas":
-        filtros.append("AND jornada_ecas = :jornada"); params["jornada"] = jornada
-    if genero != "Todos":
-        filtros.append("AND genero = :genero"); params["genero"] = genero
-    if nivel != "Todos":
-        filtros.append("AND nivel_estudio_post = :nivel"); params["nivel"] = nivel
-    if rango_edad != "Todos":
-        filtros.append("AND rango_edad = :rango_edad"); params["rango_edad"] = rango_edad
-
-    filtro_sql = " ".join(filtros)
+    params = _params_filtros(rango_anios, jornada, genero, rango_edad, top_n=top_n, nivel=valor_filtro(nivel))
+    filtro_sql = f"{_filtros_sql()} AND {filtro_opcional('nivel_estudio_post', 'nivel')}"
 
     if tipo_poblacion == "Todos":
         subquery = f"""
@@ -123,33 +115,16 @@ def get_top_destinos_filtrado(rango_anios, tipo_poblacion="Todos", dimension="in
     SELECT TOP (:top_n) destino, COUNT(DISTINCT mrun) as cantidad_alumnos 
     FROM primer_reingreso WHERE rn = 1 GROUP BY destino ORDER BY cantidad_alumnos DESC"""
 
-    return pd.read_sql(text(sql_query), db_engine, params=params)
+    return leer_sql(sql_estable(sql_query), db_engine, params=params)
 
+@cachear_consulta
 def get_demora_reingreso(rango_anios, tipo_poblacion="Todos", nivel="Todos", jornada="Todas", genero="Todos", rango_edad="Todos"):
     """
     Calcula el tiempo de reingreso filtrado por cohorte, población, nivel, jornada, género y rango de edad de ingreso.
     """
-    params = {
-        "anio_min": rango_anios[0],
-        "anio_max": rango_anios[1]
-    }
-
-    # 1. Construcción de filtros dinámicos
-    filtros = []
-    if jornada != "Todas":
-        filtros.append("AND jornada_ecas = :jornada")
-        params["jornada"] = jornada
-    if genero != "Todos":
-        filtros.append("AND genero = :genero")
-        params["genero"] = genero
-    if nivel != "Todos":
-        filtros.append("AND nivel_estudio_post = :nivel")
-        params["nivel"] = nivel
-    if rango_edad != "Todos":
-        filtros.append("AND rango_edad = :rango_edad")
-        params["rango_edad"] = rango_edad
-
-    filtro_str = " ".join(filtros)
+    # 1. Filtros opcionales como parámetros (NULL = sin filtro)
+    params = _params_filtros(rango_anios, jornada, genero, rango_edad, nivel=valor_filtro(nivel))
+    filtro_str = f"{_filtros_sql()} AND {filtro_opcional('nivel_estudio_post', 'nivel')}"
 
     # 2. Definición de subquery según población
     # Es crucial incluir 'rango_edad' en el UNION ALL para que el filtro funcione en el universo 'Todos'
@@ -196,14 +171,15 @@ def get_demora_reingreso(rango_anios, tipo_poblacion="Todos", nivel="Todos", jor
     ORDER BY demora_anios ASC
     """
     
-    df = pd.read_sql(text(sql_query), db_engine, params=params)
+    df = leer_sql(sql_estable(sql_query), db_engine, params=params)
 
     return df
 
 #print(get_demora_reingreso(rango_anios=[2007,2007], tipo_poblacion="Todos"))
 
+@cachear_consulta
 def get_rutas_academicas_completas(rango_anios, tipo_poblacion="Titulados", jornada="Todas", genero="Todos", rango_edad="Todos"):
-    params = {"anio_min": rango_anios[0], "anio_max": rango_anios[1], "cod_inst": 104}
+    params = _params_filtros(rango_anios, jornada, genero, rango_edad, cod_inst=104)
     
     # Identificar la tabla maestra según la población (Igual que en continuidad)
     if tipo_poblacion == "Titulados":
@@ -217,18 +193,8 @@ def get_rutas_academicas_completas(rango_anios, tipo_poblacion="Titulados", jorn
         col_jornada = "jornada_ecas"
         col_cohorte = "anio_ingreso_ecas"
 
-    filtros = []
-    if jornada != "Todas":
-        filtros.append(f"AND u.{col_jornada} = :jornada")
-        params["jornada"] = jornada
-    if genero != "Todos":
-        filtros.append("AND u.genero = :genero")
-        params["genero"] = genero
-    if rango_edad != "Todos":
-        filtros.append("AND u.rango_edad = :rango_edad")
-        params["rango_edad"] = rango_edad
-    
-    filtro_sql = " ".join(filtros)
+    # UniversoMaestro ya renombra la columna de jornada como "jornada"
+    filtro_sql = _filtros_sql("jornada", prefijo="u.")
 
     sql_query = f"""
     WITH UniversoMaestro AS (
@@ -262,26 +228,17 @@ def get_rutas_academicas_completas(rango_anios, tipo_poblacion="Titulados", jorn
     GROUP BY ISNULL(c.ruta, 'Solo Pregrado (No Continuó)')
     ORDER BY cantidad DESC
     """
-    df = pd.read_sql(text(sql_query), db_engine, params=params)
+    df = leer_sql(sql_estable(sql_query), db_engine, params=params)
     if not df.empty:
         df['porcentaje'] = (df['cantidad'] / df['cantidad'].sum()) * 100
     return df
 
 # print(get_rutas_academicas(rango_anios=[2007,2007], tipo_poblacion="Titulados"))
 
+@cachear_consulta
 def get_continuidad_estudios(rango_anios, jornada="Todas", genero="Todos", rango_edad="Todos"):
-    params = {"anio_min": rango_anios[0], "anio_max": rango_anios[1]}
-    
-    # Filtros dinámicos
-    filtros = []
-    if jornada != "Todas":
-        filtros.append("AND t.jornada = :jornada"); params["jornada"] = jornada
-    if genero != "Todos":
-        filtros.append("AND t.genero = :genero"); params["genero"] = genero
-    if rango_edad != "Todos":
-        filtros.append("AND t.rango_edad = :rango_edad"); params["rango_edad"] = rango_edad
-    
-    filtro_sql = " ".join(filtros)
+    params = _params_filtros(rango_anios, jornada, genero, rango_edad)
+    filtro_sql = _filtros_sql("jornada", prefijo="t.")
 
     sql_query = f"""
     SELECT 
@@ -299,7 +256,7 @@ def get_continuidad_estudios(rango_anios, jornada="Todas", genero="Todos", rango
       {filtro_sql}
     GROUP BY CASE WHEN post.mrun IS NOT NULL THEN 'Continuó Estudios' ELSE 'No Continuó' END
     """
-    df = pd.read_sql(text(sql_query), db_engine, params=params)
+    df = leer_sql(sql_estable(sql_query), db_engine, params=params)
     
     # Calcular porcentajes para el pictograma
     total = df['cantidad'].sum()
@@ -310,22 +267,10 @@ def get_continuidad_estudios(rango_anios, jornada="Todas", genero="Todos", rango
         
     return df
 
+@cachear_consulta
 def get_trayectorias_titulados_completa(rango_anios, jornada="Todas", genero="Todos", rango_edad="Todos"):
-    params = {
-        "anio_min": rango_anios[0],
-        "anio_max": rango_anios[1],
-        "cod_inst_ecas": 104
-    }
-    
-    filtros = []
-    if jornada != "Todas":
-        filtros.append("AND t.jornada = :jornada"); params["jornada"] = jornada
-    if genero != "Todos":
-        filtros.append("AND t.genero = :genero"); params["genero"] = genero
-    if rango_edad != "Todos":
-        filtros.append("AND t.rango_edad = :rango_edad"); params["rango_edad"] = rango_edad
-    
-    filtro_sql = " ".join(filtros)
+    params = _params_filtros(rango_anios, jornada, genero, rango_edad, cod_inst_ecas=104)
+    filtro_sql = _filtros_sql("jornada", prefijo="t.")
 
     sql_query = f"""
     WITH UniversoTitulados AS (
@@ -386,7 +331,7 @@ def get_trayectorias_titulados_completa(rango_anios, jornada="Todas", genero="To
     """
     
     try:
-        df = pd.read_sql(text(sql_query), db_engine, params=params)
+        df = leer_sql(sql_estable(sql_query), db_engine, params=params)
         return df
     except Exception as e:
         print(f"Error en trayectorias titulados: {e}")
@@ -394,28 +339,11 @@ def get_trayectorias_titulados_completa(rango_anios, jornada="Todas", genero="To
 
 #print(get_trayectorias_titulados_completa(rango_anios=[2007,2025]))
 
+@cachear_consulta
 def get_trayectorias_desertores_completa(rango_anios, jornada="Todas", genero="Todos", rango_edad="Todos"):
-    params = {
-        "anio_min": rango_anios[0],
-        "anio_max": rango_anios[1]
-    }
-    
-    # Filtros dinámicos (se aplican a ambas tablas para que el total sea coherente)
-    filtros_fuga = []
-    filtros_abandono = []
-    
-    if jornada != "Todas":
-        filtros_fuga.append("AND jornada_ecas = :jornada")
-        filtros_abandono.append("AND jornada_ecas = :jornada")
-        params["jornada"] = jornada
-    if genero != "Todos":
-        filtros_fuga.append("AND genero = :genero")
-        filtros_abandono.append("AND genero = :genero")
-        params["genero"] = genero
-    if rango_edad != "Todos":
-        filtros_fuga.append("AND rango_edad = :rango_edad")
-        filtros_abandono.append("AND rango_edad = :rango_edad")
-        params["rango_edad"] = rango_edad
+    # Filtros opcionales (se aplican a ambas tablas para que el total sea coherente)
+    params = _params_filtros(rango_anios, jornada, genero, rango_edad)
+    filtro_sql = _filtros_sql()
     
     sql_query = f"""
     WITH DatosCombinados AS (
@@ -429,7 +357,7 @@ def get_trayectorias_desertores_completa(rango_anios, jornada="Todas", genero="T
                    LAG(nivel_estudio_post) OVER (PARTITION BY mrun ORDER BY anio_matricula_post ASC) as nivel_ant
             FROM tabla_fuga_detallada_ecas
             WHERE anio_ingreso_ecas BETWEEN :anio_min AND :anio_max
-            {" ".join(filtros_fuga)}
+            {filtro_sql}
         ) s 
         WHERE nivel_ant IS NULL OR nivel_ant <> nivel_estudio_post
         GROUP BY mrun
@@ -441,7 +369,7 @@ def get_trayectorias_desertores_completa(rango_anios, jornada="Todas", genero="T
             'Abandono Total del Sistema' as trayectoria
         FROM tabla_abandono_total_ecas
         WHERE anio_ingreso_ecas BETWEEN :anio_min AND :anio_max
-        {" ".join(filtros_abandono)}
+        {filtro_sql}
     )
     SELECT 
         trayectoria,
@@ -452,6 +380,6 @@ def get_trayectorias_desertores_completa(rango_anios, jornada="Todas", genero="T
     ORDER BY cantidad DESC
     """
     
-    return pd.read_sql(text(sql_query), db_engine, params=params)
+    return leer_sql(sql_estable(sql_query), db_engine, params=params)
 
 #print(get_trayectorias_desertores_completa(rango_anios=[2007,2025]))
\ No newline at end of file
@@ -1,9 +1,11 @@
-from conn_db import get_db_engine
-from sqlalchemy import text
+from conn_db import get_db_engine_lectura
+from lectura import leer_sql, sql_estable, filtro_opcional, valor_filtro
+from cache_consultas import cachear_consulta
+from admision import con_prioridad
 import pandas as pd
 from typing import Optional, List
 
-db_engine = get_db_engine()
+db_engine = get_db_engine_lectura()
 
 map_ensenianza = {
     310: "Cientifico Humanista",
@@ -43,22 +45,24 @@ map_provincias_rm = {
     136: "Provincia de Talagante"
 }
 
+@con_prioridad("kpi")
+@cachear_consulta
 def get_total_titulados_y_matriculados(cohorte_range, cod_inst, jornada="Todas", genero="Todos", region_id=None):
     params = {
         "cod_inst": cod_inst,
         "c_inicio": cohorte_range[0] if isinstance(cohorte_range, list) else cohorte_range,
         "c_fin": cohorte_range[1] if isinstance(cohorte_range, list) else cohorte_range,
-        "jornada": jornada,
-        "genero": genero,
-        "region": region_id
+        "jornada": valor_filtro(jornada),
+        "genero": valor_filtro(genero),
+        "region": valor_filtro(region_id)
     }
 
-    # Filtros dinámicos consistentes
-    filtro_jornada = "AND u.jornada = :jornada" if jornada != "Todas" else ""
-    filtro_genero = "AND u.genero = :genero" if genero != "Todos" else ""
-    filtro_region = "AND g.cod_region = :region" if region_id is not None else ""
+    # Filtros opcionales: NULL = sin filtro, mismo texto SQL para cualquier selección
+    filtro_jornada = "AND " + filtro_opcional("u.jornada", "jornada")
+    filtro_genero = "AND " + filtro_opcional("u.genero", "genero")
+    filtro_region = "AND " + filtro_opcional("g.cod_region", "region")
 
-    sql_query = text(f"""
+    sql_query = sql_estable(f"""
     WITH UniversoMatricula AS (
         -- Identificamos el primer ingreso de cada alumno
         SELECT * FROM (
@@ -85,10 +89,11 @@ def get_total_titulados_y_matriculados(cohorte_range, cod_inst, jornada="Todas",
     WHERE 1=1 {filtro_jornada} {filtro_genero} {filtro_region}
     """)
     
-    df = pd.read_sql(sql_query, db_engine, params=params)
+    df = leer_sql(sql_query, db_engine, params=params)
     res = df.iloc[0] if not df.empty else {'total_m': 0, 'total_t': 0}
     return {"total_m": int(res['total_m']), "total_t": int(res['total_t'])}
 
+@cachear_consulta
 def get_distribucion_dependencia_rango(cohorte_range, cod_inst, genero="Todos", jornada="Todas", region_id=None):
     
     if isinstance(cohorte_range, list):
@@ -97,19 +102,20 @@ def get_distribucion_dependencia_rango(cohorte_range, cod_inst, genero="Todos",
         num_anios = (c_fin - c_inicio) + 1
     else:
         c_inicio, c_fin = cohorte_range, cohorte_range
-        condicion_cohorte = "= :c_inicio"
+        # Mismo texto que el rango: c_fin = c_inicio
+        condicion_cohorte = "BETWEEN :c_inicio AND :c_fin"
         num_anios = 1
 
     params = {"c_inicio": c_inicio, 
               "c_fin": c_fin, 
               "cod_inst": cod_inst, 
-              "genero": genero,
-              "region": region_id }
+              "genero": valor_filtro(genero),
+              "region": valor_filtro(region_id) }
 
-    filtro_genero = "AND genero = :genero" if genero != "Todos" else ""
-    filtro_region = "AND e.cod_region = :region" if region_id != None else ""
+    filtro_genero = "AND " + filtro_opcional("genero", "genero")
+    filtro_region = "AND " + filtro_opcional("e.cod_region", "region")
 
-    sql_query = text(f"""
+    sql_query = sql_estable(f"""
     WITH PrimerRegistroHistorico AS (
         -- Paso 1: Buscamos el ingreso institucional validando existencia en egresados para geolocalización
         SELECT * FROM (
@@ -156,7 +162,8 @@ def get_distribucion_dependencia_rango(cohorte_range, cod_inst, genero="Todos",
     WHERE p.anio_ingreso {condicion_cohorte}
     """)
 
-    df_raw = pd.read_sql(sql_query, db_engine, params=params)
+    # Una fila por alumno: la jornada se repite en todas, así que se lee como categoría
+    df_raw = leer_sql(sql_query, db_engine, params=params, categoricas=["jornada"])
 
     if df_raw.empty: return pd.DataFrame()
 
@@ -184,6 +191,7 @@ def get_distribucion_dependencia_rango(cohorte_range, cod_inst, genero="Todos",
 # print(get_distribucion_dependencia_rango(cohorte_range=[2007,2007], cod_inst=104, jornada='Vespertina'))
 # print(get_distribucion_dependencia_rango(cohorte_range=[2007,2007], cod_inst=104))
 
+@cachear_consulta
 def get_titulados_por_dependencia_rango(cohorte_range, cod_inst, genero="Todos", jornada="Todas", region_id=None, anio_titulacion_sel=None):
     # 1. Configuración de Rango (Cohorte)
     if isinstance(cohorte_range, list):
@@ -192,25 +200,26 @@ def get_titulados_por_dependencia_rango(cohorte_range, cod_inst, genero="Todos",
         num_anios = (c_fin - c_inicio) + 1
     else:
         c_inicio, c_fin = cohorte_range, cohorte_range
-        condicion_cohorte = "= :c_inicio"
+        # Mismo texto que el rango: c_fin = c_inicio
+        condicion_cohorte = "BETWEEN :c_inicio AND :c_fin"
         num_anios = 1
 
     params = {
         "c_inicio": c_inicio, 
         "c_fin": c_fin, 
         "cod_inst": cod_inst, 
-        "genero": genero,
-        "region": region_id
+        "genero": valor_filtro(genero),
+        "region": valor_filtro(region_id)
     }
     
-    # Filtros dinámicos
-    filtro_anio_tit = "AND t.anio_titulacion = :anio_tit" if anio_titulacion_sel else ""
-    if anio_titulacion_sel: params["anio_tit"] = anio_titulacion_sel
+    # Filtros opcionales (NULL = sin filtro)
+    filtro_anio_tit = "AND " + filtro_opcional("t.anio_titulacion", "anio_tit")
+    params["anio_tit"] = anio_titulacion_sel or None
     
-    filtro_genero = "AND m.genero = :genero" if genero != "Todos" else ""
-    filtro_region = "AND geo.cod_region = :region" if region_id is not None else ""
+    filtro_genero = "AND " + filtro_opcional("m.genero", "genero")
+    filtro_region = "AND " + filtro_opcional("geo.cod_region", "region")
 
-    sql_query = text(f"""
+    sql_query = sql_estable(f"""
     WITH GeolocalizacionEstable AS (
         -- Obtenemos la última región conocida de egreso para el filtrado geográfico
         SELECT * FROM (
@@ -259,7 +268,7 @@ def get_titulados_por_dependencia_rango(cohorte_range, cod_inst, genero="Todos",
     WHERE uni.anio_ingreso {condicion_cohorte}
     """)
     
-    df_raw = pd.read_sql(sql_query, db_engine, params=params)
+    df_raw = leer_sql(sql_query, db_engine, params=params)
 
     if df_raw.empty:
         return pd.DataFrame()
@@ -290,6 +299,7 @@ def get_titulados_por_dependencia_rango(cohorte_range, cod_inst, genero="Todos",
 
 #print(get_titulados_por_dependencia_rango(cohorte_range=[2007,2025], cod_inst=104))
 
+@cachear_consulta
 def get_titulados_por_dependencia_rango_jornada_ingreso(cohorte_range, cod_inst, genero="Todos", jornada="Todas", anio_titulacion_sel=None):
     # 1. Configuración de Rango (Cohorte)
     if isinstance(cohorte_range, list):
@@ -298,17 +308,18 @@ def get_titulados_por_dependencia_rango_jornada_ingreso(cohorte_range, cod_inst,
         num_anios = (c_fin - c_inicio) + 1
     else:
         c_inicio, c_fin = cohorte_range, cohorte_range
-        condicion_cohorte = "= :c_inicio"
+        # Mismo texto que el rango: c_fin = c_inicio
+        condicion_cohorte = "BETWEEN :c_inicio AND :c_fin"
         num_anios = 1
 
-    params = {"c_inicio": c_inicio, "c_fin": c_fin, "cod_inst": cod_inst, "genero": genero}
+    params = {"c_inicio": c_inicio, "c_fin": c_fin, "cod_inst": cod_inst, "genero": valor_filtro(genero)}
     
-    # Filtros dinámicos para SQL
-    filtro_anio_tit = "AND anio_titulacion = :anio_tit" if anio_titulacion_sel else ""
-    if anio_titulacion_sel: params["anio_tit"] = anio_titulacion_sel
-    filtro_genero = "AND genero = :genero" if genero != "Todos" else ""
+    # Filtros opcionales (NULL = sin filtro)
+    filtro_anio_tit = "AND " + filtro_opcional("anio_titulacion", "anio_tit")
+    params["anio_tit"] = anio_titulacion_sel or None
+    filtro_genero = "AND " + filtro_opcional("genero", "genero")
 
-    sql_query = text(f"""
+    sql_query = sql_estable(f"""
     WITH PrimerIngresoEstable AS (
         -- Identidad de cohorte y jornada de ORIGEN
         SELECT * FROM (
@@ -358,7 +369,7 @@ def get_titulados_por_dependencia_rango_jornada_ingreso(cohorte_range, cod_inst,
     WHERE c.anio_ingreso {condicion_cohorte}
     """)
     
-    df_raw = pd.read_sql(sql_query, db_engine, params=params)
+    df_raw = leer_sql(sql_query, db_engine, params=params)
 
     if df_raw.empty:
         return pd.DataFrame()
@@ -387,6 +398,7 @@ def get_titulados_por_dependencia_rango_jornada_ingreso(cohorte_range, cod_inst,
 
 #print(get_titulados_por_dependencia_rango_jornada_ingreso(cohorte_range=[2007,2007], cod_inst=104))
 
+@cachear_consulta
 def get_demora_ingreso_total(cohorte_range, cod_inst, carrera="Todas", genero="Todos", jornada="Todas", region_id=None):
     # 1. Configuración de Rango
     if isinstance(cohorte_range, list):
@@ -394,23 +406,24 @@ def get_demora_ingreso_total(cohorte_range, cod_inst, carrera="Todas", genero="T
         condicion_cohorte = "BETWEEN :c_inicio AND :c_fin"
     else:
         c_inicio, c_fin = cohorte_range, cohorte_range
-        condicion_cohorte = "= :c_inicio"
+        # Mismo texto que el rango: c_fin = c_inicio
+        condicion_cohorte = "BETWEEN :c_inicio AND :c_fin"
 
     params = {
         "c_inicio": c_inicio,
         "c_fin": c_fin,
         "cod_inst": cod_inst,
-        "carrera": carrera,
-        "genero": genero,
-        "region": region_id
+        "carrera": valor_filtro(carrera),
+        "genero": valor_filtro(genero),
+        "region": valor_filtro(region_id)
     }
 
-    # Filtros dinámicos SQL
-    filtro_carrera = "AND p.nomb_carrera = :carrera" if carrera != "Todas" else ""
-    filtro_genero = "AND p.genero = :genero" if genero != "Todos" else ""
-    filtro_region = "AND e_geo.cod_region = :region" if region_id != None else ""
+    # Filtros opcionales (NULL = sin filtro)
+    filtro_carrera = "AND " + filtro_opcional("p.nomb_carrera", "carrera")
+    filtro_genero = "AND " + filtro_opcional("p.genero", "genero")
+    filtro_region = "AND " + filtro_opcional("e_geo.cod_region", "region")
 
-    sql_query = text(f"""
+    sql_query = sql_estable(f"""
     WITH PrimerIngresoInstitucion AS (
         -- Buscamos el ingreso validando que el alumno exista en egresados para tener región
         SELECT * FROM (
@@ -459,7 +472,7 @@ def get_demora_ingreso_total(cohorte_range, cod_inst, carrera="Todas", genero="T
       {filtro_genero}
     """)
     
-    df_raw = pd.read_sql(sql_query, db_engine, params=params)
+    df_raw = leer_sql(sql_query, db_engine, params=params)
 
     if df_raw.empty:
         return pd.DataFrame(columns=['anios_demora', 'total_alumnos_periodo', 'porcentaje'])
@@ -493,6 +506,7 @@ def get_demora_ingreso_total(cohorte_range, cod_inst, carrera="Todas", genero="T
 
 #KPI para analizar si los alumnos con un buen rendimiento academico en su educación media
 #son más o menos probables de desertar al primer año.
+@cachear_consulta
 def get_correlacion_nem_persistencia_rango(cohorte_range, cod_inst, jornada="Todas", carrera="Todas", genero="Todos", region_id=None):
     
     if isinstance(cohorte_range, list):
@@ -500,19 +514,20 @@ def get_correlacion_nem_persistencia_rango(cohorte_range, cod_inst, jornada="Tod
         condicion_cohorte = "BETWEEN :c_inicio AND :c_fin"
     else:
         c_inicio, c_fin = cohorte_range, cohorte_range
-        condicion_cohorte = "= :c_inicio"
+        # Mismo texto que el rango: c_fin = c_inicio
+        condicion_cohorte = "BETWEEN :c_inicio AND :c_fin"
 
     params = {
         "c_inicio": c_inicio,
         "c_fin": c_fin,
         "cod_inst": cod_inst,
-        "region" : region_id
+        "region": valor_filtro(region_id)
     }
 
     # Filtro de región
-    filtro_region = "AND e_geo.cod_region = :region" if region_id != None else ""
+    filtro_region = "AND " + filtro_opcional("e_geo.cod_region", "region")
 
-    sql_query = text(f"""
+    sql_query = sql_estable(f"""
     WITH PrimerIngresoInstitucion AS (
         -- Identidad de ingreso: Validamos existencia en egresados para tener región
         SELECT * FROM (
@@ -562,7 +577,7 @@ def get_correlacion_nem_persistencia_rango(cohorte_range, cod_inst, jornada="Tod
     SELECT * FROM Persistencia
     """)
     
-    df_raw = pd.read_sql(sql_query, db_engine, params=params)
+    df_raw = leer_sql(sql_query, db_engine, params=params)
 
     if df_raw.empty:
         return pd.DataFrame(columns=['rango_nem', 'total_alumnos', 'cantidad_persisten', 'tasa_persistencia'])
@@ -603,6 +618,7 @@ def get_correlacion_nem_persistencia_rango(cohorte_range, cod_inst, jornada="Tod
 
 #print(get_correlacion_nem_persistencia_rango(cohorte_range=[2007,2007], cod_inst=104, jornada='Vespertina'))
 
+@cachear_consulta
 def get_correlacion_nem_titulacion_rango(cohorte_range, cod_inst, jornada="Todas", carrera="Todas", genero="Todos", region_id=None):
     
     if isinstance(cohorte_range, list):
@@ -610,19 +626,20 @@ def get_correlacion_nem_titulacion_rango(cohorte_range, cod_inst, jornada="Todas
         condicion_cohorte = "BETWEEN :c_inicio AND :c_fin"
     else:
         c_inicio, c_fin = cohorte_range, cohorte_range
-        condicion_cohorte = "= :c_inicio"
+        # Mismo texto que el rango: c_fin = c_inicio
+        condicion_cohorte = "BETWEEN :c_inicio AND :c_fin"
 
     params = {
         "c_inicio": c_inicio,
         "c_fin": c_fin,
         "cod_inst": cod_inst,
-        "region": region_id
+        "region": valor_filtro(region_id)
     }
 
-    # Filtro de región dinámico
-    filtro_region = "AND e_geo.cod_region = :region" if region_id != None else ""
+    # Filtro de región opcional
+    filtro_region = "AND " + filtro_opcional("e_geo.cod_region", "region")
 
-    sql_query = text(f"""
+    sql_query = sql_estable(f"""
     WITH PrimerIngresoInstitucion AS (
         -- Identidad de ingreso: Validamos existencia en egresados para filtro regional
         SELECT * FROM (
@@ -678,7 +695,7 @@ def get_correlacion_nem_titulacion_rango(cohorte_range, cod_inst, jornada="Todas
     SELECT * FROM DatosTitulacion
     """)
     
-    df_raw = pd.read_sql(sql_query, db_engine, params=params)
+    df_raw = leer_sql(sql_query, db_engine, params=params)
 
     if df_raw.empty:
         return pd.DataFrame(columns=['rango_nem', 'total_titulados', 'titulados_a_tiempo', 'tasa_titulacion_oportuna'])
@@ -719,6 +736,7 @@ def get_correlacion_nem_titulacion_rango(cohorte_range, cod_inst, jornada="Todas
 
 #print(get_correlacion_nem_titulacion_rango(cohorte_range=[2007,2025], cod_inst=104))
 
+@cachear_consulta
 def get_tasas_articulacion_tipo_establecimiento_rango(cohorte_range, cod_inst, jornada="Todas", carrera="Todas", genero="Todos", region_id=None):
     
     if isinstance(cohorte_range, list):
@@ -726,23 +744,24 @@ def get_tasas_articulacion_tipo_establecimiento_rango(cohorte_range, cod_inst, j
         condicion_cohorte = "BETWEEN :c_inicio AND :c_fin"
     else:
         c_inicio, c_fin = cohorte_range, cohorte_range
-        condicion_cohorte = "= :c_inicio"
+        # Mismo texto que el rango: c_fin = c_inicio
+        condicion_cohorte = "BETWEEN :c_inicio AND :c_fin"
 
     params = {
         "cod_inst": cod_inst,
         "c_inicio": c_inicio,
         "c_fin": c_fin,
-        "region": region_id
+        "region": valor_filtro(region_id)
     }
 
-    # Filtro de región dinámico
-    filtro_region = "AND e_geo.cod_region = :region" if region_id != None else ""
+    # Filtro de región opcional
+    filtro_region = "AND " + filtro_opcional("e_geo.cod_region", "region")
 
     # Mapeo local (aseguramos el código 0)
     map_ensenianza_full = map_ensenianza.copy()
     map_ensenianza_full[0] = "Media - Modalidad no registrada"
 
-    sql_query = text(f"""
+    sql_query = sql_estable(f"""
     WITH PrimerIngresoInstitucion AS (
         -- Identidad de ingreso: Validamos existencia en egresados para filtro regional
         SELECT * FROM (
@@ -794,7 +813,7 @@ def get_tasas_articulacion_tipo_establecimiento_rango(cohorte_range, cod_inst, j
     INNER JOIN EgresoOrdenado e ON u.mrun = e.mrun
     """)
 
-    df_raw = pd.read_sql(sql_query, db_engine, params=params)
+    df_raw = leer_sql(sql_query, db_engine, params=params)
 
     if df_raw.empty:
         return pd.DataFrame(columns=['Tipo Enseñanza', 'Cant. Estudiantes', 'Promedio Notas'])
@@ -829,6 +848,7 @@ def get_tasas_articulacion_tipo_establecimiento_rango(cohorte_range, cod_inst, j
 
 #print(get_tasas_articulacion_tipo_establecimiento_rango(cohorte_range=[2007,2007], cod_inst=104))
 
+@cachear_consulta
 def get_data_geografica_unificada_rango(cohorte_range, cod_inst, jornada="Todas", genero="Todos"):
     # 1. Manejo de Rango de Cohorte
     if isinstance(cohorte_range, list):
@@ -836,7 +856,8 @@ def get_data_geografica_unificada_rango(cohorte_range, cod_inst, jornada="Todas"
         condicion_cohorte = "BETWEEN :c_inicio AND :c_fin"
     else:
         c_inicio, c_fin = cohorte_range, cohorte_range
-        condicion_cohorte = "= :c_inicio"
+        # Mismo texto que el rango: c_fin = c_inicio
+        condicion_cohorte = "BETWEEN :c_inicio AND :c_fin"
 
     params = {
         "cod_inst": cod_inst,
@@ -844,7 +865,7 @@ def get_data_geografica_unificada_rango(cohorte_range, cod_inst, jornada="Todas"
         "c_fin": c_fin
     }
 
-    sql_query = text(f"""
+    sql_query = sql_estable(f"""
     WITH PrimerIngresoInstitucion AS (
         -- Identidad de ingreso: Capturamos jornada y género de la primera matrícula
         SELECT * FROM (
@@ -887,7 +908,7 @@ def get_data_geografica_unificada_rango(cohorte_range, cod_inst, jornada="Todas"
     GROUP BY e.cod_region, e.nomb_region, e.cod_provincia, e.cod_comuna, e.nomb_comuna, u.jornada, u.genero
     """)
 
-    df_raw = pd.read_sql(sql_query, db_engine, params=params)
+    df_raw = leer_sql(sql_query, db_engine, params=params)
 
     if df_raw.empty:
         return pd.DataFrame()
@@ -907,21 +928,22 @@ def get_data_geografica_unificada_rango(cohorte_range, cod_inst, jornada="Todas"
 
 #print(get_data_geografica_unificada_rango(cohorte_range=[2007,2025], cod_inst=104))
 
+@cachear_consulta
 def get_kpi_ruralidad_seguimiento_rango(cohorte_range, cod_inst, jornada="Todas", genero="Todos", region_id=None):
     params = {
         "cod_inst": cod_inst,
         "c_inicio": cohorte_range[0] if isinstance(cohorte_range, list) else cohorte_range,
         "c_fin": cohorte_range[1] if isinstance(cohorte_range, list) else cohorte_range,
-        "jornada": jornada,
-        "genero": genero,
-        "region": region_id
+        "jornada": valor_filtro(jornada),
+        "genero": valor_filtro(genero),
+        "region": valor_filtro(region_id)
     }
 
-    filtro_jornada = "AND u.jornada = :jornada" if jornada != "Todas" else ""
-    filtro_genero = "AND u.genero = :genero" if genero != "Todos" else ""
-    filtro_region = "AND g.cod_region = :region" if region_id is not None else ""
+    filtro_jornada = "AND " + filtro_opcional("u.jornada", "jornada")
+    filtro_genero = "AND " + filtro_opcional("u.genero", "genero")
+    filtro_region = "AND " + filtro_opcional("g.cod_region", "region")
 
-    sql_query = text(f"""
+    sql_query = sql_estable(f"""
     WITH UniversoMatricula AS (
         SELECT * FROM (
             SELECT mrun, cohorte as anio_ingreso, jornada, genero,
@@ -949,7 +971,7 @@ def get_kpi_ruralidad_seguimiento_rango(cohorte_range, cod_inst, jornada="Todas"
     GROUP BY g.cod_rural
     """)
 
-    df = pd.read_sql(sql_query, db_engine, params=params)
+    df = leer_sql(sql_query, db_engine, params=params)
     
     if df.empty:
         return pd.DataFrame(columns=['Zona', 'total_ingreso', 'total_titulados'])
@@ -961,8 +983,10 @@ def get_kpi_ruralidad_seguimiento_rango(cohorte_range, cod_inst, jornada="Todas"
 
 #print(get_kpi_ruralidad_seguimiento_rango(cohorte_range=[2007,2025], cod_inst=104))
 
+@con_prioridad("kpi")
+@cachear_consulta
 def get_info_competencia():
-    sql = text("""
+    sql = sql_estable("""
         WITH CarrerasUnicas AS (
             SELECT DISTINCT cod_inst, nomb_inst, nomb_carrera
             FROM tabla_matriculas_competencia_unificada
@@ -976,24 +1000,26 @@ def get_info_competencia():
         ORDER BY nomb_inst ASC
     """)
     
-    df = pd.read_sql(sql, db_engine)
+    df = leer_sql(sql, db_engine)
     return df
 
+@con_prioridad("kpi")
+@cachear_consulta
 def get_jornadas_por_institucion(cod_inst):
     """
     Obtiene las jornadas únicas para una institución específica.
     """
     # Si se selecciona "Todas", traemos todas las jornadas de la tabla
     if cod_inst == "all" or not cod_inst:
-        sql = text("SELECT DISTINCT jornada FROM tabla_matriculas_competencia_unificada WHERE jornada IS NOT NULL")
+        sql = sql_estable("SELECT DISTINCT jornada FROM tabla_matriculas_competencia_unificada WHERE jornada IS NOT NULL")
         params = {}
     else:
-        sql = text("""
+        sql = sql_estable("""
             SELECT DISTINCT jornada 
             FROM tabla_matriculas_competencia_unificada 
             WHERE cod_inst = :cod_inst AND jornada IS NOT NULL
         """)
         params = {"cod_inst": cod_inst}
     
-    df = pd.read_sql(sql, db_engine, params=params)
+    df = leer_sql(sql, db_engine, params=params)
     return df['jornada'].tolist()
\ No newline at end of file
@@ -3,6 +3,7 @@ import dash_bootstrap_components as dbc
 from dash import dcc, html, callback, Input, Output, State
 from dashboard_transicion.metrics.queries_transicion import *
 from dashboard_transicion.graphics.graphics import *
+from ejecucion import ejecutar_en_paralelo
 import plotly.express as px
 import plotly.graph_objects as go
 import json
@@ -468,13 +469,16 @@ def update_dashboard_map(n_upd, clickData, n_reset, cohorte, inst, jornada, gene
 )
 def update_statistical_graphs(region_id, n_clicks, cohorte, inst, jornada, genero):
     # 1. Obtención de datos (incluyendo el nuevo de titulados)
-    df_dep = get_distribucion_dependencia_rango(cohorte, inst, genero, jornada, region_id=region_id)
-    df_ens = get_tasas_articulacion_tipo_establecimiento_rango(cohorte, inst, jornada, "Todas", genero, region_id=region_id)
-    df_dem = get_demora_ingreso_total(cohorte, inst, "Todas", genero, jornada, region_id=region_id)
-    df_nem_per = get_correlacion_nem_persistencia_rango(cohorte, inst, jornada, "Todas", genero, region_id=region_id)
-    df_nem_tit = get_correlacion_nem_titulacion_rango(cohorte, inst, jornada, "Todas", genero, region_id=region_id)
-    df_rural = get_kpi_ruralidad_seguimiento_rango(cohorte, inst, jornada, genero, region_id=region_id)
-    df_tit_dep = get_titulados_por_dependencia_rango(cohorte, inst, genero, jornada, region_id)
+    # Las consultas son independientes: se lanzan en paralelo y se espera a la más lenta
+    df_dep, df_ens, df_dem, df_nem_per, df_nem_tit, df_rural, df_tit_dep = ejecutar_en_paralelo([
+        lambda: get_distribucion_dependencia_rango(cohorte, inst, genero, jornada, region_id=region_id),
+        lambda: get_tasas_articulacion_tipo_establecimiento_rango(cohorte, inst, jornada, "Todas", genero, region_id=region_id),
+        lambda: get_demora_ingreso_total(cohorte, inst, "Todas", genero, jornada, region_id=region_id),
+        lambda: get_correlacion_nem_persistencia_rango(cohorte, inst, jornada, "Todas", genero, region_id=region_id),
+        lambda: get_correlacion_nem_titulacion_rango(cohorte, inst, jornada, "Todas", genero, region_id=region_id),
+        lambda: get_kpi_ruralidad_seguimiento_rango(cohorte, inst, jornada, genero, region_id=region_id),
+        lambda: get_titulados_por_dependencia_rango(cohorte, inst, genero, jornada, region_id),
+    ])
 
     # 2. Creación de figuras
     fig_dep = create_donut_chart(df_dep)
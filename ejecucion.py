@@ -0,0 +1,72 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from contextvars import copy_context
+from conn_db import POOL_SIZE, POOL_MAX_OVERFLOW
+from trazas import medir
+import os
+import threading
+
+# Hilos compartidos por todo el proceso: no tiene sentido superar las conexiones que entrega el pool
+MAX_HILOS_CONSULTAS = int(os.getenv("ECAS_MAX_HILOS_CONSULTAS", str(POOL_SIZE + POOL_MAX_OVERFLOW)))
+# Consultas simultáneas que puede lanzar un mismo callback
+MAX_CONCURRENCIA_CALLBACK = int(os.getenv("ECAS_MAX_CONCURRENCIA_CALLBACK", "4"))
+
+_executor = None
+_executor_lock = threading.Lock()
+_contexto = threading.local()
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=MAX_HILOS_CONSULTAS, thread_name_prefix="ecas-consulta")
+    return _executor
+
+def _ejecutar_tarea(tarea):
+    # Marca el hilo para que una tarea que vuelva a paralelizar no espere a su propio pool
+    _contexto.en_pool = True
+    try:
+        return tarea()
+    finally:
+        _contexto.en_pool = False
+
+def ejecutar_en_paralelo(tareas, max_concurrencia=None):
+    """
+    Ejecuta funciones de consulta independientes en el pool de hilos y retorna sus resultados en el mismo orden.
+    Cada tarea es una función sin argumentos (lambda o functools.partial).
+    Si alguna falla, se cancelan las pendientes y se relanza la primera excepción.
+    """
+    tareas = list(tareas)
+    limite = max(1, max_concurrencia or MAX_CONCURRENCIA_CALLBACK)
+
+    # Dentro de un hilo del pool, o con una sola tarea, se ejecuta en serie
+    if len(tareas) <= 1 or limite == 1 or getattr(_contexto, "en_pool", False):
+        return [tarea() for tarea in tareas]
+
+    executor = _get_executor()
+    resultados = [None] * len(tareas)
+
+    # El callback que espera cuenta el tiempo de pared como "consultas", no la suma de los hilos
+    with medir("consultas"):
+        _ejecutar_todas(executor, tareas, limite, resultados)
+    return resultados
+
+def _ejecutar_todas(executor, tareas, limite, resultados):
+    pendientes = {}
+    siguiente = 0
+    try:
+        while siguiente < len(tareas) or pendientes:
+            # Se mantienen como máximo `limite` consultas en vuelo para este callback
+            while siguiente < len(tareas) and len(pendientes) < limite:
+                # Cada tarea hereda el contexto del callback (solicitud a cancelar si se reemplaza)
+                futuro = executor.submit(copy_context().run, _ejecutar_tarea, tareas[siguiente])
+                pendientes[futuro] = siguiente
+                siguiente += 1
+
+            terminados, _ = wait(pendientes, return_when=FIRST_EXCEPTION)
+            for futuro in terminados:
+                indice = pendientes.pop(futuro)
+                resultados[indice] = futuro.result()
+    finally:
+        for futuro in pendientes:
+            futuro.cancel()
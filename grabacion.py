@@ -0,0 +1,72 @@
+"""
+Grabación de las solicitudes de callbacks de Dash para reproducirlas después.
+
+Con ECAS_GRABAR_CALLBACKS=<archivo.jsonl> cada POST a /_dash-update-component se agrega al archivo como una
+línea JSON:
+    t        momento de la solicitud (segundos desde epoch)
+    sesion   cookie de sesión del navegador (ecas_sesion), para separar los recorridos de cada usuario
+    pagina   ruta de la página desde la que se disparó (cabecera Referer)
+    payload  cuerpo de la solicitud tal como lo envía el navegador (output, outputs, inputs, state, changedPropIds)
+utilities.arnes_callbacks reproduce estas grabaciones para medir la latencia de cada callback.
+"""
+from urllib.parse import urlparse
+import json
+import os
+import threading
+import time
+
+ARCHIVO_GRABACION = os.getenv("ECAS_GRABAR_CALLBACKS", "")
+GRABACION_ACTIVA = bool(ARCHIVO_GRABACION)
+RUTA_CALLBACKS = "/_dash-update-component"
+
+_lock = threading.Lock()
+
+def pagina_de(referer):
+    """Ruta de la página a partir de la cabecera Referer ("/" si no viene)."""
+    return urlparse(referer or "").path or "/"
+
+def grabar(linea, archivo=None):
+    """Agrega una solicitud al archivo de grabación."""
+    archivo = archivo or ARCHIVO_GRABACION
+    texto = json.dumps(linea, ensure_ascii=False, separators=(",", ":"), default=str)
+    with _lock:
+        directorio = os.path.dirname(os.path.abspath(archivo))
+        os.makedirs(directorio, exist_ok=True)
+        with open(archivo, "a", encoding="utf-8") as salida:
+            salida.write(texto + "\n")
+
+def leer_grabacion(archivo):
+    """Líneas de una grabación, en el orden en que se grabaron."""
+    lineas = []
+    with open(archivo, encoding="utf-8") as entrada:
+        for numero, texto in enumerate(entrada, 1):
+            if not texto.strip():
+                continue
+            try:
+                lineas.append(json.loads(texto))
+            except json.JSONDecodeError as e:
+                print(f"⚠️ Línea {numero} inválida en {archivo}: {e}")
+    return lineas
+
+def registrar_grabacion(server):
+    """Graba las solicitudes de callbacks del servidor Flask en ECAS_GRABAR_CALLBACKS."""
+    from flask import request
+    from cancelacion import COOKIE_SESION
+
+    @server.before_request
+    def grabar_callback():
+        if request.method != "POST" or request.path != RUTA_CALLBACKS:
+            return None
+        payload = request.get_json(silent=True)
+        if payload is None:
+            return None
+        try:
+            grabar({
+                "t": round(time.time(), 3),
+                "sesion": request.cookies.get(COOKIE_SESION),
+                "pagina": pagina_de(request.referrer),
+                "payload": payload,
+            })
+        except OSError as e:
+            print(f"⚠️ No se pudo grabar la solicitud: {e}")
+        return None
@@ -1,12 +1,16 @@
+import os
 import dash
 import dash_bootstrap_components as dbc
-from dash import dcc, html, Input, Output
-from dashboard_desertores.pages.dashboard_desertores import layout as layout_desertores
-from dashboard_titulados.pages.dashboard_titulados import layout as layout_titulados
-from dashboard_acreditacion.pages.dashboard_acreditacion import layout as layout_acreditacion
-from dashboard_transicion.pages.dashboard_transicion import layout as layout_transicion
-from dashboard_analisis_docencia.pages.dashboard_ramos import layout as layout_rangos
-from dashboard_analisis_docencia.pages.dashboard_analisis_cohorte import layout as layout_cohortes
+from dash import dcc, html, Input, Output, State
+from flask import Response, request
+from conn_db import reporte_pools
+from cancelacion import COOKIE_SESION, RENDERER_PESTANA, nueva_sesion
+from trazas import instrumentar_callbacks, texto_metricas
+from memoria import texto_metricas_memoria
+from perfilador import texto_metricas_consultas
+from perfiles import PERFILADO_CONFIGURADO, registrar_rutas as registrar_rutas_perfiles
+from grabacion import GRABACION_ACTIVA, registrar_grabacion
+from paginas import PAGINAS, cargar_pagina, error_pagina, paginas_cargadas, registrar_paginas, texto_metricas_paginas
 
 # Inicialización de la App
 app = dash.Dash(
@@ -15,6 +19,16 @@ app = dash.Dash(
     suppress_callback_exceptions=True  # Necesario para multi-página
 )
 
+# Cada pestaña manda su identificador en las solicitudes de callbacks: @cancelable reemplaza por pestaña
+app.renderer = RENDERER_PESTANA
+
+# Identificador del navegador (respaldo si no llega el de la pestaña): permite cancelar las consultas de un callback cuando la misma sesión lo vuelve a disparar
+@app.server.after_request
+def asignar_sesion(respuesta):
+    if COOKIE_SESION not in request.cookies:
+        respuesta.set_cookie(COOKIE_SESION, nueva_sesion(), httponly=True, samesite="Lax")
+    return respuesta
+
 # --- NAVBAR GENÉRICA ---
 navbar = dbc.NavbarSimple(
     children=[
@@ -33,31 +47,52 @@ navbar = dbc.NavbarSimple(
 )
 
 # --- LAYOUT PRINCIPAL ---
-app.layout = html.Div([
-    dcc.Location(id='url', refresh=False),
-    navbar,
-    # Contenedor donde se "inyectará" el contenido de cada página
-    html.Div(id='page-content')
-])
+# Se arma en cada carga de la app para informar qué páginas (y callbacks) recibió el navegador
+def layout_principal():
+    return html.Div([
+        dcc.Location(id='url', refresh=False),
+        dcc.Store(id='paginas-navegador', data=paginas_cargadas()),
+        navbar,
+        # Contenedor donde se "inyectará" el contenido de cada página
+        html.Div(id='page-content')
+    ])
+
+app.layout = layout_principal
+
+# Las páginas se importan en su primera visita (ECAS_PAGINAS_DIFERIDAS, ver paginas.py)
+registrar_paginas(app)
+
+# Página recién cargada que el navegador no conocía: se recarga la ventana para recibir sus callbacks
+app.clientside_callback(
+    "function(ruta) { if (ruta) { window.location.reload(); } return window.dash_clientside.no_update; }",
+    Output('recarga-pagina', 'data'),
+    Input('recarga-pagina', 'data')
+)
+
+def contenido_pagina(pathname, conocidas):
+    try:
+        modulo = cargar_pagina(app, pathname)
+    except Exception:
+        return dbc.Alert(
+            f"No se pudo cargar la página: {error_pagina(pathname)}",
+            color="danger", className="m-5"
+        )
+    if pathname not in (conocidas or []):
+        return html.Div([
+            dcc.Store(id='recarga-pagina', data=pathname),
+            html.P("Cargando...", className="text-center mt-5")
+        ])
+    return modulo.layout
 
 # --- CALLBACK DE ENRUTAMIENTO ---
 @app.callback(
     Output('page-content', 'children'),
-    Input('url', 'pathname')
+    Input('url', 'pathname'),
+    State('paginas-navegador', 'data')
 )
-def display_page(pathname):
-    if pathname == '/desertores':
-        return layout_desertores
-    elif pathname == '/titulados':
-        return layout_titulados
-    elif pathname == '/acreditacion':
-        return layout_acreditacion
-    elif pathname == '/transicion':
-        return layout_transicion
-    elif pathname == '/analisis_general':
-        return layout_rangos
-    elif pathname == '/cohortes':
-        return layout_cohortes
+def display_page(pathname, paginas_navegador):
+    if pathname in PAGINAS:
+        return contenido_pagina(pathname, paginas_navegador)
     elif pathname == '/' or pathname == '':
         return html.Div([
             dbc.Container([
@@ -76,5 +111,26 @@ def display_page(pathname):
     else:
         return html.H1("404 - Página no encontrada", className="text-danger text-center mt-5")
 
+# Trazas de latencia de todos los callbacks registrados (páginas y enrutamiento), expuestas en /metrics
+instrumentar_callbacks(app)
+
+@app.server.route("/metrics")
+def metricas():
+    return Response(texto_metricas() + texto_metricas_memoria() + texto_metricas_consultas() + texto_metricas_paginas(), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+# Perfiles cProfile de callbacks a pedido (ECAS_PERFILAR_CALLBACKS / _SESIONES / _TOKEN), descargables en /perfiles
+if PERFILADO_CONFIGURADO:
+    registrar_rutas_perfiles(app.server)
+
+# Con ECAS_GRABAR_CALLBACKS=<archivo.jsonl> las solicitudes de callbacks se graban para reproducirlas (utilities.arnes_callbacks)
+if GRABACION_ACTIVA:
+    registrar_grabacion(app.server)
+
 if __name__ == '__main__':
+    # Reporte de tiempos de conexión de cada pool antes de servir
+    reporte_pools()
+    # Con ECAS_PRECALENTAR=1 las consultas iniciales de cada página quedan en caché antes de servir
+    if os.getenv("ECAS_PRECALENTAR", "0") == "1":
+        from utilities.precalentar import precalentar_cache
+        precalentar_cache()
     app.run(debug=True, port=8050)
\ No newline at end of file
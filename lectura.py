@@ -0,0 +1,254 @@
+from sqlalchemy.sql.elements import TextClause
+from sqlalchemy.engine import Engine
+from sqlalchemy import text
+import pandas as pd
+import numpy as np
+from functools import lru_cache
+from admision import admitir
+from cancelacion import ConsultaCancelada, esta_cancelada, liberar_cursores, verificar_vigente
+from conn_db import nombre_base
+from perfilador import consulta_en_curso, fin_consulta, registrar_resultado
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+# Filas por viaje al servidor al leer resultados
+TAMANO_LOTE = int(os.getenv("ECAS_TAMANO_LOTE", "50000"))
+# Si es "1", cada lectura imprime filas, bytes en memoria y tiempo
+REPORTE_LECTURAS = os.getenv("ECAS_REPORTE_LECTURAS", "0") == "1"
+
+# Columnas de año (cohorte, periodo, etc.) que caben en int16
+_PATRON_ANIO = re.compile(r"^(anio|año|ano|cohorte|periodo|cat_periodo)(_|$)|(_anio|_año|_cohorte|_periodo)$", re.IGNORECASE)
+
+# Texto respaldado por Arrow pero con NaN como nulo, para que el código existente (== , fillna, máscaras) se comporte igual que con object
+_DTYPE_TEXTO = pd.StringDtype("pyarrow", na_value=np.nan)
+
+# Valores de los selectores que significan "sin filtro"
+VALORES_TODOS = ("Todas", "Todos", "")
+
+# Últimas lecturas por consulta: nombre -> (filas, bytes, segundos)
+_lecturas = {}
+_lecturas_lock = threading.Lock()
+
+# Textos SQL distintos enviados por cada consulta: nombre -> {hash del texto: ejecuciones}
+_textos_sql = {}
+
+def _columna_arrow(valores):
+    import pyarrow as pa
+    import decimal
+
+    # pyodbc entrega DECIMAL/NUMERIC como Decimal; se pasan a float como hace read_sql
+    muestra = next((v for v in valores if v is not None), None)
+    if isinstance(muestra, decimal.Decimal):
+        valores = [None if v is None else float(v) for v in valores]
+    return pa.array(valores, from_pandas=True)
+
+def _unir_trozos(trozos):
+    import pyarrow as pa
+
+    # Un lote con solo nulos llega como tipo null, y enteros/decimales pueden alternarse entre lotes
+    tipos = {t.type for t in trozos} - {pa.null()}
+    if not tipos:
+        return pa.chunked_array(trozos)
+    if len(tipos) == 1:
+        tipo = tipos.pop()
+    elif all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in tipos):
+        tipo = pa.float64()
+    else:
+        tipo = pa.string()
+    return pa.chunked_array([t if t.type == tipo else t.cast(tipo) for t in trozos], type=tipo)
+
+def _compactar_enteros(df):
+    for col in df.columns:
+        serie = df[col]
+        if not pd.api.types.is_integer_dtype(serie.dtype) or serie.empty:
+            continue
+        minimo, maximo = serie.min(), serie.max()
+        if _PATRON_ANIO.search(str(col)) and -32768 <= minimo and maximo <= 32767:
+            df[col] = serie.astype(np.int16)
+        elif -2**31 <= minimo and maximo < 2**31:
+            # int32 y no menos: los conteos se multiplican por 100 para porcentajes
+            df[col] = serie.astype(np.int32)
+    return df
+
+def tabla_a_pandas(tabla):
+    """Convierte una tabla Arrow a DataFrame con el mismo mapeo de tipos que leer_sql."""
+    import pyarrow as pa
+
+    def tipos(tipo):
+        if pa.types.is_string(tipo) or pa.types.is_large_string(tipo):
+            return _DTYPE_TEXTO
+        return None
+
+    return tabla.to_pandas(types_mapper=tipos)
+
+def _ejecutar(conn, sql, params):
+    if isinstance(sql, TextClause):
+        return conn.execute(sql, params or {})
+    if params:
+        return conn.execute(text(sql), params)
+    # Texto sin parámetros: se envía tal cual, igual que pd.read_sql
+    return conn.exec_driver_sql(sql)
+
+def leer_sql(sql, con, params=None, categoricas=None, nombre=None, lote=None):
+    """
+    Reemplazo de pd.read_sql para las consultas de los dashboards.
+    Lee en lotes con fetchmany y arma las columnas en Arrow: texto respaldado por Arrow, enteros reducidos
+    (int16 para años) y las columnas de `categoricas` como category. Registra los bytes de cada resultado.
+    """
+    import pyarrow as pa
+
+    inicio = time.perf_counter()
+    lote = lote or TAMANO_LOTE
+    nombre = nombre or _nombre_llamador()
+    registrar_texto_sql(nombre, sql.text if isinstance(sql, TextClause) else sql)
+
+    # Se acepta un Engine o una Connection ya abierta, como pd.read_sql.
+    # El lugar en la base se pide antes de tomar una conexión del pool y se libera al terminar de leer.
+    verificar_vigente()
+    with admitir(nombre_base(con)):
+        verificar_vigente()
+        abierta = isinstance(con, Engine)
+        conn = con.connect() if abierta else con
+        token = consulta_en_curso(nombre)
+        try:
+            resultado = _ejecutar(conn, sql, params)
+            nombres = list(resultado.keys())
+            trozos = [[] for _ in nombres]
+            while True:
+                filas = resultado.fetchmany(lote)
+                if not filas:
+                    break
+                for i, valores in enumerate(zip(*filas)):
+                    trozos[i].append(_columna_arrow(valores))
+            # Filas y bytes (Arrow, antes de pasar a pandas) para el perfilador de consultas
+            registrar_resultado(
+                conn,
+                sum(len(t) for t in trozos[0]) if trozos else 0,
+                sum(t.nbytes for columna in trozos for t in columna),
+            )
+        except Exception as e:
+            # La sentencia se interrumpió porque la solicitud fue reemplazada
+            if esta_cancelada():
+                raise ConsultaCancelada("Consulta interrumpida: solicitud reemplazada") from e
+            raise
+        finally:
+            fin_consulta(token)
+            liberar_cursores(conn)
+            if abierta:
+                conn.close()
+
+    if trozos and trozos[0]:
+        columnas = [_unir_trozos(t) for t in trozos]
+        df = tabla_a_pandas(pa.Table.from_arrays(columnas, names=nombres))
+        df = _compactar_enteros(df)
+    else:
+        df = pd.DataFrame(columns=nombres)
+
+    for col in categoricas or []:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+
+    segundos = time.perf_counter() - inicio
+    registrar_lectura(nombre, df, segundos)
+    return df
+
+def leer_escalar(sql, con, params=None, nombre=None):
+    """Primer valor de la primera fila (conteos de KPIs), registrando el texto enviado como leer_sql."""
+    nombre = nombre or _nombre_llamador()
+    registrar_texto_sql(nombre, sql.text if isinstance(sql, TextClause) else sql)
+    verificar_vigente()
+    with admitir(nombre_base(con)):
+        verificar_vigente()
+        abierta = isinstance(con, Engine)
+        conn = con.connect() if abierta else con
+        token = consulta_en_curso(nombre)
+        try:
+            valor = _ejecutar(conn, sql, params).scalar()
+            registrar_resultado(conn, 1, None)
+            return valor
+        except Exception as e:
+            if esta_cancelada():
+                raise ConsultaCancelada("Consulta interrumpida: solicitud reemplazada") from e
+            raise
+        finally:
+            fin_consulta(token)
+            liberar_cursores(conn)
+            if abierta:
+                conn.close()
+
+def _nombre_llamador():
+    import sys
+    # Nombre de la función de queries_* que llamó a leer_sql
+    marco = sys._getframe(2)
+    return f"{marco.f_globals.get('__name__', '?').rsplit('.', 1)[-1]}.{marco.f_code.co_name}"
+
+def registrar_lectura(nombre, df, segundos):
+    bytes_df = int(df.memory_usage(deep=True).sum())
+    with _lecturas_lock:
+        _lecturas[nombre] = (len(df), bytes_df, segundos)
+    if REPORTE_LECTURAS:
+        print(f"[lectura] {nombre}: {len(df)} filas, {bytes_df / 1024:.1f} KB, {segundos:.3f} s")
+
+def reporte_lecturas():
+    """Imprime filas, memoria y tiempo de la última lectura de cada consulta, de mayor a menor memoria."""
+    with _lecturas_lock:
+        lecturas = sorted(_lecturas.items(), key=lambda item: item[1][1], reverse=True)
+    print("--- Lecturas registradas ---")
+    for nombre, (filas, bytes_df, segundos) in lecturas:
+        print(f"{nombre:<60} {filas:>9} filas {bytes_df / 1024:>10.1f} KB {segundos:>8.3f} s")
+    return lecturas
+
+# --- SQL estable ---
+# Cada métrica debe enviar siempre el mismo texto: los filtros opcionales se escriben como
+# (:param IS NULL OR columna = :param) y "Todas"/"Todos" se envían como NULL, así SQL Server
+# compila un solo plan por consulta en vez de uno por combinación de filtros. Los filtros de varios
+# valores viajan como una lista JSON en un solo parámetro (OPENJSON), sin importar cuántos se elijan.
+
+def valor_filtro(valor):
+    """Valor a enviar para un filtro opcional: None cuando el selector está en "Todas"/"Todos"."""
+    if valor is None or (isinstance(valor, str) and valor in VALORES_TODOS):
+        return None
+    return valor
+
+def filtro_opcional(columna, parametro, operador="="):
+    """Condición que no filtra cuando :parametro es NULL."""
+    return f"(:{parametro} IS NULL OR {columna} {operador} :{parametro})"
+
+def valor_lista(valores):
+    """Valores de un filtro múltiple como un solo parámetro JSON; None (sin filtro) si no hay selección."""
+    if not isinstance(valores, (list, tuple)) or not valores:
+        return None
+    return json.dumps(list(valores), ensure_ascii=False)
+
+def filtro_lista(columna, parametro):
+    """Condición columna IN (lista JSON en :parametro); el texto no cambia con la cantidad de valores."""
+    return f"{columna} IN (SELECT value FROM OPENJSON(:{parametro}))"
+
+@lru_cache(maxsize=None)
+def sql_estable(sql):
+    """text() reutilizable para un texto SQL fijo (se construye una sola vez por texto)."""
+    return text(sql)
+
+def registrar_texto_sql(nombre, texto):
+    resumen = hashlib.sha1(texto.encode("utf-8")).hexdigest()
+    with _lecturas_lock:
+        textos = _textos_sql.setdefault(nombre, {})
+        textos[resumen] = textos.get(resumen, 0) + 1
+
+def estadisticas_textos_sql():
+    """{consulta: (textos distintos, ejecuciones)}"""
+    with _lecturas_lock:
+        return {nombre: (len(textos), sum(textos.values())) for nombre, textos in _textos_sql.items()}
+
+def reporte_textos_sql():
+    """Imprime cuántos textos SQL distintos generó cada consulta; más de uno significa planes distintos en el servidor."""
+    estadisticas = estadisticas_textos_sql()
+    print("--- Textos SQL distintos por consulta ---")
+    for nombre, (distintos, ejecuciones) in sorted(estadisticas.items(), key=lambda item: item[1][0], reverse=True):
+        marca = "" if distintos == 1 else "  <-- varios textos"
+        print(f"{nombre:<60} {distintos:>4} textos {ejecuciones:>6} ejecuciones{marca}")
+    return estadisticas
@@ -0,0 +1,220 @@
+"""
+Perfil de memoria de callbacks, datos de módulo y cachés.
+
+Con ECAS_MEMORIA=1 se activa tracemalloc y cada callback registrado (trazas.instrumentar_callbacks) se mide:
+    pico      máximo de memoria asignada durante el callback, sobre lo que había al empezar
+    retenido  memoria que sigue asignada al terminar (crecimiento del worker atribuible al callback)
+    sitios    líneas de código que más memoria retuvieron en la ejecución con mayor pico (comparando
+              snapshots de tracemalloc antes y después)
+Como tracemalloc mide todo el proceso, en este modo los callbacks se ejecutan de a uno por worker.
+Es un modo de diagnóstico: tracemalloc hace las asignaciones varias veces más lentas.
+
+reporte_memoria() muestra además el RSS del proceso, el tamaño de los datos globales de los módulos
+del proyecto (GeoJSON, DataFrames, diccionarios) y el de las cachés en memoria, para dimensionar workers.
+"""
+from contextlib import contextmanager
+import os
+import sys
+import threading
+import tracemalloc
+
+MEMORIA_ACTIVA = os.getenv("ECAS_MEMORIA", "0") == "1"
+# Marcos de pila guardados por asignación (más marcos = sitios más precisos y más costo)
+MEMORIA_MARCOS = int(os.getenv("ECAS_MEMORIA_MARCOS", "5"))
+# Sitios de asignación guardados por callback
+SITIOS_POR_CALLBACK = 10
+
+RAIZ_PROYECTO = os.path.dirname(os.path.abspath(__file__))
+
+# callback -> {"ejecuciones", "pico_maximo", "suma_picos", "retenido", "sitios"}
+_callbacks = {}
+_lock = threading.Lock()
+# Un callback a la vez: los picos de tracemalloc son de todo el proceso
+_medicion = threading.Lock()
+
+def iniciar():
+    """Activa tracemalloc si el modo está activo (lo llama trazas.instrumentar_callbacks)."""
+    if MEMORIA_ACTIVA and not tracemalloc.is_tracing():
+        tracemalloc.start(MEMORIA_MARCOS)
+
+@contextmanager
+def medir_memoria(nombre):
+    """Mide pico y memoria retenida del bloque (solo con ECAS_MEMORIA=1)."""
+    if not MEMORIA_ACTIVA or not tracemalloc.is_tracing():
+        yield
+        return
+    with _medicion:
+        antes = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        inicial, _ = tracemalloc.get_traced_memory()
+        try:
+            yield
+        finally:
+            final, pico = tracemalloc.get_traced_memory()
+            _registrar(nombre, pico - inicial, final - inicial, antes)
+
+def _registrar(nombre, pico, retenido, antes):
+    with _lock:
+        c = _callbacks.setdefault(nombre, {"ejecuciones": 0, "pico_maximo": 0, "suma_picos": 0, "retenido": 0, "sitios": []})
+        c["ejecuciones"] += 1
+        c["suma_picos"] += pico
+        c["retenido"] += retenido
+        nuevo_maximo = pico >= c["pico_maximo"]
+        c["pico_maximo"] = max(c["pico_maximo"], pico)
+    if not nuevo_maximo:
+        return
+    # Los sitios se calculan solo para la ejecución con el mayor pico (comparar snapshots es lo más costoso)
+    despues = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    diferencias = despues.compare_to(antes, "traceback")[:SITIOS_POR_CALLBACK]
+    sitios = [(str(d.traceback[0]), d.size_diff, d.count_diff) for d in diferencias if d.size_diff > 0]
+    with _lock:
+        _callbacks[nombre]["sitios"] = sitios
+
+def estadisticas_callbacks():
+    with _lock:
+        return {nombre: dict(c, sitios=list(c["sitios"])) for nombre, c in _callbacks.items()}
+
+# --- Tamaño de datos en memoria ---
+
+def tamano_profundo(objeto, limite=2_000_000):
+    """Bytes aproximados de un objeto y todo lo que contiene (DataFrames con memory_usage(deep=True))."""
+    import pandas as pd
+    import numpy as np
+
+    vistos = set()
+    pendientes = [objeto]
+    total = 0
+    while pendientes and len(vistos) < limite:
+        actual = pendientes.pop()
+        if id(actual) in vistos:
+            continue
+        vistos.add(id(actual))
+        if isinstance(actual, (pd.DataFrame, pd.Series, pd.Index)):
+            uso = actual.memory_usage(deep=True)
+            total += int(uso.sum()) if hasattr(uso, "sum") else int(uso)
+            continue
+        if isinstance(actual, np.ndarray):
+            total += actual.nbytes
+            continue
+        total += sys.getsizeof(actual)
+        if isinstance(actual, dict):
+            pendientes.extend(actual.keys())
+            pendientes.extend(actual.values())
+        elif isinstance(actual, (list, tuple, set, frozenset)):
+            pendientes.extend(actual)
+    return total
+
+def _modulos_proyecto():
+    for nombre, modulo in list(sys.modules.items()):
+        ruta = getattr(modulo, "__file__", None) or ""
+        if ruta.startswith(RAIZ_PROYECTO) and "site-packages" not in ruta:
+            yield nombre, modulo
+
+def datos_de_modulos(minimo=64 * 1024):
+    """[(módulo.variable, bytes)] de los datos globales de los módulos del proyecto, de mayor a menor."""
+    import types
+
+    resultado = []
+    contados = set()
+    for nombre, modulo in sorted(_modulos_proyecto()):
+        for variable, valor in list(vars(modulo).items()):
+            if variable.startswith("__") or isinstance(valor, (types.ModuleType, types.FunctionType, type)):
+                continue
+            # Con "from x import *" el mismo objeto aparece en varios módulos: se cuenta una vez
+            if id(valor) in contados:
+                continue
+            contados.add(id(valor))
+            tamano = tamano_profundo(valor)
+            if tamano >= minimo:
+                resultado.append((f"{nombre}.{variable}", tamano))
+    return sorted(resultado, key=lambda item: item[1], reverse=True)
+
+def tamano_caches():
+    """Cachés en memoria de este proceso: {caché: (bytes aproximados o None, entradas)}."""
+    import cache_consultas
+    import conn_db
+    import lectura
+    import perfilador
+
+    caches = {
+        "cache_consultas (nivel en memoria)": (cache_consultas._memoria_bytes, len(cache_consultas._memoria)),
+        "perfilador (huellas)": (tamano_profundo(perfilador._huellas), len(perfilador._huellas)),
+    }
+    # lru_cache no expone su contenido: solo la cantidad de entradas
+    for nombre, funcion in (
+        ("lectura.sql_estable", lectura.sql_estable),
+        ("conn_db.traducir_sql", conn_db.traducir_sql),
+        ("perfilador.normalizar_sql", perfilador.normalizar_sql),
+    ):
+        caches[nombre] = (None, funcion.cache_info().currsize)
+    return caches
+
+def rss_proceso():
+    """Memoria residente del proceso en bytes (actual en Linux; el máximo histórico en otros sistemas)."""
+    try:
+        with open("/proc/self/status") as estado:
+            for linea in estado:
+                if linea.startswith("VmRSS:"):
+                    return int(linea.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maximo if sys.platform == "darwin" else maximo * 1024
+    except ImportError:
+        return None
+
+def reporte_memoria(top=15):
+    """Imprime RSS, picos por callback, datos globales de los módulos y cachés en memoria."""
+    mb = 1024 * 1024
+    rss = rss_proceso()
+    print(f"--- Memoria del proceso: RSS {rss / mb:.1f} MB ---" if rss else "--- Memoria del proceso ---")
+    if tracemalloc.is_tracing():
+        actual, pico = tracemalloc.get_traced_memory()
+        print(f"tracemalloc: {actual / mb:.1f} MB asignados ahora")
+
+    callbacks = estadisticas_callbacks()
+    if callbacks:
+        print("--- Callbacks por pico de memoria ---")
+        for nombre, c in sorted(callbacks.items(), key=lambda item: item[1]["pico_maximo"], reverse=True)[:top]:
+            promedio = c["suma_picos"] / c["ejecuciones"]
+            print(
+                f"{nombre:<55} {c['ejecuciones']:>5} ejec pico máx {c['pico_maximo'] / mb:>8.1f} MB "
+                f"prom {promedio / mb:>7.1f} MB retenido {c['retenido'] / mb:>7.1f} MB"
+            )
+            for sitio, bytes_sitio, cuenta in c["sitios"][:3]:
+                print(f"{'':<6}{bytes_sitio / mb:>7.2f} MB {cuenta:>7} bloques  {sitio}")
+
+    print("--- Datos globales de módulos ---")
+    datos = datos_de_modulos()
+    for variable, tamano in datos[:top]:
+        print(f"{variable:<70} {tamano / mb:>8.1f} MB")
+
+    print("--- Cachés en memoria ---")
+    caches = tamano_caches()
+    for cache, (tamano, entradas) in caches.items():
+        texto = f"{tamano / mb:>8.1f} MB" if tamano is not None else f"{'':>11}"
+        print(f"{cache:<70} {texto} {entradas:>7} entradas")
+    return {"rss": rss, "callbacks": callbacks, "modulos": datos, "caches": caches}
+
+def texto_metricas_memoria():
+    """Métricas de memoria en formato Prometheus (se agregan a /metrics)."""
+    lineas = [
+        "# HELP ecas_proceso_rss_bytes Memoria residente del worker",
+        "# TYPE ecas_proceso_rss_bytes gauge",
+        f"ecas_proceso_rss_bytes {rss_proceso() or 0}",
+    ]
+    callbacks = estadisticas_callbacks()
+    if callbacks:
+        lineas += [
+            "# HELP ecas_callback_memoria_pico_bytes Mayor pico de memoria asignada durante el callback (ECAS_MEMORIA=1)",
+            "# TYPE ecas_callback_memoria_pico_bytes gauge",
+        ]
+        lineas += [f'ecas_callback_memoria_pico_bytes{{callback="{nombre}"}} {c["pico_maximo"]}' for nombre, c in sorted(callbacks.items())]
+        lineas += [
+            "# HELP ecas_callback_memoria_retenida_bytes Memoria que siguió asignada al terminar el callback, acumulada",
+            "# TYPE ecas_callback_memoria_retenida_bytes counter",
+        ]
+        lineas += [f'ecas_callback_memoria_retenida_bytes{{callback="{nombre}"}} {c["retenido"]}' for nombre, c in sorted(callbacks.items())]
+    return "\n".join(lineas) + "\n"
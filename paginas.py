@@ -0,0 +1,170 @@
+"""
+Registro diferido de las páginas de index.py.
+
+Cada módulo de página define su layout y sus @callback, y al importarse crea motores, lee GeoJSON y ejecuta
+consultas de módulo. Con ECAS_PAGINAS_DIFERIDAS=1 (por defecto) ninguno se importa al arrancar: el módulo de
+una página se importa la primera vez que se visita su ruta, y sus callbacks se agregan entonces a la app.
+Si la base no responde, la app arranca igual y solo esa página muestra el error (se reintenta en la
+siguiente visita). Con ECAS_PAGINAS_DIFERIDAS=0 se importan todas al arrancar, como antes.
+
+El navegador pide la lista de callbacks (/_dash-dependencies) una sola vez al cargar la app, así que:
+    - un GET directo a la ruta de una página la carga antes de servir la app (registrar_rutas)
+    - si se navega dentro de la app a una página que el navegador no conocía al cargar (paginas-navegador),
+      se carga y se recarga la ventana para que el navegador reciba sus callbacks (recarga-pagina)
+Cada proceso carga sus propias páginas. Con varios workers (gunicorn) la siguiente solicitud de un navegador
+puede llegar a un worker que aún no cargó la página, y lo mismo pasa con las pestañas abiertas antes de
+reiniciar el servidor. Por eso /_dash-update-component, /_dash-dependencies y /_dash-layout también cargan
+antes del despacho de Dash la página de la cabecera Referer (grabacion.pagina_de). Un callback que sigue sin
+estar registrado carga todas las páginas que faltan. En despliegues con varios workers se necesita este
+registro (registrar_rutas) o ECAS_PAGINAS_DIFERIDAS=0.
+El tiempo de importación de cada página se guarda (reporte_paginas, /metrics); el costo de cada módulo al
+arrancar se mide con utilities.tiempos_importacion.
+"""
+import importlib
+import os
+import threading
+import time
+
+PAGINAS_DIFERIDAS = os.getenv("ECAS_PAGINAS_DIFERIDAS", "1") == "1"
+
+# Ruta -> módulo con el layout y los callbacks de la página
+PAGINAS = {
+    "/desertores": "dashboard_desertores.pages.dashboard_desertores",
+    "/titulados": "dashboard_titulados.pages.dashboard_titulados",
+    "/acreditacion": "dashboard_acreditacion.pages.dashboard_acreditacion",
+    "/transicion": "dashboard_transicion.pages.dashboard_transicion",
+    "/analisis_general": "dashboard_analisis_docencia.pages.dashboard_ramos",
+    "/cohortes": "dashboard_analisis_docencia.pages.dashboard_analisis_cohorte",
+}
+
+# Ruta -> módulo ya cargado / segundos que tomó importarlo / último error al importarlo
+_modulos = {}
+_tiempos = {}
+_errores = {}
+_lock = threading.Lock()
+
+def paginas_cargadas():
+    """Rutas cuyas páginas ya están cargadas (y sus callbacks registrados)."""
+    return sorted(_modulos)
+
+def _incorporar_callbacks(app):
+    # Antes de la primera solicitud lo hace el _setup_server de Dash; después hay que copiarlos aquí
+    from dash import _callback
+
+    if not app._got_first_request["setup_server"]:
+        return
+    for clave in list(_callback.GLOBAL_CALLBACK_MAP):
+        app.callback_map[clave] = _callback.GLOBAL_CALLBACK_MAP.pop(clave)
+    app._callback_list.extend(_callback.GLOBAL_CALLBACK_LIST)
+    _callback.GLOBAL_CALLBACK_LIST.clear()
+
+def cargar_pagina(app, ruta):
+    """Importa el módulo de la página (una sola vez) y registra sus callbacks en la app; retorna el módulo."""
+    modulo = _modulos.get(ruta)
+    if modulo is not None:
+        return modulo
+
+    from dash import _callback
+    from trazas import instrumentar_callbacks
+
+    with _lock:
+        modulo = _modulos.get(ruta)
+        if modulo is not None:
+            return modulo
+        # Si la importación falla a medias, se descartan los callbacks que alcanzó a registrar
+        largo_lista = len(_callback.GLOBAL_CALLBACK_LIST)
+        claves = set(_callback.GLOBAL_CALLBACK_MAP)
+        inicio = time.perf_counter()
+        try:
+            modulo = importlib.import_module(PAGINAS[ruta])
+        except Exception as e:
+            del _callback.GLOBAL_CALLBACK_LIST[largo_lista:]
+            for clave in set(_callback.GLOBAL_CALLBACK_MAP) - claves:
+                del _callback.GLOBAL_CALLBACK_MAP[clave]
+            _errores[ruta] = f"{type(e).__name__}: {e}"
+            raise
+        _tiempos[ruta] = time.perf_counter() - inicio
+        _errores.pop(ruta, None)
+        _incorporar_callbacks(app)
+        instrumentar_callbacks(app)
+        _modulos[ruta] = modulo
+    print(f"Página {ruta} cargada en {_tiempos[ruta]:.2f} s")
+    return modulo
+
+def intentar_cargar(app, ruta):
+    """Como cargar_pagina, pero un error solo se informa; retorna el módulo o None."""
+    try:
+        return cargar_pagina(app, ruta)
+    except Exception as e:
+        print(f"⚠️ No se pudo cargar la página {ruta}: {e}")
+        return None
+
+# Rutas de Dash que necesitan la página del navegador ya cargada en este proceso
+RUTAS_DASH = ("/_dash-update-component", "/_dash-dependencies", "/_dash-layout")
+
+def registrar_rutas(app):
+    """
+    Carga la página pedida antes de que Dash atienda la solicitud: GET directo a su ruta, o solicitudes de
+    Dash (callbacks, dependencias, layout) desde una página que este proceso aún no cargó.
+    """
+    from flask import request
+    from grabacion import pagina_de
+
+    @app.server.before_request
+    def cargar_pagina_pedida():
+        if request.method == "GET" and request.path in PAGINAS:
+            if request.path not in _modulos:
+                intentar_cargar(app, request.path)
+            return None
+        if not request.path.endswith(RUTAS_DASH):
+            return None
+        pagina = pagina_de(request.referrer)
+        if pagina in PAGINAS and pagina not in _modulos:
+            intentar_cargar(app, pagina)
+        if request.path.endswith("/_dash-update-component"):
+            cuerpo = request.get_json(silent=True)
+            salida = cuerpo.get("output") if isinstance(cuerpo, dict) else None
+            if salida and salida not in app.callback_map:
+                # Sin Referer útil: el callback está en alguna de las páginas que faltan
+                for ruta in PAGINAS:
+                    if ruta not in _modulos and salida not in app.callback_map:
+                        intentar_cargar(app, ruta)
+        return None
+
+def registrar_paginas(app):
+    """Carga todas las páginas al arrancar (ECAS_PAGINAS_DIFERIDAS=0) o deja la carga para la primera visita."""
+    registrar_rutas(app)
+    if PAGINAS_DIFERIDAS:
+        return
+    for ruta in PAGINAS:
+        intentar_cargar(app, ruta)
+
+def error_pagina(ruta):
+    return _errores.get(ruta)
+
+# --- Reportes ---
+
+def reporte_paginas():
+    """Imprime el tiempo de carga de cada página cargada y las que fallaron."""
+    print("--- Carga de páginas ---")
+    for ruta in PAGINAS:
+        if ruta in _tiempos and ruta in _modulos:
+            print(f"{ruta:<20} {_tiempos[ruta]:>8.2f} s")
+        elif ruta in _errores:
+            print(f"{ruta:<20} {'error':>8}   {_errores[ruta]}")
+        else:
+            print(f"{ruta:<20} {'-':>8}   (sin visitar)")
+
+def texto_metricas_paginas():
+    """Estado y segundos de carga de cada página en el formato de texto de Prometheus."""
+    lineas = [
+        "# HELP ecas_pagina_cargada 1 si el módulo de la página ya está cargado",
+        "# TYPE ecas_pagina_cargada gauge",
+    ]
+    lineas += [f'ecas_pagina_cargada{{ruta="{ruta}"}} {int(ruta in _modulos)}' for ruta in PAGINAS]
+    lineas += [
+        "# HELP ecas_pagina_carga_segundos Segundos que tomó importar el módulo de la página",
+        "# TYPE ecas_pagina_carga_segundos gauge",
+    ]
+    lineas += [f'ecas_pagina_carga_segundos{{ruta="{ruta}"}} {segundos:.6f}' for ruta, segundos in _tiempos.items()]
+    return "\n".join(lineas) + "\n"
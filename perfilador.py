@@ -0,0 +1,305 @@
+"""
+Perfilador de consultas SQL.
+
+Cada sentencia que pasa por los engines compartidos (get_engine) se agrupa por huella: el texto
+normalizado, sin literales, parámetros ni espacios, de modo que la misma consulta con otros filtros
+cuenta como una sola. Por huella se acumulan ejecuciones, tiempo (ejecución + lectura de filas), filas,
+bytes aproximados y las funciones de queries_* que la enviaron.
+
+Las sentencias que tardan más de ECAS_UMBRAL_LENTA segundos se escriben en un log rotativo en formato
+JSON por línea (ECAS_LOG_CONSULTAS_DIR/consultas_lentas.log), con su plan de ejecución capturado en
+ECAS_LOG_CONSULTAS_DIR/planes (planes.py). reporte_consultas() imprime las huellas que más tiempo
+consumen en total, y los totales por base se exponen en /metrics (texto_metricas_consultas).
+"""
+from collections import deque
+from contextvars import ContextVar
+from functools import lru_cache
+from logging.handlers import RotatingFileHandler
+from sqlalchemy import event
+from trazas import sumar_tramo
+from planes import programar_captura
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+
+PERFILADOR_ACTIVO = os.getenv("ECAS_PERFILADOR", "1") == "1"
+UMBRAL_LENTA = float(os.getenv("ECAS_UMBRAL_LENTA", "1.0"))
+LOG_CONSULTAS_DIR = os.getenv(
+    "ECAS_LOG_CONSULTAS_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs_consultas")
+)
+LOG_LENTAS_MB = float(os.getenv("ECAS_LOG_LENTAS_MB", "20"))
+LOG_LENTAS_ARCHIVOS = int(os.getenv("ECAS_LOG_LENTAS_ARCHIVOS", "5"))
+# Duraciones guardadas por huella para calcular percentiles
+MUESTRAS_POR_HUELLA = 1000
+
+# Función de queries_* que está leyendo (la fija lectura.leer_sql / leer_escalar)
+_consulta_actual = ContextVar("ecas_consulta", default=None)
+
+# Huella -> acumulados
+_huellas = {}
+# Base -> contadores que no se reinician (se exponen en /metrics)
+_por_base = {}
+_lock = threading.Lock()
+_engines_instrumentados = set()
+_log_lentas = None
+
+_COMENTARIOS = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_TEXTOS = re.compile(r"N?'(?:[^']|'')*'")
+_PARAMETROS = re.compile(r"(?<![:\w]):\w+|\$\d+|%\(\w+\)s|\?")
+_NUMEROS = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_LISTAS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_ESPACIOS = re.compile(r"\s+")
+
+@lru_cache(maxsize=4096)
+def normalizar_sql(sql):
+    """Texto de la sentencia sin comentarios, literales ni parámetros (todos pasan a ?) y con espacios simples."""
+    sql = _COMENTARIOS.sub(" ", sql)
+    sql = _TEXTOS.sub("?", sql)
+    sql = _PARAMETROS.sub("?", sql)
+    sql = _NUMEROS.sub("?", sql)
+    sql = _LISTAS.sub("(?...)", sql)
+    return _ESPACIOS.sub(" ", sql).strip().rstrip(";").strip()
+
+@lru_cache(maxsize=4096)
+def huella_sql(sql):
+    """(huella, texto normalizado) de una sentencia."""
+    normalizado = normalizar_sql(sql)
+    return hashlib.sha1(normalizado.lower().encode("utf-8")).hexdigest()[:12], normalizado
+
+def consulta_en_curso(nombre):
+    """Marca `nombre` como la función que envía las próximas sentencias; retorna el token para restablecerla."""
+    return _consulta_actual.set(nombre)
+
+def fin_consulta(token):
+    _consulta_actual.reset(token)
+
+def _funcion_llamadora():
+    nombre = _consulta_actual.get()
+    if nombre:
+        return nombre
+    # Sentencias enviadas fuera de lectura (versiones, tablas_derivadas, views): la primera función propia de la pila
+    marco = sys._getframe(2)
+    while marco is not None:
+        modulo = marco.f_globals.get("__name__", "")
+        if not modulo.startswith(("sqlalchemy", "pandas", "perfilador", "cancelacion", "contextlib", "concurrent", "threading")):
+            return f"{modulo.rsplit('.', 1)[-1]}.{marco.f_code.co_name}"
+        marco = marco.f_back
+    return "?"
+
+# --- Registro por engine ---
+
+def instrumentar_engine(engine, base):
+    """Mide cada sentencia del engine: tiempo desde que se envía hasta que se terminan de leer sus filas."""
+    if not PERFILADOR_ACTIVO or id(engine) in _engines_instrumentados:
+        return
+    with _lock:
+        if id(engine) in _engines_instrumentados:
+            return
+        _engines_instrumentados.add(id(engine))
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        # La sentencia anterior de la conexión ya terminó de leerse
+        _cerrar_pendiente(conn.info)
+        conn.info["ecas_perfil_inicio"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _despues(conn, cursor, statement, parameters, context, executemany):
+        inicio = conn.info.pop("ecas_perfil_inicio", None)
+        if inicio is None:
+            return
+        filas = cursor.rowcount if cursor.description is None and cursor.rowcount >= 0 else None
+        conn.info["ecas_perfil_pendiente"] = {
+            "engine": engine,
+            "base": base,
+            "funcion": _funcion_llamadora(),
+            "sql": statement,
+            "parametros": parameters,
+            "inicio": inicio,
+            "ejecucion": time.perf_counter() - inicio,
+            "filas": filas,
+            "bytes": None,
+        }
+
+    @event.listens_for(engine, "handle_error")
+    def _error(contexto):
+        conexion = contexto.connection
+        if conexion is None:
+            return
+        inicio = conexion.info.pop("ecas_perfil_inicio", None)
+        if inicio is not None and contexto.statement:
+            _registrar({
+                "base": base, "funcion": _funcion_llamadora(), "sql": contexto.statement,
+                "parametros": contexto.parameters, "inicio": inicio,
+                "ejecucion": time.perf_counter() - inicio, "filas": None, "bytes": None,
+            }, error=str(contexto.original_exception)[:300])
+
+    # Al devolver la conexión al pool se cierra la última sentencia (las leídas fuera de lectura)
+    @event.listens_for(engine, "checkin")
+    def _devolver(dbapi_conn, registro):
+        _cerrar_pendiente(registro.info)
+
+def registrar_resultado(conn, filas, bytes_resultado):
+    """Completa la última sentencia de `conn` con las filas y bytes leídos (lo llama lectura al terminar)."""
+    pendiente = conn.info.get("ecas_perfil_pendiente")
+    if pendiente is not None:
+        pendiente["filas"] = filas
+        pendiente["bytes"] = bytes_resultado
+        _cerrar_pendiente(conn.info)
+
+def _cerrar_pendiente(info):
+    pendiente = info.pop("ecas_perfil_pendiente", None)
+    if pendiente is not None:
+        _registrar(pendiente)
+
+def _registrar(sentencia, error=None):
+    segundos = time.perf_counter() - sentencia["inicio"]
+    huella, normalizado = huella_sql(sentencia["sql"])
+    with _lock:
+        h = _huellas.get(huella)
+        if h is None:
+            h = _huellas[huella] = {
+                "sql": normalizado, "bases": set(), "funciones": {},
+                "ejecuciones": 0, "errores": 0, "segundos": 0.0, "segundos_ejecucion": 0.0,
+                "maximo": 0.0, "filas": 0, "bytes": 0, "lentas": 0,
+                "duraciones": deque(maxlen=MUESTRAS_POR_HUELLA),
+            }
+        h["bases"].add(sentencia["base"])
+        h["funciones"][sentencia["funcion"]] = h["funciones"].get(sentencia["funcion"], 0) + 1
+        h["ejecuciones"] += 1
+        h["errores"] += error is not None
+        h["segundos"] += segundos
+        h["segundos_ejecucion"] += sentencia["ejecucion"]
+        h["maximo"] = max(h["maximo"], segundos)
+        h["filas"] += sentencia["filas"] or 0
+        h["bytes"] += sentencia["bytes"] or 0
+        h["duraciones"].append(segundos)
+        lenta = segundos >= UMBRAL_LENTA
+        h["lentas"] += lenta
+        b = _por_base.setdefault(sentencia["base"], {"sentencias": 0, "errores": 0, "segundos": 0.0, "filas": 0})
+        b["sentencias"] += 1
+        b["errores"] += error is not None
+        b["segundos"] += segundos
+        b["filas"] += sentencia["filas"] or 0
+    # Tramo "sql" del callback en curso (trazas)
+    sumar_tramo("sql", segundos)
+    if lenta or error is not None:
+        plan = None
+        if error is None:
+            plan = programar_captura(
+                sentencia.get("engine"), sentencia["base"], huella, sentencia["sql"],
+                sentencia["parametros"], segundos, sentencia["funcion"],
+            )
+        _escribir_lenta(huella, sentencia, segundos, error, plan)
+
+# --- Log de consultas lentas ---
+
+def _logger_lentas():
+    global _log_lentas
+    if _log_lentas is None:
+        with _lock:
+            if _log_lentas is None:
+                os.makedirs(LOG_CONSULTAS_DIR, exist_ok=True)
+                logger = logging.getLogger("ecas.consultas_lentas")
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+                manejador = RotatingFileHandler(
+                    os.path.join(LOG_CONSULTAS_DIR, "consultas_lentas.log"),
+                    maxBytes=int(LOG_LENTAS_MB * 1024 * 1024),
+                    backupCount=LOG_LENTAS_ARCHIVOS,
+                    encoding="utf-8",
+                )
+                manejador.setFormatter(logging.Formatter("%(message)s"))
+                logger.addHandler(manejador)
+                _log_lentas = logger
+    return _log_lentas
+
+def _parametros_json(parametros):
+    if parametros is None:
+        return None
+    if isinstance(parametros, dict):
+        return {str(k): v if isinstance(v, (int, float, str, bool, type(None))) else str(v) for k, v in parametros.items()}
+    return [v if isinstance(v, (int, float, str, bool, type(None))) else str(v) for v in parametros]
+
+def _escribir_lenta(huella, sentencia, segundos, error, plan=None):
+    registro = {
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "huella": huella,
+        "base": sentencia["base"],
+        "funcion": sentencia["funcion"],
+        "segundos": round(segundos, 4),
+        "segundos_ejecucion": round(sentencia["ejecucion"], 4),
+        "filas": sentencia["filas"],
+        "bytes": sentencia["bytes"],
+        "error": error,
+        "sql": sentencia["sql"],
+        "parametros": _parametros_json(sentencia["parametros"]),
+        # Ruta del plan (sin extensión) si se capturó uno; ver planes.py
+        "plan": plan,
+    }
+    try:
+        _logger_lentas().info(json.dumps(registro, ensure_ascii=False, default=str))
+    except Exception as e:
+        print(f"⚠️ No se pudo escribir el log de consultas lentas: {e}")
+
+# --- Reportes ---
+
+def _percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+def estadisticas_consultas():
+    """{huella: acumulados}, con p50 y p95 de las últimas duraciones y las funciones que la enviaron."""
+    with _lock:
+        copia = {huella: dict(h, duraciones=list(h["duraciones"]), bases=sorted(h["bases"]), funciones=dict(h["funciones"]))
+                 for huella, h in _huellas.items()}
+    for h in copia.values():
+        duraciones = h.pop("duraciones")
+        h["p50"] = _percentil(duraciones, 50)
+        h["p95"] = _percentil(duraciones, 95)
+    return copia
+
+def reporte_consultas(top=20, orden="segundos"):
+    """Imprime las huellas con más tiempo total (u otro acumulado: "ejecuciones", "maximo", "bytes", "p95")."""
+    estadisticas = estadisticas_consultas()
+    huellas = sorted(estadisticas.items(), key=lambda item: item[1][orden], reverse=True)[:top]
+    total = sum(h["segundos"] for h in estadisticas.values()) or 1.0
+    print(f"--- Consultas por {orden} (top {len(huellas)} de {len(estadisticas)} huellas) ---")
+    for huella, h in huellas:
+        funciones = ", ".join(sorted(h["funciones"], key=h["funciones"].get, reverse=True)[:3])
+        print(
+            f"{huella} {h['segundos']:>9.2f} s ({100 * h['segundos'] / total:>5.1f}%) {h['ejecuciones']:>6} ejec "
+            f"p50 {h['p50']:.3f} p95 {h['p95']:.3f} máx {h['maximo']:.3f} s "
+            f"{h['filas']:>10} filas {h['bytes'] / 1024 / 1024:>8.1f} MB lentas {h['lentas']} errores {h['errores']}"
+        )
+        print(f"{'':<13}{funciones}")
+        print(f"{'':<13}{h['sql'][:150]}")
+    return huellas
+
+def reiniciar_estadisticas():
+    with _lock:
+        _huellas.clear()
+
+def texto_metricas_consultas():
+    """Contadores de sentencias por base en formato Prometheus (se agregan a /metrics)."""
+    with _lock:
+        por_base = {base: dict(b) for base, b in _por_base.items()}
+    metricas = [
+        ("ecas_sentencias_total", "sentencias", "Sentencias SQL ejecutadas por base", "{}"),
+        ("ecas_sentencias_errores_total", "errores", "Sentencias SQL con error por base", "{}"),
+        ("ecas_sentencias_segundos_total", "segundos", "Segundos de las sentencias SQL (ejecución + lectura de filas) por base", "{:.6f}"),
+        ("ecas_sentencias_filas_total", "filas", "Filas leídas o afectadas por base", "{}"),
+    ]
+    lineas = []
+    for metrica, campo, ayuda, formato in metricas:
+        lineas += [f"# HELP {metrica} {ayuda}", f"# TYPE {metrica} counter"]
+        lineas += [f'{metrica}{{base="{base}"}} {formato.format(b[campo])}' for base, b in sorted(por_base.items())]
+    return "\n".join(lineas) + "\n"
@@ -0,0 +1,168 @@
+"""
+Perfiles de CPU (cProfile) de callbacks individuales, a pedido.
+
+Se perfila una ejecución de callback cuando:
+    - su nombre está en ECAS_PERFILAR_CALLBACKS ("modulo.funcion" o solo "funcion", separados por coma; "*" = todos)
+    - la cookie de sesión (ecas_sesion) está en ECAS_PERFILAR_SESIONES
+    - la solicitud trae la cabecera X-ECAS-Perfilar con el valor de ECAS_PERFILAR_TOKEN
+      (opcionalmente "token:nombre_callback" para perfilar solo ese callback)
+Cada perfil se guarda en ECAS_LOG_CONSULTAS_DIR/perfiles como .prof (pstats, se abre con snakeviz o
+python -m pstats) y .txt (funciones más costosas por tiempo acumulado). index.py los lista en /perfiles
+y los entrega en /perfiles/<archivo>; la respuesta del callback perfilado trae la cabecera X-ECAS-Perfil.
+Los perfiles muestran rutas del código y nombres de funciones internas: con ECAS_PERFILAR_TOKEN las rutas
+piden el token (?token= o la cabecera X-ECAS-Perfilar); sin token solo responden a solicitudes locales.
+
+cProfile solo ve el hilo del callback: las consultas lanzadas con ejecutar_en_paralelo aparecen como
+espera en ejecucion.py (su costo de SQL ya está en el perfilador de consultas).
+"""
+from contextlib import contextmanager
+import cProfile
+import io
+import os
+import pstats
+import re
+import threading
+import time
+
+PERFILAR_CALLBACKS = {n.strip() for n in os.getenv("ECAS_PERFILAR_CALLBACKS", "").split(",") if n.strip()}
+PERFILAR_SESIONES = {s.strip() for s in os.getenv("ECAS_PERFILAR_SESIONES", "").split(",") if s.strip()}
+TOKEN_PERFIL = os.getenv("ECAS_PERFILAR_TOKEN", "")
+PERFILES_MAX = int(os.getenv("ECAS_PERFILES_MAX", "200"))
+CABECERA_PERFILAR = "X-ECAS-Perfilar"
+CABECERA_PERFIL = "X-ECAS-Perfil"
+# Líneas del resumen en texto
+LINEAS_RESUMEN = 60
+
+PERFILADO_CONFIGURADO = bool(PERFILAR_CALLBACKS or PERFILAR_SESIONES or TOKEN_PERFIL)
+# Direcciones que pueden ver /perfiles cuando no hay ECAS_PERFILAR_TOKEN
+DIRECCIONES_LOCALES = {"127.0.0.1", "::1"}
+
+_ARCHIVO_VALIDO = re.compile(r"^[\w.\-]+\.(prof|txt)$")
+# cProfile no admite dos perfiles activos a la vez en el mismo proceso (Python 3.12+)
+_lock = threading.Lock()
+
+def directorio_perfiles():
+    from perfilador import LOG_CONSULTAS_DIR
+    return os.path.join(LOG_CONSULTAS_DIR, "perfiles")
+
+def _pedido_por_solicitud(nombre):
+    try:
+        from flask import request, has_request_context
+    except ImportError:
+        return False
+    if not has_request_context():
+        return False
+    if PERFILAR_SESIONES:
+        from cancelacion import COOKIE_SESION
+        if request.cookies.get(COOKIE_SESION) in PERFILAR_SESIONES:
+            return True
+    if TOKEN_PERFIL:
+        token, _, callback = request.headers.get(CABECERA_PERFILAR, "").partition(":")
+        if token == TOKEN_PERFIL:
+            return not callback or callback in (nombre, nombre.rsplit(".", 1)[-1])
+    return False
+
+def debe_perfilar(nombre):
+    """Si la ejecución actual del callback `nombre` debe perfilarse."""
+    if not PERFILADO_CONFIGURADO:
+        return False
+    if "*" in PERFILAR_CALLBACKS or nombre in PERFILAR_CALLBACKS or nombre.rsplit(".", 1)[-1] in PERFILAR_CALLBACKS:
+        return True
+    return _pedido_por_solicitud(nombre)
+
+@contextmanager
+def perfilar(nombre):
+    """Perfila el bloque con cProfile si corresponde (debe_perfilar) y guarda el resultado."""
+    if not debe_perfilar(nombre) or not _lock.acquire(blocking=False):
+        # Otro callback ya se está perfilando en este proceso: este se ejecuta sin perfil
+        yield
+        return
+    perfil = cProfile.Profile()
+    inicio = time.perf_counter()
+    try:
+        perfil.enable()
+        try:
+            yield
+        finally:
+            perfil.disable()
+    finally:
+        _lock.release()
+        archivo = _guardar(nombre, perfil, time.perf_counter() - inicio)
+        if archivo:
+            _anotar_respuesta(archivo)
+
+def _guardar(nombre, perfil, segundos):
+    directorio = directorio_perfiles()
+    base = f"{time.strftime('%Y%m%d_%H%M%S')}_{int(time.time() * 1000) % 1000:03d}_{nombre}"
+    try:
+        os.makedirs(directorio, exist_ok=True)
+        perfil.dump_stats(os.path.join(directorio, base + ".prof"))
+        texto = io.StringIO()
+        texto.write(f"Callback {nombre}: {segundos:.3f} s\n\n")
+        pstats.Stats(perfil, stream=texto).sort_stats("cumulative").print_stats(LINEAS_RESUMEN)
+        with open(os.path.join(directorio, base + ".txt"), "w", encoding="utf-8") as salida:
+            salida.write(texto.getvalue())
+    except Exception as e:
+        print(f"⚠️ No se pudo guardar el perfil de {nombre}: {e}")
+        return None
+    print(f"[perfil] {nombre}: {segundos:.3f} s -> {base}.prof")
+    _podar()
+    return base + ".prof"
+
+def _anotar_respuesta(archivo):
+    # La cabecera se agrega en el after_request de registrar_rutas
+    try:
+        from flask import g, has_request_context
+        if has_request_context():
+            g.ecas_perfiles = getattr(g, "ecas_perfiles", []) + [archivo]
+    except ImportError:
+        pass
+
+def _podar():
+    perfiles = listar_perfiles()
+    for archivo in perfiles[PERFILES_MAX:]:
+        for extension in (".prof", ".txt"):
+            try:
+                os.remove(os.path.join(directorio_perfiles(), archivo[:-len(".prof")] + extension))
+            except FileNotFoundError:
+                pass
+
+def listar_perfiles():
+    """Archivos .prof guardados, del más reciente al más antiguo."""
+    directorio = directorio_perfiles()
+    if not os.path.isdir(directorio):
+        return []
+    return sorted((n for n in os.listdir(directorio) if n.endswith(".prof")), reverse=True)
+
+def registrar_rutas(server):
+    """Rutas /perfiles (lista) y /perfiles/<archivo> (descarga) en el servidor Flask, y la cabecera X-ECAS-Perfil."""
+    from flask import abort, g, request, send_from_directory
+
+    def _autorizado():
+        if not TOKEN_PERFIL:
+            return request.remote_addr in DIRECCIONES_LOCALES
+        return request.args.get("token") == TOKEN_PERFIL or request.headers.get(CABECERA_PERFILAR, "").partition(":")[0] == TOKEN_PERFIL
+
+    @server.route("/perfiles")
+    def lista_perfiles():
+        if not _autorizado():
+            abort(403)
+        sufijo = f"?token={TOKEN_PERFIL}" if TOKEN_PERFIL else ""
+        filas = "".join(
+            f'<li>{n} <a href="/perfiles/{n}{sufijo}">.prof</a> <a href="/perfiles/{n[:-5]}.txt{sufijo}">.txt</a></li>'
+            for n in listar_perfiles()
+        )
+        return f"<h3>Perfiles de callbacks</h3><ul>{filas or '<li>(sin perfiles)</li>'}</ul>"
+
+    @server.route("/perfiles/<archivo>")
+    def descargar_perfil(archivo):
+        if not _autorizado() or not _ARCHIVO_VALIDO.match(archivo):
+            abort(403)
+        return send_from_directory(directorio_perfiles(), archivo, as_attachment=archivo.endswith(".prof"))
+
+    @server.after_request
+    def cabecera_perfil(respuesta):
+        perfiles = getattr(g, "ecas_perfiles", None)
+        if perfiles:
+            respuesta.headers[CABECERA_PERFIL] = ", ".join(perfiles)
+        return respuesta
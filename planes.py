@@ -0,0 +1,160 @@
+"""
+Captura de planes de ejecución de las sentencias lentas.
+
+Cuando el perfilador registra una sentencia que tardó más de ECAS_UMBRAL_PLAN segundos, se pide su plan
+a la base en un hilo aparte, con el mismo texto y los mismos valores de parámetros:
+    SQL Server  SET SHOWPLAN_XML ON (plan estimado, la sentencia no se vuelve a ejecutar) -> .sqlplan
+    DuckDB      EXPLAIN ANALYZE (el almacén embebido es local, se ejecuta de nuevo)      -> .txt
+Cada plan queda en ECAS_LOG_CONSULTAS_DIR/planes junto a un .json con la sentencia, los parámetros, la
+función que la envió y la duración observada; el log de consultas lentas indica el archivo. Se captura
+a lo más un plan por huella cada ECAS_PLAN_INTERVALO segundos y se conservan los ECAS_PLANES_MAX más recientes.
+Los .sqlplan se abren directamente en SSMS.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import threading
+import time
+
+CAPTURA_PLANES_ACTIVA = os.getenv("ECAS_CAPTURAR_PLANES", "1") == "1"
+UMBRAL_PLAN = float(os.getenv("ECAS_UMBRAL_PLAN", os.getenv("ECAS_UMBRAL_LENTA", "1.0")))
+PLAN_INTERVALO = float(os.getenv("ECAS_PLAN_INTERVALO", "3600"))
+PLANES_MAX = int(os.getenv("ECAS_PLANES_MAX", "500"))
+
+# Huella -> momento de la última captura
+_capturas = {}
+_lock = threading.Lock()
+_executor = None
+
+def directorio_planes():
+    from perfilador import LOG_CONSULTAS_DIR
+    return os.path.join(LOG_CONSULTAS_DIR, "planes")
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                # Un solo hilo: los planes nunca compiten con los dashboards por conexiones
+                _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ecas-planes")
+    return _executor
+
+def programar_captura(engine, base, huella, sql, parametros, segundos, funcion):
+    """
+    Agenda la captura del plan si la sentencia supera el umbral y la huella no tiene uno reciente.
+    Retorna la ruta (sin extensión) donde quedará el plan, o None si no se captura.
+    """
+    from perfilador import normalizar_sql
+
+    if not CAPTURA_PLANES_ACTIVA or segundos < UMBRAL_PLAN or engine is None:
+        return None
+    # Solo lecturas: EXPLAIN ANALYZE vuelve a ejecutar la sentencia (las reconstrucciones no se repiten)
+    if not normalizar_sql(sql).upper().startswith(("SELECT", "WITH")):
+        return None
+    ahora = time.time()
+    with _lock:
+        if ahora - _capturas.get(huella, 0.0) < PLAN_INTERVALO:
+            return None
+        _capturas[huella] = ahora
+    ruta = os.path.join(directorio_planes(), f"{time.strftime('%Y%m%d_%H%M%S')}_{huella}")
+    _get_executor().submit(_capturar, engine, base, huella, sql, parametros, segundos, funcion, ruta)
+    return ruta
+
+def _plan_sqlserver(dbapi_conn, sql, parametros):
+    cursor = dbapi_conn.cursor()
+    cursor.execute("SET SHOWPLAN_XML ON")
+    try:
+        if parametros:
+            cursor.execute(sql, parametros)
+        else:
+            cursor.execute(sql)
+        partes = []
+        # Un lote con varias sentencias entrega un plan por sentencia
+        while True:
+            partes.extend(fila[0] for fila in cursor.fetchall())
+            if not cursor.nextset():
+                break
+        return "\n".join(partes), ".sqlplan"
+    finally:
+        cursor.execute("SET SHOWPLAN_XML OFF")
+        cursor.close()
+
+def _plan_duckdb(dbapi_conn, sql, parametros):
+    cursor = dbapi_conn.cursor()
+    try:
+        cursor.execute(f"EXPLAIN ANALYZE {sql}", parametros or None)
+        filas = cursor.fetchall()
+        return "\n".join(str(fila[-1]) for fila in filas), ".txt"
+    finally:
+        cursor.close()
+
+def _capturar(engine, base, huella, sql, parametros, segundos, funcion, ruta):
+    from admision import admitir, prioridad
+    from perfilador import _parametros_json
+
+    inicio = time.perf_counter()
+    try:
+        # Cursor DBAPI directo: la sentencia del plan no pasa por los eventos (ni por el perfilador)
+        with prioridad("segundo_plano"), admitir(base), engine.connect() as conn:
+            dbapi_conn = conn.connection.dbapi_connection
+            try:
+                if engine.dialect.name == "mssql":
+                    plan, extension = _plan_sqlserver(dbapi_conn, sql, parametros)
+                else:
+                    plan, extension = _plan_duckdb(dbapi_conn, sql, parametros)
+            except Exception:
+                # La conexión pudo quedar con SHOWPLAN activo: no vuelve al pool
+                conn.invalidate()
+                raise
+    except Exception as e:
+        print(f"⚠️ No se pudo capturar el plan de {funcion} ({huella}): {e}")
+        return None
+
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    with open(ruta + extension, "w", encoding="utf-8") as archivo:
+        archivo.write(plan)
+    with open(ruta + ".json", "w", encoding="utf-8") as archivo:
+        json.dump({
+            "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "huella": huella,
+            "base": base,
+            "motor": engine.dialect.name,
+            "funcion": funcion,
+            "segundos": round(segundos, 4),
+            "segundos_plan": round(time.perf_counter() - inicio, 4),
+            "plan": os.path.basename(ruta + extension),
+            "sql": sql,
+            "parametros": _parametros_json(parametros),
+        }, archivo, ensure_ascii=False, indent=2, default=str)
+    _podar_planes()
+    return ruta + extension
+
+def _podar_planes():
+    directorio = directorio_planes()
+    try:
+        metadatos = sorted(
+            (entrada for entrada in os.scandir(directorio) if entrada.name.endswith(".json")),
+            key=lambda entrada: entrada.name,
+        )
+    except FileNotFoundError:
+        return
+    for entrada in metadatos[:max(0, len(metadatos) - PLANES_MAX)]:
+        base = entrada.path[:-len(".json")]
+        for extension in (".json", ".sqlplan", ".txt"):
+            try:
+                os.remove(base + extension)
+            except FileNotFoundError:
+                pass
+
+def planes_guardados(huella=None):
+    """Metadatos de los planes guardados (de una huella, o todos), del más reciente al más antiguo."""
+    directorio = directorio_planes()
+    if not os.path.isdir(directorio):
+        return []
+    resultado = []
+    for nombre in sorted(os.listdir(directorio), reverse=True):
+        if not nombre.endswith(".json") or (huella and not nombre.endswith(f"_{huella}.json")):
+            continue
+        with open(os.path.join(directorio, nombre), encoding="utf-8") as archivo:
+            resultado.append(json.load(archivo))
+    return resultado
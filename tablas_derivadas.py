@@ -58,9 +58,11 @@ def actualizar_tabla_matriculas():
 
     try:
         with db_engine.connect() as conn:
-            conn.execute(text(query_insert))
+            reconstruir_tabla(conn, 'tabla_matriculas_competencia_unificada', query_insert)
             conn.commit()
             print("Tabla actualizada con las matriculas de ECAS y competidores.")
+            publicar_tabla_derivada('tabla_matriculas_competencia_unificada')
+            publicar_tabla_derivada('matriculas_mrun')
     except Exception as e:
         print(f"Error al actualizar la tabla: {e}")
 
@@ -123,9 +125,10 @@ def actualizar_tabla_titulados():
 
     try:
         with db_engine.connect() as conn:
-            conn.execute(query_insert)
+            reconstruir_tabla(conn, 'tabla_dashboard_titulados', query_insert)
             conn.commit()
             print("Tabla actualizada con los titulados de ECAS y competencia.")
+            publicar_tabla_derivada('tabla_dashboard_titulados')
     except Exception as e:
         print(f"Error al actualizar la tabla: {e}")
 
@@ -151,9 +154,10 @@ def actualizar_tabla_egresados():
 
     try:
         with db_engine.connect() as conn:
-            conn.execute(query_insert)
+            reconstruir_tabla(conn, 'tabla_alumnos_egresados_unificada', query_insert)
             conn.commit()
             print("Tabla actualizada con éxito. Se han importado todos los registros históricos por MRUN.")
+            publicar_tabla_derivada('tabla_alumnos_egresados_unificada')
     except Exception as e:
         print(f"Error al actualizar la tabla: {e}")
 
@@ -210,10 +214,11 @@ def actualizar_tabla_abandono_total_ecas():
 
     try:
         with db_engine.connect() as conn:
-            conn.execute(query_insert_abandono)
+            reconstruir_tabla(conn, 'tabla_abandono_total_ecas', query_insert_abandono)
             conn.commit()
             result = conn.execute(text("SELECT COUNT(*) FROM tabla_abandono_total_ecas")).scalar()
             print(f"Tabla de abandono total actualizada. Desertores confirmados (sin rastro post-salida): {result}")
+            publicar_tabla_derivada('tabla_abandono_total_ecas')
     except Exception as e:
         print(f"Error al actualizar la tabla de abandono: {e}")
 
@@ -267,12 +272,13 @@ def actualizar_tabla_desertores_ecas():
 
     try:
         with db_engine.connect() as conn:
-            conn.execute(query_insert_fuga)
+            reconstruir_tabla(conn, 'tabla_fuga_detallada_ecas', query_insert_fuga)
             conn.commit()
             
             # Verificación inmediata de conteo
             result = conn.execute(text("SELECT COUNT(*) FROM tabla_fuga_detallada_ecas")).scalar()
             print(f"Tabla 'tabla_fuga_detallada_ecas' actualizada. Registros totales: {result}")
+            publicar_tabla_derivada('tabla_fuga_detallada_ecas')
             
     except Exception as e:
         print(f"Error al actualizar la tabla de fuga: {e}")
@@ -305,9 +311,10 @@ def actualizar_tabla_titulados_desertores():
 
     try:
         with db_engine.connect() as conn:
-            conn.execute(query_insert)
+            reconstruir_tabla(conn, 'tabla_titulados_externos_desertores', query_insert)
             conn.commit()
             print("Tabla actualizada con los registros de titulación de desertores")
+            publicar_tabla_derivada('tabla_titulados_externos_desertores')
     except Exception as e:
         print(f"Error al actualizar la tabla: {e}")
 
@@ -339,9 +346,10 @@ def actualizar_tabla_origenes_totales():
 
     try:
         with db_engine.connect() as conn:
-            conn.execute(query_insert)
+            reconstruir_tabla(conn, 'tabla_origenes_estudiantes_ecas', query_insert)
             conn.commit()
             print("Tabla actualizada con los origenes de estudiantes de otras instituciones que se movieron a ecas.")
+            publicar_tabla_derivada('tabla_origenes_estudiantes_ecas')
     except Exception as e:
         print(f"Error al actualizar la tabla: {e}")
 
@@ -379,14 +387,11 @@ def actualizar_tabla_trayectoria_titulados():
 
     try:
         with db_engine.begin() as conn:
-            # Ejecutar creación de tabla
-            conn.execute(query_tabla)
-            print("Tabla 'tabla_trayectoria_post_titulado' creada exitosamente.")
-            
-            # Ejecutar índices
-            conn.execute(query_idx1)
-            conn.execute(query_idx2)
-            print("Índices creados exitosamente.")
+            # Creación de tabla e índices (se publican juntos)
+            reconstruir_tabla(conn, 'tabla_trayectoria_post_titulado', query_tabla, query_idx1, query_idx2)
+            print("Tabla 'tabla_trayectoria_post_titulado' e índices creados exitosamente.")
+
+        publicar_tabla_derivada('tabla_trayectoria_post_titulado')
             
     except Exception as e:
         print(f"Error al actualizar la tabla: {e}")
@@ -398,4 +403,5 @@ def actualizar_tabla_trayectoria_titulados():
 # actualizar_tabla_origenes_totales()
 # actualizar_tabla_desertores_ecas()
 # actualizar_tabla_abandono_total_ecas()
+# exportar_tablas_embebidas()
 actualizar_tabla_titulados_desertores()
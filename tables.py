@@ -163,6 +163,9 @@ def cargar_matriculas_con_mapeo():
                 dtype=DTYPE_MAP
             )
             print(f"--- Éxito: {archivo} cargado ({len(df)} filas) ---")
+
+            primera_carga = False
+
         except Exception as e:
             print(f"!!! Error al insertar {archivo}: {e}")
 
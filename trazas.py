@@ -0,0 +1,240 @@
+"""
+Trazas de latencia por callback de Dash.
+
+Cada ejecución de un callback registrado se mide de punta a punta y se reparte en tramos:
+    consultas      tiempo dentro de las funciones de queries_* (incluye aciertos de caché)
+    sql            tiempo de las sentencias en la base (perfilador); con ejecutar_en_paralelo es la suma de los hilos
+    pandas         consultas - sql: el post-procesamiento en pandas de las funciones de queries_*
+    figuras        resto del callback: construcción de figuras y componentes
+    serializacion  validación y paso a JSON de la respuesta que hace Dash
+Los tiempos quedan en histogramas por callback y tramo, y por función de queries_*; index.py los expone
+en /metrics con el formato de texto de Prometheus.
+
+Se activa con instrumentar_callbacks(app) después de importar las páginas (ECAS_TRAZAS=0 lo desactiva).
+"""
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from perfiles import perfilar
+from memoria import iniciar as iniciar_memoria, medir_memoria
+import os
+import threading
+import time
+
+TRAZAS_ACTIVAS = os.getenv("ECAS_TRAZAS", "1") == "1"
+# Límites de las cubetas de los histogramas, en segundos
+CUBETAS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TRAMOS = ("total", "consultas", "sql", "pandas", "figuras", "serializacion")
+# Duraciones totales guardadas por callback para el reporte de percentiles
+MUESTRAS_POR_CALLBACK = 500
+
+_traza_actual = ContextVar("ecas_traza", default=None)
+_tramo_actual = ContextVar("ecas_tramo", default=None)
+
+# (métrica, etiquetas) -> {"cubetas": [...], "suma": s, "cuenta": n}
+_histogramas = {}
+# (callback, estado) -> ejecuciones; callback -> bytes de respuesta
+_ejecuciones = {}
+_bytes_respuesta = {}
+_totales = {}
+_lock = threading.Lock()
+_dash_parcheado = False
+
+def _observar(metrica, etiquetas, segundos):
+    clave = (metrica, etiquetas)
+    with _lock:
+        h = _histogramas.get(clave)
+        if h is None:
+            h = _histogramas[clave] = {"cubetas": [0] * len(CUBETAS), "suma": 0.0, "cuenta": 0}
+        for i, limite in enumerate(CUBETAS):
+            if segundos <= limite:
+                h["cubetas"][i] += 1
+                break
+        h["suma"] += segundos
+        h["cuenta"] += 1
+
+def sumar_tramo(tramo, segundos):
+    """Suma `segundos` al tramo de la traza en curso (si hay un callback midiéndose)."""
+    traza = _traza_actual.get()
+    if traza is not None:
+        with traza["lock"]:
+            traza["tramos"][tramo] = traza["tramos"].get(tramo, 0.0) + segundos
+
+@contextmanager
+def medir(tramo):
+    """Mide el bloque como `tramo` de la traza en curso; un bloque anidado del mismo tramo no se cuenta dos veces."""
+    if _traza_actual.get() is None or _tramo_actual.get() == tramo:
+        yield
+        return
+    token = _tramo_actual.set(tramo)
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        _tramo_actual.reset(token)
+        sumar_tramo(tramo, time.perf_counter() - inicio)
+
+@contextmanager
+def medir_consulta(nombre):
+    """Tiempo de una función de queries_*: histograma propio y tramo "consultas" del callback que la llamó."""
+    if not TRAZAS_ACTIVAS:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        with medir("consultas"):
+            yield
+    finally:
+        _observar("ecas_consulta_segundos", (("funcion", nombre),), time.perf_counter() - inicio)
+
+# --- Callbacks ---
+
+def _invocar_callback(func, *args, **kwargs):
+    # Reemplaza a dash._callback._invoke_callback: separa la función del callback de la serialización de Dash
+    with medir("callback"):
+        return func(*args, **kwargs)
+
+def _cerrar_traza(nombre, traza, total, estado, respuesta):
+    tramos = traza["tramos"]
+    callback = tramos.get("callback", total)
+    consultas = tramos.get("consultas", 0.0)
+    sql = tramos.get("sql", 0.0)
+    valores = {
+        "total": total,
+        "consultas": consultas,
+        "sql": sql,
+        "pandas": max(0.0, consultas - sql),
+        "figuras": max(0.0, callback - consultas),
+        "serializacion": max(0.0, total - callback),
+    }
+    for tramo in TRAMOS:
+        _observar("ecas_callback_segundos", (("callback", nombre), ("tramo", tramo)), valores[tramo])
+    with _lock:
+        _ejecuciones[(nombre, estado)] = _ejecuciones.get((nombre, estado), 0) + 1
+        if isinstance(respuesta, (str, bytes)):
+            _bytes_respuesta[nombre] = _bytes_respuesta.get(nombre, 0) + len(respuesta)
+        _totales.setdefault(nombre, deque(maxlen=MUESTRAS_POR_CALLBACK)).append(total)
+
+def _envolver(nombre, funcion):
+    from dash.exceptions import PreventUpdate
+
+    @wraps(funcion)
+    def envoltura(*args, **kwargs):
+        traza = {"lock": threading.Lock(), "tramos": {}}
+        token = _traza_actual.set(traza)
+        inicio = time.perf_counter()
+        estado, respuesta = "ok", None
+        try:
+            # Perfil de CPU a pedido (perfiles.py) y de memoria con ECAS_MEMORIA=1 (memoria.py)
+            with perfilar(nombre), medir_memoria(nombre):
+                respuesta = funcion(*args, **kwargs)
+            return respuesta
+        except PreventUpdate:
+            estado = "sin_cambios"
+            raise
+        except Exception:
+            estado = "error"
+            raise
+        finally:
+            _traza_actual.reset(token)
+            _cerrar_traza(nombre, traza, time.perf_counter() - inicio, estado, respuesta)
+
+    envoltura.traza_ecas = nombre
+    return envoltura
+
+def instrumentar_callbacks(app):
+    """
+    Envuelve con trazas todos los callbacks registrados hasta ahora (@callback de las páginas y @app.callback).
+    Se puede llamar de nuevo tras registrar más callbacks: los ya envueltos no se tocan.
+    """
+    global _dash_parcheado
+    if not TRAZAS_ACTIVAS:
+        return 0
+    from dash import _callback
+
+    if not _dash_parcheado:
+        _callback._invoke_callback = _invocar_callback
+        _dash_parcheado = True
+    iniciar_memoria()
+
+    envueltos = 0
+    for registro in list(_callback.GLOBAL_CALLBACK_MAP.values()) + list(app.callback_map.values()):
+        funcion = registro.get("callback")
+        if funcion is None or getattr(funcion, "traza_ecas", None):
+            continue
+        nombre = f"{funcion.__module__.rsplit('.', 1)[-1]}.{funcion.__name__}"
+        registro["callback"] = _envolver(nombre, funcion)
+        envueltos += 1
+    return envueltos
+
+# --- Exportación ---
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _etiquetas_texto(etiquetas, extra=()):
+    texto = ",".join(f'{clave}="{_escapar(valor)}"' for clave, valor in list(etiquetas) + list(extra))
+    return "{" + texto + "}" if texto else ""
+
+def texto_metricas():
+    """Histogramas y contadores en el formato de texto de Prometheus (ruta /metrics)."""
+    with _lock:
+        histogramas = {clave: dict(h, cubetas=list(h["cubetas"])) for clave, h in _histogramas.items()}
+        ejecuciones = dict(_ejecuciones)
+        bytes_respuesta = dict(_bytes_respuesta)
+
+    ayudas = {
+        "ecas_callback_segundos": "Duración de los callbacks de Dash por tramo (total, consultas, sql, pandas, figuras, serializacion)",
+        "ecas_consulta_segundos": "Duración de las funciones de queries_* (incluye aciertos de caché)",
+    }
+    lineas = []
+    for metrica, ayuda in ayudas.items():
+        lineas.append(f"# HELP {metrica} {ayuda}")
+        lineas.append(f"# TYPE {metrica} histogram")
+        for (nombre, etiquetas), h in sorted(histogramas.items()):
+            if nombre != metrica:
+                continue
+            acumulado = 0
+            for limite, cuenta in zip(CUBETAS, h["cubetas"]):
+                acumulado += cuenta
+                lineas.append(f"{metrica}_bucket{_etiquetas_texto(etiquetas, [('le', limite)])} {acumulado}")
+            lineas.append(f"{metrica}_bucket{_etiquetas_texto(etiquetas, [('le', '+Inf')])} {h['cuenta']}")
+            lineas.append(f"{metrica}_sum{_etiquetas_texto(etiquetas)} {h['suma']:.6f}")
+            lineas.append(f"{metrica}_count{_etiquetas_texto(etiquetas)} {h['cuenta']}")
+
+    lineas.append("# HELP ecas_callback_ejecuciones_total Ejecuciones de cada callback por estado (ok, sin_cambios, error)")
+    lineas.append("# TYPE ecas_callback_ejecuciones_total counter")
+    for (nombre, estado), cuenta in sorted(ejecuciones.items()):
+        lineas.append(f"ecas_callback_ejecuciones_total{_etiquetas_texto([('callback', nombre), ('estado', estado)])} {cuenta}")
+    lineas.append("# HELP ecas_callback_respuesta_bytes_total Bytes de JSON devueltos por cada callback")
+    lineas.append("# TYPE ecas_callback_respuesta_bytes_total counter")
+    for nombre, total in sorted(bytes_respuesta.items()):
+        lineas.append(f"ecas_callback_respuesta_bytes_total{_etiquetas_texto([('callback', nombre)])} {total}")
+    return "\n".join(lineas) + "\n"
+
+def _percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+def reporte_trazas():
+    """Imprime, por callback, p50/p95 del total y el promedio de cada tramo, del más lento al más rápido."""
+    with _lock:
+        totales = {nombre: list(valores) for nombre, valores in _totales.items()}
+        histogramas = dict(_histogramas)
+    print("--- Callbacks: total p50/p95 y promedio por tramo (s) ---")
+    filas = []
+    for nombre, valores in sorted(totales.items(), key=lambda item: _percentil(item[1], 95), reverse=True):
+        promedios = {}
+        for tramo in TRAMOS:
+            h = histogramas.get(("ecas_callback_segundos", (("callback", nombre), ("tramo", tramo))))
+            promedios[tramo] = h["suma"] / h["cuenta"] if h and h["cuenta"] else 0.0
+        p50, p95 = _percentil(valores, 50), _percentil(valores, 95)
+        print(
+            f"{nombre:<55} {len(valores):>5} ejec p50 {p50:.3f} p95 {p95:.3f} | "
+            + " ".join(f"{tramo} {promedios[tramo]:.3f}" for tramo in TRAMOS[1:])
+        )
+        filas.append((nombre, p50, p95, promedios))
+    return filas
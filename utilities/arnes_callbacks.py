@@ -0,0 +1,366 @@
+"""
+Latencia de los callbacks de Dash sin navegador: solicitudes a /_dash-update-component contra la app de index.py.
+
+Cada solicitud pasa por el mismo camino que en producción (despacho de Dash, consultas, construcción de
+figuras y serialización a JSON), usando el cliente de pruebas de Flask. Los payloads salen de:
+    - una grabación (--grabacion, ver grabacion.py / ECAS_GRABAR_CALLBACKS): se reproducen tal cual
+    - el layout de cada página (por defecto): la carga de la página (display_page), los callbacks iniciales
+      en orden de dependencia (las respuestas alimentan los Store y gráficos que otros callbacks leen) y
+      una interacción por cada valor alternativo de cada Input: opciones de RadioItems/Dropdown, extremos de
+      sliders, pestañas, clics de botones y clics en mapas (INTERACCIONES_EXTRA)
+Se reporta por callback p50/p95 de la latencia y el tamaño de la respuesta; al final, el reparto por tramo
+de trazas.py (consultas, sql, pandas, figuras, serializacion). La caché de consultas se apaga por defecto.
+
+Uso (desde la raíz del proyecto):
+    python -m utilities.arnes_callbacks                                 # todas las páginas
+    python -m utilities.arnes_callbacks desertores transicion --repeticiones 10
+    python -m utilities.arnes_callbacks --grabacion sesiones.jsonl --salida latencias.json
+    python -m utilities.arnes_callbacks titulados --exportar payloads_titulados.jsonl
+--exportar guarda los payloads generados con el formato de una grabación, para editarlos y reproducirlos.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Página -> (ruta, módulo con el layout y los callbacks)
+PAGINAS = {
+    "desertores": ("/desertores", "dashboard_desertores.pages.dashboard_desertores"),
+    "titulados": ("/titulados", "dashboard_titulados.pages.dashboard_titulados"),
+    "acreditacion": ("/acreditacion", "dashboard_acreditacion.pages.dashboard_acreditacion"),
+    "transicion": ("/transicion", "dashboard_transicion.pages.dashboard_transicion"),
+    "analisis_general": ("/analisis_general", "dashboard_analisis_docencia.pages.dashboard_ramos"),
+    "cohortes": ("/cohortes", "dashboard_analisis_docencia.pages.dashboard_analisis_cohorte"),
+}
+RUTA_CALLBACKS = "/_dash-update-component"
+
+# Valores de entradas que no se deducen del layout: "id.propiedad" -> valores a probar
+INTERACCIONES_EXTRA = {
+    # Clic en la Región Metropolitana y en Valparaíso (que usa el GeoJSON de comunas v2)
+    "mapa-interactivo.clickData": [{"points": [{"location": "13"}]}, {"points": [{"location": "5"}]}],
+    "selected-region-store.data": ["13"],
+}
+# Valores alternativos por entrada (las opciones de un selector largo se recortan)
+MAX_VARIANTES = 4
+
+# --- Layout y callbacks ---
+
+def _componentes(layout):
+    """{id: componente} de los componentes con id de texto del layout."""
+    layout = layout() if callable(layout) else layout
+    componentes = {}
+    for componente in [layout, *layout._traverse()]:
+        identificador = getattr(componente, "id", None)
+        if isinstance(identificador, str):
+            componentes[identificador] = componente
+    return componentes
+
+def _valores_iniciales(componentes):
+    valores = {}
+    for identificador, componente in componentes.items():
+        for propiedad in componente._prop_names:
+            valor = getattr(componente, propiedad, None)
+            if valor is not None and propiedad != "children":
+                valores[f"{identificador}.{propiedad}"] = valor
+    return valores
+
+def _valor_opcion(opcion):
+    return opcion.get("value") if isinstance(opcion, dict) else opcion
+
+def variantes(componente, propiedad, actual):
+    """Valores alternativos de una entrada según el tipo de componente."""
+    clave = f"{getattr(componente, 'id', None)}.{propiedad}"
+    if clave in INTERACCIONES_EXTRA:
+        return INTERACCIONES_EXTRA[clave]
+    if componente is None:
+        return []
+    tipo = type(componente).__name__
+    candidatos = []
+    if propiedad == "n_clicks":
+        candidatos = [(actual or 0) + 1]
+    elif propiedad == "value" and getattr(componente, "options", None):
+        opciones = [_valor_opcion(o) for o in componente.options]
+        if getattr(componente, "multi", False):
+            candidatos = [opciones[:1], opciones[:5]]
+        else:
+            candidatos = opciones
+    elif propiedad == "value" and tipo == "RangeSlider":
+        minimo, maximo = componente.min, componente.max
+        inicio = actual[0] if actual else minimo
+        # Un año (arrastrar ambos extremos juntos), medio rango y el rango completo
+        candidatos = [[inicio, inicio], [minimo, (minimo + maximo) // 2], [minimo, maximo]]
+    elif propiedad == "value" and tipo == "Slider":
+        candidatos = [componente.min, componente.max]
+    elif propiedad in ("active_tab", "value") and isinstance(getattr(componente, "children", None), list):
+        candidatos = [getattr(t, "tab_id", None) or getattr(t, "value", None) for t in componente.children]
+    distintos = []
+    for candidato in candidatos:
+        if candidato is not None and candidato != actual and candidato not in distintos:
+            distintos.append(candidato)
+    return distintos[:MAX_VARIANTES]
+
+def nombre_callback(registro):
+    funcion = registro.get("callback")
+    nombre = getattr(funcion, "traza_ecas", None)
+    if nombre:
+        return nombre
+    return f"{funcion.__module__.rsplit('.', 1)[-1]}.{funcion.__name__}"
+
+def _salidas(clave):
+    from dash._utils import split_callback_id
+
+    salidas = split_callback_id(clave)
+    return salidas if isinstance(salidas, list) else [salidas]
+
+def _id_propiedad(item):
+    # Las salidas con allow_duplicate llevan "@hash" en la propiedad
+    return f"{item['id']}.{item['property'].split('@')[0]}"
+
+def callbacks_de_modulo(app, modulo):
+    """[(clave, registro)] de los callbacks definidos en el módulo, en orden de dependencia."""
+    prevenidos = {c["output"]: c.get("prevent_initial_call", False) for c in app._callback_list}
+    propios = [
+        (clave, dict(registro, prevent_initial_call=prevenidos.get(clave, False)))
+        for clave, registro in app.callback_map.items()
+        if getattr(registro.get("callback"), "__module__", None) == modulo
+    ]
+    producidas = {_id_propiedad(s): clave for clave, _ in propios for s in _salidas(clave)}
+    ordenados, pendientes = [], list(propios)
+    while pendientes:
+        hechos = {clave for clave, _ in ordenados}
+        listos = [
+            (clave, registro) for clave, registro in pendientes
+            if all(producidas.get(_id_propiedad(e)) in (None, clave) or producidas[_id_propiedad(e)] in hechos for e in registro["inputs"])
+        ]
+        # Un ciclo de dependencias se rompe en el orden de registro
+        listos = listos or pendientes[:1]
+        ordenados += listos
+        pendientes = [p for p in pendientes if p not in listos]
+    return ordenados
+
+def armar_payload(clave, registro, valores, cambiados=()):
+    """Cuerpo de la solicitud que envía el navegador para el callback `clave` con los valores actuales."""
+    salidas = _salidas(clave)
+    return {
+        "output": clave,
+        "outputs": salidas if clave.startswith("..") else salidas[0],
+        "inputs": [dict(e, value=valores.get(_id_propiedad(e))) for e in registro["inputs"]],
+        "state": [dict(e, value=valores.get(_id_propiedad(e))) for e in registro["state"]],
+        "changedPropIds": list(cambiados),
+    }
+
+# --- Envío ---
+
+def enviar(cliente, payload):
+    """(segundos, estado, bytes, cuerpo JSON o None): estado "ok", "sin_cambios" (204) o "error"."""
+    inicio = time.perf_counter()
+    try:
+        respuesta = cliente.post(RUTA_CALLBACKS, json=payload)
+        segundos = time.perf_counter() - inicio
+    except Exception as e:
+        return time.perf_counter() - inicio, f"error: {type(e).__name__}: {e}", 0, None
+    if respuesta.status_code == 204:
+        return segundos, "sin_cambios", 0, None
+    if respuesta.status_code != 200:
+        return segundos, f"error: HTTP {respuesta.status_code}", len(respuesta.data), None
+    return segundos, "ok", len(respuesta.data), respuesta.get_json(silent=True)
+
+def aplicar_respuesta(valores, cuerpo):
+    """Copia las propiedades devueltas por un callback a los valores actuales de la página."""
+    for identificador, propiedades in ((cuerpo or {}).get("response") or {}).items():
+        for propiedad, valor in propiedades.items():
+            valores[f"{identificador}.{propiedad}"] = valor
+
+def payloads_de_pagina(app, cliente, pagina):
+    """[(callback, etiqueta, payload, ruta)] de la carga de la página y sus interacciones, armados desde el layout."""
+    from paginas import cargar_pagina, paginas_cargadas
+
+    ruta, modulo = PAGINAS[pagina]
+    componentes = _componentes(cargar_pagina(app, ruta).layout)
+    valores = _valores_iniciales(componentes)
+    casos = []
+
+    # El navegador ya conoce la página (no se pide recarga), como tras un GET directo a la ruta
+    carga = next((c, r) for c, r in app.callback_map.items() if c == "page-content.children")
+    navegacion = {"url.pathname": ruta, "paginas-navegador.data": paginas_cargadas()}
+    casos.append((nombre_callback(carga[1]), f"carga {ruta}", armar_payload(*carga, navegacion, ["url.pathname"]), ruta))
+
+    # Callbacks iniciales en orden: sus respuestas son la entrada de los siguientes
+    callbacks = callbacks_de_modulo(app, modulo)
+    for clave, registro in callbacks:
+        if registro["prevent_initial_call"]:
+            continue
+        payload = armar_payload(clave, registro, valores)
+        casos.append((nombre_callback(registro), "inicial", payload, ruta))
+        _, _, _, cuerpo = enviar(cliente, payload)
+        aplicar_respuesta(valores, cuerpo)
+
+    # Una interacción por valor alternativo de cada entrada, desde el estado inicial de la página
+    for clave, registro in callbacks:
+        for entrada in registro["inputs"]:
+            id_propiedad = _id_propiedad(entrada)
+            componente = componentes.get(entrada["id"])
+            for valor in variantes(componente, entrada["property"], valores.get(id_propiedad)):
+                modificados = dict(valores, **{id_propiedad: valor})
+                etiqueta = f"{id_propiedad}={json.dumps(valor, ensure_ascii=False)[:60]}"
+                casos.append((nombre_callback(registro), etiqueta, armar_payload(clave, registro, modificados, [id_propiedad]), ruta))
+    return casos
+
+def payloads_grabados(app, archivo, paginas=None):
+    """[(callback, etiqueta, payload, ruta)] de una grabación, opcionalmente solo de algunas páginas."""
+    from grabacion import leer_grabacion
+    from paginas import intentar_cargar
+
+    rutas = {PAGINAS[p][0] for p in paginas} if paginas else None
+    lineas = leer_grabacion(archivo)
+    # Las páginas se cargan en su primera visita: se cargan las que aparecen en la grabación
+    for ruta in sorted({linea.get("pagina") for linea in lineas} & {r for r, _ in PAGINAS.values()}):
+        intentar_cargar(app, ruta)
+    casos = []
+    for linea in lineas:
+        payload = linea["payload"]
+        registro = app.callback_map.get(payload.get("output"))
+        if registro is None:
+            print(f"⚠️ Callback no registrado en la grabación: {payload.get('output')}")
+            continue
+        if rutas and linea.get("pagina") not in rutas:
+            continue
+        entradas = {_id_propiedad(e): e.get("value") for e in payload.get("inputs", []) if isinstance(e, dict)}
+        etiqueta = ",".join(
+            f"{cambiado}={json.dumps(entradas.get(cambiado), ensure_ascii=False)[:60]}" for cambiado in payload.get("changedPropIds") or []
+        ) or "inicial"
+        casos.append((nombre_callback(registro), etiqueta, payload, linea.get("pagina")))
+    return casos
+
+# --- Medición ---
+
+def _percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+def medir(cliente, casos, repeticiones=5, calentamiento=1):
+    """Envía cada payload `calentamiento` veces sin medir y `repeticiones` veces midiendo; retorna {callback: resumen}."""
+    por_callback = {}
+    for nombre, etiqueta, payload, ruta in casos:
+        etiqueta = f"{ruta} {etiqueta}" if ruta else etiqueta
+        for _ in range(calentamiento):
+            enviar(cliente, payload)
+        duraciones, tamanos, estados = [], [], []
+        for _ in range(repeticiones):
+            segundos, estado, tamano, _ = enviar(cliente, payload)
+            duraciones.append(segundos)
+            tamanos.append(tamano)
+            estados.append(estado)
+        errores = [e for e in estados if e.startswith("error")]
+        print(
+            f"{nombre:<50} {etiqueta[:55]:<55} p50 {_percentil(duraciones, 50):>7.3f} s "
+            f"{max(tamanos) / 1024:>8.1f} KB {errores[0] if errores else estados[-1]}"
+        )
+        c = por_callback.setdefault(nombre, {"duraciones": [], "bytes": [], "errores": 0, "sin_cambios": 0, "casos": []})
+        c["duraciones"] += duraciones
+        c["bytes"] += tamanos
+        c["errores"] += len(errores)
+        c["sin_cambios"] += estados.count("sin_cambios")
+        c["casos"].append({
+            "etiqueta": etiqueta,
+            "p50": round(_percentil(duraciones, 50), 5),
+            "p95": round(_percentil(duraciones, 95), 5),
+            "bytes": max(tamanos),
+            "estado": errores[0] if errores else estados[-1],
+        })
+
+    resumen = {}
+    for nombre, c in por_callback.items():
+        resumen[nombre] = {
+            "solicitudes": len(c["duraciones"]),
+            "p50": round(_percentil(c["duraciones"], 50), 5),
+            "p95": round(_percentil(c["duraciones"], 95), 5),
+            "bytes_p50": _percentil(c["bytes"], 50),
+            "bytes_max": max(c["bytes"]),
+            "errores": c["errores"],
+            "sin_cambios": c["sin_cambios"],
+            "casos": c["casos"],
+        }
+    return resumen
+
+def reporte(resumen):
+    print("--- Callbacks por p95 (s) y tamaño de respuesta ---")
+    for nombre, r in sorted(resumen.items(), key=lambda item: item[1]["p95"], reverse=True):
+        print(
+            f"{nombre:<55} {r['solicitudes']:>5} sol p50 {r['p50']:>7.3f} p95 {r['p95']:>7.3f} | "
+            f"respuesta p50 {r['bytes_p50'] / 1024:>8.1f} KB máx {r['bytes_max'] / 1024:>8.1f} KB | "
+            f"errores {r['errores']} sin cambios {r['sin_cambios']}"
+        )
+
+def preparar_app():
+    """App de index.py ya inicializada; las páginas se cargan al armar sus payloads (paginas.cargar_pagina)."""
+    from index import app
+
+    cliente = app.server.test_client()
+    # La primera solicitud ejecuta el _setup_server de Dash, que junta los @callback registrados hasta ahora
+    cliente.get("/")
+    return app, cliente
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latencia de los callbacks de Dash con payloads grabados o armados desde el layout.")
+    parser.add_argument("paginas", nargs="*", help=f"páginas a medir ({', '.join(PAGINAS)}); por defecto todas")
+    parser.add_argument("--grabacion", help="archivo .jsonl grabado con ECAS_GRABAR_CALLBACKS")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--calentamiento", type=int, default=1, help="envíos sin medir antes de cada payload")
+    parser.add_argument("--con-cache", action="store_true", help="mantener la caché de consultas (por defecto se apaga)")
+    parser.add_argument("--exportar", help="guarda los payloads en formato de grabación y termina")
+    parser.add_argument("--salida", help="archivo JSON con el resumen por callback y por payload")
+    argumentos = parser.parse_args()
+
+    desconocidas = [p for p in argumentos.paginas if p not in PAGINAS]
+    if desconocidas:
+        sys.exit(f"Páginas desconocidas: {', '.join(desconocidas)} (disponibles: {', '.join(PAGINAS)})")
+    if not argumentos.con_cache:
+        os.environ["ECAS_CACHE"] = "0"
+
+    app, cliente = preparar_app()
+    if argumentos.grabacion:
+        casos = payloads_grabados(app, argumentos.grabacion, argumentos.paginas)
+    else:
+        casos = []
+        for pagina in argumentos.paginas or list(PAGINAS):
+            try:
+                casos += payloads_de_pagina(app, cliente, pagina)
+            except Exception as e:
+                print(f"⚠️ No se pudieron armar los payloads de /{pagina}: {e}")
+
+    if argumentos.exportar:
+        from grabacion import grabar
+
+        if os.path.exists(argumentos.exportar):
+            os.remove(argumentos.exportar)
+        # La carga de cada página sale en una ráfaga y cada interacción un segundo después de la anterior
+        t = time.time()
+        for _, etiqueta, payload, ruta in casos:
+            if etiqueta != "inicial":
+                t += 1.0
+            grabar({"t": round(t, 3), "sesion": None, "pagina": ruta, "payload": payload}, argumentos.exportar)
+        print(f"{len(casos)} payloads exportados a {argumentos.exportar}")
+        sys.exit(0)
+
+    print(f"--- {len(casos)} payloads, {argumentos.repeticiones} repeticiones ---")
+    resumen = medir(cliente, casos, argumentos.repeticiones, argumentos.calentamiento)
+    reporte(resumen)
+
+    from trazas import TRAZAS_ACTIVAS, reporte_trazas
+    if TRAZAS_ACTIVAS:
+        # Incluye los envíos de calentamiento y los de armado de payloads
+        reporte_trazas()
+
+    if argumentos.salida:
+        with open(argumentos.salida, "w", encoding="utf-8") as archivo:
+            json.dump({
+                "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "repeticiones": argumentos.repeticiones,
+                "cache": argumentos.con_cache,
+                "callbacks": resumen,
+            }, archivo, ensure_ascii=False, indent=2)
+        print(f"Resumen guardado en {argumentos.salida}")
@@ -0,0 +1,389 @@
+"""
+Benchmark de las funciones de queries_* con una matriz de filtros realistas.
+
+Cada función pública de los seis módulos de consultas se ejecuta con las combinaciones de:
+    cohortes   un año (2018) y el rango completo (2007-2025)
+    jornada    Todas, Diurna, Vespertina
+    genero     Todos, Hombre, Mujer
+    regiones   ninguna, una y cinco (solo las funciones que filtran por región; region_id admite una)
+Los argumentos se arman según los nombres de parámetro de cada función; las dimensiones que una función no
+recibe se colapsan (las páginas de docencia usan los códigos de umasnet: D/V y M/F). Por defecto la caché de
+consultas se apaga (ECAS_CACHE=0) para medir la base y el post-procesamiento, con una ejecución de
+calentamiento sin medir antes de las repeticiones.
+
+El resultado (p50, p95, mín y máx por caso, filas devueltas, sentencias y segundos de SQL según el
+perfilador) se guarda en JSON y sirve como línea base: con --comparar se marcan los casos cuyo p50 creció
+más que --tolerancia (y más que --minimo segundos) y los que cambiaron la cantidad de filas; el proceso
+termina con código 1 si hay regresiones.
+
+Uso (desde la raíz del proyecto):
+    python -m utilities.benchmark --salida linea_base.json
+    python -m utilities.benchmark --backend duckdb --embebido /datos/1x --escala 1x --comparar linea_base.json
+    python -m utilities.benchmark --funciones desertores get_kpis --repeticiones 10
+    python -m utilities.benchmark --curvas 1x=/datos/1x 10x=/datos/10x 100x=/datos/100x --html curvas.html
+
+--curvas ejecuta el benchmark con el backend duckdb sobre cada almacén embebido (un proceso por escala) y
+muestra cómo crece el p50 de cada función; el exponente es la pendiente log-log entre la menor y la mayor
+escala (1 = lineal). Los almacenes de cada escala se arman con utilities.datos_sinteticos (--filas 1M, 10M,
+100M), cargando los CSV en una base de desarrollo y ejecutando tablas_derivadas.py con
+ECAS_EXPORTAR_EMBEBIDO=1 y ECAS_EMBEBIDO_DIR apuntando al directorio de esa escala.
+"""
+import argparse
+import importlib
+import inspect
+import itertools
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ_PROYECTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULOS_CONSULTAS = [
+    "dashboard_desertores.metrics.queries_desertores",
+    "dashboard_titulados.metrics.queries_titulados",
+    "dashboard_transicion.metrics.queries_transicion",
+    "dashboard_acreditacion.metrics.queries_acreditacion",
+    "dashboard_analisis_docencia.metrics.queries_analisis_cohorte",
+    "dashboard_analisis_docencia.metrics.queries_ramos",
+]
+# Módulos que consultan umasnet: jornada y género van con sus códigos
+MODULOS_UMASNET = ("dashboard_analisis_docencia.",)
+CODIGOS_UMASNET = {"Diurna": "D", "Vespertina": "V", "Hombre": "M", "Mujer": "F"}
+
+NOMBRE_ECAS = "IP ESCUELA DE CONTADORES AUDITORES DE SANTIAGO"
+
+# Matriz de filtros
+COHORTES = [(2018, 2018), (2007, 2025)]
+JORNADAS = ["Todas", "Diurna", "Vespertina"]
+GENEROS = ["Todos", "Hombre", "Mujer"]
+# region_sede de las tablas de matrículas y cod_region (como texto) de los egresados
+REGIONES_SEDE = ["Metropolitana", "Valparaíso", "Biobío", "Maule", "La Araucanía"]
+CODIGOS_REGION = ["13", "5", "8", "7", "9"]
+CANTIDADES_REGIONES = [0, 1, 5]
+
+# Parámetros -> dimensión de la matriz de la que toman su valor
+PARAMETROS_COHORTE = {"rango_anios", "anios_rango", "cohorte_range"}
+PARAMETROS_ANIO = {"anio_seleccionado", "periodo_seleccionado", "periodo_sel"}
+PARAMETROS_JORNADA = {"jornada", "jornada_filtro"}
+# Parámetros obligatorios que no son filtros de la matriz: el valor que usan las páginas al cargar
+VALORES_FIJOS = {
+    "cod_inst": 104,
+    "instituciones": [NOMBRE_ECAS],
+    "columna": "inst_destino",
+    "categoria_sel": "Más Acreditada",
+    "top_n": 10,
+}
+
+# --- Casos ---
+
+def funciones_publicas(modulo):
+    """Funciones definidas en el módulo cuyo nombre no empieza con "_", en orden de aparición."""
+    funciones = [
+        f for nombre, f in vars(modulo).items()
+        if inspect.isfunction(f) and not nombre.startswith("_") and f.__module__ == modulo.__name__
+    ]
+    return sorted(funciones, key=lambda f: inspect.unwrap(f).__code__.co_firstlineno)
+
+def _argumentos(parametros, filtro, umasnet):
+    """kwargs de la función para un filtro de la matriz y las dimensiones usadas, o None si no lo admite."""
+    (anio_min, anio_max), jornada, genero, regiones = filtro
+    if umasnet:
+        jornada, genero = CODIGOS_UMASNET.get(jornada, jornada), CODIGOS_UMASNET.get(genero, genero)
+    por_parametro = {
+        **{p: ("cohortes", [anio_min, anio_max]) for p in PARAMETROS_COHORTE},
+        **{p: ("cohortes", anio_max) for p in PARAMETROS_ANIO},
+        "anio_min": ("cohortes", anio_min),
+        "anio_max": ("cohortes", anio_max),
+        **{p: ("jornada", jornada) for p in PARAMETROS_JORNADA},
+        "genero": ("genero", genero),
+        "region_sede": ("regiones", REGIONES_SEDE[:regiones] or None),
+        "region_id": ("regiones", CODIGOS_REGION[0] if regiones else None),
+    }
+    kwargs, dimensiones = {}, set()
+    for nombre, parametro in parametros.items():
+        if nombre == "region_id" and regiones > 1:
+            return None, None
+        if nombre in por_parametro:
+            dimension, kwargs[nombre] = por_parametro[nombre]
+            dimensiones.add(dimension)
+        elif nombre in VALORES_FIJOS:
+            kwargs[nombre] = VALORES_FIJOS[nombre]
+        elif parametro.default is inspect.Parameter.empty:
+            raise ValueError(f"sin valor para el parámetro obligatorio '{nombre}'")
+    return kwargs, dimensiones
+
+def _etiqueta(filtro, dimensiones):
+    (anio_min, anio_max), jornada, genero, regiones = filtro
+    partes = {
+        "cohortes": f"cohortes={anio_min}-{anio_max}",
+        "jornada": f"jornada={jornada}",
+        "genero": f"genero={genero}",
+        "regiones": f"regiones={regiones}",
+    }
+    return " ".join(partes[d] for d in ("cohortes", "jornada", "genero", "regiones") if d in dimensiones) or "sin filtros"
+
+def casos_de(funcion, umasnet=False):
+    """[(etiqueta, kwargs)] de la función sobre la matriz de filtros, sin repetir argumentos."""
+    parametros = inspect.signature(funcion).parameters
+    casos, vistos = [], set()
+    for filtro in itertools.product(COHORTES, JORNADAS, GENEROS, CANTIDADES_REGIONES):
+        kwargs, dimensiones = _argumentos(parametros, filtro, umasnet)
+        if kwargs is None:
+            continue
+        clave = json.dumps(kwargs, sort_keys=True, ensure_ascii=False)
+        if clave not in vistos:
+            vistos.add(clave)
+            casos.append((_etiqueta(filtro, dimensiones), kwargs))
+    return casos
+
+# --- Medición ---
+
+def contar_filas(resultado):
+    """Filas de un resultado: DataFrames, listas o diccionarios de ellos, o 1 para un valor suelto."""
+    import pandas as pd
+
+    if resultado is None:
+        return 0
+    if isinstance(resultado, (pd.DataFrame, pd.Series)):
+        return len(resultado)
+    if isinstance(resultado, (list, tuple)):
+        if any(isinstance(r, (pd.DataFrame, pd.Series, list, tuple, dict)) for r in resultado):
+            return sum(contar_filas(r) for r in resultado)
+        return len(resultado)
+    if isinstance(resultado, dict):
+        if any(isinstance(r, (pd.DataFrame, pd.Series)) for r in resultado.values()):
+            return sum(contar_filas(r) for r in resultado.values())
+        return len(resultado)
+    return 1
+
+def _totales_sql():
+    import perfilador
+
+    estadisticas = perfilador.estadisticas_consultas()
+    return sum(h["ejecuciones"] for h in estadisticas.values()), sum(h["segundos"] for h in estadisticas.values())
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+def medir_caso(funcion, kwargs, repeticiones, calentamiento):
+    """Ejecuta la función `calentamiento` veces sin medir y `repeticiones` veces midiendo."""
+    for _ in range(calentamiento):
+        funcion(**kwargs)
+    duraciones, filas = [], 0
+    sentencias_antes, sql_antes = _totales_sql()
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion(**kwargs)
+        duraciones.append(time.perf_counter() - inicio)
+        filas = contar_filas(resultado)
+    sentencias, sql = _totales_sql()
+    return {
+        "p50": round(_percentil(duraciones, 50), 5),
+        "p95": round(_percentil(duraciones, 95), 5),
+        "min": round(min(duraciones), 5),
+        "max": round(max(duraciones), 5),
+        "filas": filas,
+        "sentencias": (sentencias - sentencias_antes) / repeticiones,
+        "segundos_sql": round((sql - sql_antes) / repeticiones, 5),
+    }
+
+def ejecutar(repeticiones=5, calentamiento=1, patrones=None, escala=None):
+    """Recorre las funciones y la matriz de filtros; retorna el documento de resultados."""
+    import conn_db
+
+    resultados = {}
+    inicio_total = time.perf_counter()
+    for ruta in MODULOS_CONSULTAS:
+        try:
+            modulo = importlib.import_module(ruta)
+        except Exception as e:
+            print(f"⚠️ No se pudo importar {ruta}: {e}")
+            continue
+        umasnet = ruta.startswith(MODULOS_UMASNET)
+        for funcion in funciones_publicas(modulo):
+            nombre = f"{ruta.rsplit('.', 1)[-1]}.{funcion.__name__}"
+            if patrones and not any(p in nombre for p in patrones):
+                continue
+            try:
+                casos = casos_de(funcion, umasnet)
+            except ValueError as e:
+                print(f"⚠️ {nombre}: {e}")
+                continue
+            print(f"--- {nombre} ({len(casos)} casos) ---")
+            resultados[nombre] = {}
+            for etiqueta, kwargs in casos:
+                try:
+                    medicion = medir_caso(funcion, kwargs, repeticiones, calentamiento)
+                    print(
+                        f"{etiqueta:<60} p50 {medicion['p50']:>8.3f} p95 {medicion['p95']:>8.3f} s "
+                        f"{medicion['filas']:>8} filas {medicion['sentencias']:>5.1f} sentencias"
+                    )
+                except Exception as e:
+                    medicion = {"error": f"{type(e).__name__}: {e}"}
+                    print(f"{etiqueta:<60} ERROR: {medicion['error']}")
+                resultados[nombre][etiqueta] = dict(medicion, argumentos=kwargs)
+
+    casos_total = sum(len(c) for c in resultados.values())
+    print(f"Benchmark terminado en {time.perf_counter() - inicio_total:.1f} s ({len(resultados)} funciones, {casos_total} casos)")
+    return {
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "backend": conn_db.BACKEND,
+        "embebido_dir": conn_db.EMBEBIDO_DIR if conn_db.BACKEND == "duckdb" else None,
+        "escala": escala,
+        "cache": os.getenv("ECAS_CACHE", "1") == "1",
+        "repeticiones": repeticiones,
+        "calentamiento": calentamiento,
+        "resultados": resultados,
+    }
+
+# --- Comparación con la línea base ---
+
+def comparar(actual, base, tolerancia=0.25, minimo=0.05):
+    """
+    Casos cuyo p50 superó al de la línea base en más de `tolerancia` (fracción) y `minimo` segundos, o cuya
+    cantidad de filas cambió. Retorna [(función, caso, motivo)].
+    """
+    regresiones = []
+    for nombre, casos in actual["resultados"].items():
+        for etiqueta, medicion in casos.items():
+            anterior = base.get("resultados", {}).get(nombre, {}).get(etiqueta)
+            if not anterior or "error" in anterior:
+                continue
+            if "error" in medicion:
+                regresiones.append((nombre, etiqueta, f"error: {medicion['error']}"))
+                continue
+            crecimiento = medicion["p50"] - anterior["p50"]
+            if crecimiento > minimo and medicion["p50"] > anterior["p50"] * (1 + tolerancia):
+                regresiones.append((nombre, etiqueta, f"p50 {anterior['p50']:.3f} -> {medicion['p50']:.3f} s (+{100 * crecimiento / anterior['p50']:.0f}%)"))
+            if medicion["filas"] != anterior["filas"]:
+                regresiones.append((nombre, etiqueta, f"filas {anterior['filas']} -> {medicion['filas']}"))
+    if base.get("backend") != actual.get("backend") or base.get("escala") != actual.get("escala"):
+        print(f"⚠️ La línea base es de otro backend o escala ({base.get('backend')}, {base.get('escala')})")
+    print(f"--- Regresiones respecto a la línea base del {base.get('fecha')}: {len(regresiones)} ---")
+    for nombre, etiqueta, motivo in regresiones:
+        print(f"{nombre:<55} {etiqueta:<60} {motivo}")
+    return regresiones
+
+# --- Curvas de escalamiento ---
+
+def curvas(escalas, argumentos_extra=(), html=None):
+    """
+    Ejecuta el benchmark sobre cada almacén embebido ({etiqueta: directorio}, de menor a mayor) en un proceso
+    aparte y retorna {función: {caso: [p50 por escala]}}.
+    """
+    documentos = {}
+    for etiqueta, directorio in escalas.items():
+        with tempfile.TemporaryDirectory() as temporal:
+            salida = os.path.join(temporal, "resultado.json")
+            print(f"=== Escala {etiqueta} ({directorio}) ===")
+            subprocess.run(
+                [sys.executable, "-m", "utilities.benchmark", "--backend", "duckdb", "--embebido", directorio,
+                 "--escala", etiqueta, "--salida", salida, *argumentos_extra],
+                cwd=RAIZ_PROYECTO, check=True,
+            )
+            with open(salida, encoding="utf-8") as archivo:
+                documentos[etiqueta] = json.load(archivo)
+
+    etiquetas = list(escalas)
+    factores = [leer_factor(e) for e in etiquetas]
+    resultado = {}
+    print(f"--- p50 (s) por escala: {' / '.join(etiquetas)} ---")
+    for nombre in documentos[etiquetas[0]]["resultados"]:
+        resultado[nombre] = {}
+        for caso in documentos[etiquetas[0]]["resultados"][nombre]:
+            valores = [documentos[e]["resultados"].get(nombre, {}).get(caso, {}).get("p50") for e in etiquetas]
+            resultado[nombre][caso] = valores
+        # Por función se muestra el caso más lento de la mayor escala
+        caso, valores = max(resultado[nombre].items(), key=lambda item: item[1][-1] or 0.0)
+        texto = " / ".join(f"{v:.3f}" if v is not None else "-" for v in valores)
+        exponente = ""
+        if None not in (valores[0], valores[-1], factores[0], factores[-1]) and valores[0] > 0 and factores[-1] > factores[0]:
+            exponente = f"exponente {math.log(valores[-1] / valores[0]) / math.log(factores[-1] / factores[0]):.2f}"
+        print(f"{nombre:<55} {texto:<30} {exponente:<16} {caso}")
+    if html:
+        _curvas_html(resultado, etiquetas, factores, html)
+    return resultado
+
+def leer_factor(etiqueta):
+    """'10x' -> 10.0; None si la etiqueta no es un factor."""
+    try:
+        return float(etiqueta.lower().rstrip("x"))
+    except ValueError:
+        return None
+
+def _curvas_html(resultado, etiquetas, factores, ruta):
+    import plotly.graph_objects as go
+
+    eje = factores if None not in factores else etiquetas
+    figura = go.Figure()
+    for nombre, casos in resultado.items():
+        caso, valores = max(casos.items(), key=lambda item: item[1][-1] or 0.0)
+        figura.add_trace(go.Scatter(x=eje, y=valores, mode="lines+markers", name=nombre, hovertext=caso))
+    figura.update_layout(
+        title="p50 por escala (caso más lento de cada función)",
+        xaxis_title="Escala", yaxis_title="Segundos", yaxis_type="log",
+        xaxis_type="log" if None not in factores else None,
+    )
+    figura.write_html(ruta)
+    print(f"Curvas guardadas en {ruta}")
+
+def _leer_escalas(pares):
+    escalas = {}
+    for par in pares:
+        etiqueta, separador, directorio = par.partition("=")
+        if not separador:
+            raise SystemExit(f"Escala inválida: {par} (se espera etiqueta=directorio)")
+        escalas[etiqueta] = directorio
+    return escalas
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de las funciones de queries_* con una matriz de filtros.")
+    parser.add_argument("--backend", choices=["mssql", "duckdb"], help="backend de lectura (por defecto ECAS_BACKEND)")
+    parser.add_argument("--embebido", help="directorio del almacén embebido (ECAS_EMBEBIDO_DIR)")
+    parser.add_argument("--escala", help="etiqueta de la escala de los datos, se guarda en el resultado (ej. 1x)")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--calentamiento", type=int, default=1, help="ejecuciones sin medir antes de cada caso")
+    parser.add_argument("--funciones", nargs="*", help="solo las funciones cuyo 'modulo.funcion' contiene alguno de estos textos")
+    parser.add_argument("--con-cache", action="store_true", help="mantener la caché de consultas (por defecto se apaga)")
+    parser.add_argument("--salida", help="archivo JSON del resultado (por defecto en ECAS_LOG_CONSULTAS_DIR/benchmarks)")
+    parser.add_argument("--comparar", help="línea base JSON contra la que se marcan regresiones")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="crecimiento del p50 tolerado (fracción)")
+    parser.add_argument("--minimo", type=float, default=0.05, help="crecimiento mínimo del p50 en segundos para marcar")
+    parser.add_argument("--curvas", nargs="+", metavar="ETIQUETA=DIRECTORIO", help="almacenes embebidos por escala, de menor a mayor")
+    parser.add_argument("--html", help="con --curvas, gráfico de las curvas")
+    argumentos = parser.parse_args()
+
+    if argumentos.curvas:
+        extra = ["--repeticiones", str(argumentos.repeticiones), "--calentamiento", str(argumentos.calentamiento)]
+        if argumentos.funciones:
+            extra += ["--funciones", *argumentos.funciones]
+        curvas(_leer_escalas(argumentos.curvas), extra, argumentos.html)
+        sys.exit(0)
+
+    # conn_db y cache_consultas leen su configuración al importarse
+    if argumentos.backend:
+        os.environ["ECAS_BACKEND"] = argumentos.backend
+    if argumentos.embebido:
+        os.environ["ECAS_EMBEBIDO_DIR"] = os.path.abspath(argumentos.embebido)
+    if not argumentos.con_cache:
+        os.environ["ECAS_CACHE"] = "0"
+
+    documento = ejecutar(argumentos.repeticiones, argumentos.calentamiento, argumentos.funciones, argumentos.escala)
+    salida = argumentos.salida
+    if not salida:
+        from perfilador import LOG_CONSULTAS_DIR
+        salida = os.path.join(LOG_CONSULTAS_DIR, "benchmarks", f"benchmark_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(salida)), exist_ok=True)
+    with open(salida, "w", encoding="utf-8") as archivo:
+        json.dump(documento, archivo, ensure_ascii=False, indent=2, default=str)
+    print(f"Resultado guardado en {salida}")
+
+    if argumentos.comparar:
+        with open(argumentos.comparar, encoding="utf-8") as archivo:
+            regresiones = comparar(documento, json.load(archivo), argumentos.tolerancia, argumentos.minimo)
+        sys.exit(1 if regresiones else 0)
@@ -0,0 +1,293 @@
+"""
+Prueba de carga: reproduce recorridos grabados de usuarios con N usuarios virtuales concurrentes.
+
+Los recorridos se graban desde el navegador con el servidor iniciado con ECAS_GRABAR_CALLBACKS=<archivo.jsonl>
+(grabacion.py): cada sesión queda como una secuencia de solicitudes a /_dash-update-component (navegación con
+display_page, cambios de filtros, clics en el mapa). También sirven los payloads exportados por
+utilities.arnes_callbacks --exportar (sin sesión: el archivo completo es un recorrido).
+
+Cada usuario virtual tiene sus propias cookies (su propia sesión para cancelacion.py; la pestaña grabada
+se descarta) y recorre las secuencias en orden, respetando las pausas grabadas entre interacciones
+(multiplicadas por --pausas y con tope --pausa-max). Las solicitudes grabadas con menos de RAFAGA_SEGUNDOS entre sí se envían en paralelo,
+como lo hace el navegador al cargar una página, con hasta CONEXIONES_POR_USUARIO a la vez.
+
+Se reporta por nivel de usuarios: rendimiento (solicitudes/s), percentiles de latencia, tasa de errores y
+las sentencias SQL que ejecutó el servidor (diferencia de los contadores de /metrics). Con varios workers de
+gunicorn /metrics responde un solo worker: para contar sentencias usar un worker o --en-proceso.
+
+Uso (desde la raíz del proyecto):
+    python -m utilities.carga sesiones.jsonl --url http://servidor:8050 --usuarios 1 5 10 20
+    python -m utilities.carga sesiones.jsonl --en-proceso --usuarios 10 --duracion 120 --pausas 0
+    python -m utilities.carga sesiones.jsonl --usuarios 50 --rampa 30 --salida carga.json
+--en-proceso levanta la app de index.py en este mismo proceso (servidor de desarrollo con hilos).
+"""
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError, URLError
+from urllib.request import HTTPCookieProcessor, Request, build_opener
+import argparse
+import json
+import logging
+import re
+import threading
+import time
+
+RUTA_CALLBACKS = "/_dash-update-component"
+# Solicitudes grabadas más juntas que esto salen en paralelo (un mismo cambio dispara varios callbacks)
+RAFAGA_SEGUNDOS = 0.05
+# Conexiones simultáneas de un navegador al mismo servidor
+CONEXIONES_POR_USUARIO = 6
+TIMEOUT_SOLICITUD = 120
+
+_METRICA_SENTENCIAS = re.compile(r'^(ecas_sentencias(?:_errores|_segundos)?_total)\{base="([^"]*)"\} ([0-9.eE+-]+)$')
+
+# --- Recorridos ---
+
+def leer_recorridos(archivo):
+    """[[línea, ...], ...]: las solicitudes de cada sesión grabada en orden; sin sesión, todo el archivo es uno."""
+    from grabacion import leer_grabacion
+
+    por_sesion = {}
+    for linea in leer_grabacion(archivo):
+        por_sesion.setdefault(linea.get("sesion"), []).append(linea)
+    return [sorted(lineas, key=lambda l: l.get("t") or 0.0) for lineas in por_sesion.values()]
+
+def rafagas(recorrido):
+    """Agrupa las solicitudes de un recorrido que el navegador envió juntas; retorna [(pausa previa, [líneas])]."""
+    grupos = []
+    anterior = None
+    for linea in recorrido:
+        t = linea.get("t") or 0.0
+        if grupos and anterior is not None and t - anterior < RAFAGA_SEGUNDOS:
+            grupos[-1][1].append(linea)
+        else:
+            grupos.append((max(0.0, t - anterior) if anterior is not None else 0.0, [linea]))
+        anterior = t
+    return grupos
+
+def nombre_salida(payload):
+    """Callback identificado por su primera salida ("id.propiedad", con "+n" si tiene más)."""
+    salida = payload.get("output", "")
+    if salida.startswith(".."):
+        partes = salida[2:-2].split("...")
+        return partes[0] + (f" (+{len(partes) - 1})" if len(partes) > 1 else "")
+    return salida
+
+# --- Métricas del servidor ---
+
+def contadores_servidor(url):
+    """{(métrica, base): valor} de los contadores de sentencias de /metrics, o None si no responden."""
+    try:
+        with build_opener().open(url.rstrip("/") + "/metrics", timeout=30) as respuesta:
+            texto = respuesta.read().decode("utf-8")
+    except (URLError, OSError) as e:
+        print(f"⚠️ No se pudo leer /metrics: {e}")
+        return None
+    contadores = {}
+    for linea in texto.splitlines():
+        coincidencia = _METRICA_SENTENCIAS.match(linea)
+        if coincidencia:
+            contadores[(coincidencia.group(1), coincidencia.group(2))] = float(coincidencia.group(3))
+    return contadores
+
+def _diferencia(antes, despues):
+    if antes is None or despues is None:
+        return None
+    diferencia = {}
+    for (metrica, base), valor in despues.items():
+        d = diferencia.setdefault(base, {})
+        d[metrica] = valor - antes.get((metrica, base), 0.0)
+    return diferencia
+
+# --- Usuarios virtuales ---
+
+def _enviar(opener, url, linea):
+    from cancelacion import CAMPO_PESTANA
+
+    # Sin la pestaña grabada: cada usuario virtual se identifica por su cookie y no reemplaza a los demás
+    payload = {clave: valor for clave, valor in linea["payload"].items() if clave != CAMPO_PESTANA}
+    cuerpo = json.dumps(payload).encode("utf-8")
+    cabeceras = {"Content-Type": "application/json"}
+    if linea.get("pagina"):
+        cabeceras["Referer"] = url.rstrip("/") + linea["pagina"]
+    solicitud = Request(url.rstrip("/") + RUTA_CALLBACKS, data=cuerpo, headers=cabeceras, method="POST")
+    inicio = time.perf_counter()
+    try:
+        with opener.open(solicitud, timeout=TIMEOUT_SOLICITUD) as respuesta:
+            datos = respuesta.read()
+            estado = respuesta.status
+    except HTTPError as e:
+        datos, estado = e.read() or b"", e.code
+    except (URLError, OSError) as e:
+        return nombre_salida(payload), time.perf_counter() - inicio, f"{type(e).__name__}", 0
+    return nombre_salida(payload), time.perf_counter() - inicio, estado, len(datos)
+
+def _usuario(indice, recorridos, config, resultados, lock):
+    opener = build_opener(HTTPCookieProcessor(CookieJar()))
+    # Rampa: los usuarios empiezan repartidos en config["rampa"] segundos
+    time.sleep(config["rampa"] * indice / max(1, config["usuarios"]))
+    iteracion = 0
+    with ThreadPoolExecutor(max_workers=CONEXIONES_POR_USUARIO) as conexiones:
+        while True:
+            if config["fin"] is not None and time.monotonic() >= config["fin"]:
+                return
+            if config["fin"] is None and iteracion >= config["iteraciones"]:
+                return
+            recorrido = recorridos[(indice + iteracion) % len(recorridos)]
+            for pausa, grupo in rafagas(recorrido):
+                if config["fin"] is not None and time.monotonic() >= config["fin"]:
+                    return
+                time.sleep(min(pausa * config["pausas"], config["pausa_max"]))
+                inicio = time.time()
+                for nombre, segundos, estado, tamano in conexiones.map(lambda l: _enviar(opener, config["url"], l), grupo):
+                    with lock:
+                        resultados.append((inicio, nombre, segundos, estado, tamano))
+            iteracion += 1
+            with lock:
+                config["recorridos_completos"] += 1
+
+def _percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+def _es_error(estado):
+    return not isinstance(estado, int) or estado >= 400
+
+def ejecutar_nivel(url, recorridos, usuarios, duracion=None, iteraciones=1, rampa=0.0, pausas=1.0, pausa_max=10.0):
+    """Carga con `usuarios` concurrentes; retorna el resumen del nivel."""
+    antes = contadores_servidor(url)
+    inicio = time.monotonic()
+    config = {
+        "url": url, "usuarios": usuarios, "rampa": rampa, "pausas": pausas, "pausa_max": pausa_max,
+        "iteraciones": iteraciones, "fin": inicio + rampa + duracion if duracion else None, "recorridos_completos": 0,
+    }
+    resultados, lock = [], threading.Lock()
+    hilos = [threading.Thread(target=_usuario, args=(i, recorridos, config, resultados, lock), daemon=True) for i in range(usuarios)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    segundos = time.monotonic() - inicio
+    servidor = _diferencia(antes, contadores_servidor(url))
+
+    duraciones = [r[2] for r in resultados]
+    errores = [r for r in resultados if _es_error(r[3])]
+    por_callback = {}
+    for _, nombre, duracion_solicitud, estado, tamano in resultados:
+        c = por_callback.setdefault(nombre, {"duraciones": [], "errores": 0, "bytes": 0})
+        c["duraciones"].append(duracion_solicitud)
+        c["errores"] += _es_error(estado)
+        c["bytes"] += tamano
+    codigos = {}
+    for r in errores:
+        codigos[str(r[3])] = codigos.get(str(r[3]), 0) + 1
+
+    sentencias = sum(d.get("ecas_sentencias_total", 0.0) for d in servidor.values()) if servidor else None
+    return {
+        "usuarios": usuarios,
+        "segundos": round(segundos, 3),
+        "solicitudes": len(resultados),
+        "recorridos_completos": config["recorridos_completos"],
+        "solicitudes_por_segundo": round(len(resultados) / segundos, 3) if segundos else 0.0,
+        "p50": round(_percentil(duraciones, 50), 4),
+        "p90": round(_percentil(duraciones, 90), 4),
+        "p95": round(_percentil(duraciones, 95), 4),
+        "p99": round(_percentil(duraciones, 99), 4),
+        "maximo": round(max(duraciones, default=0.0), 4),
+        "errores": len(errores),
+        "tasa_errores": round(len(errores) / len(resultados), 4) if resultados else 0.0,
+        "codigos_error": codigos,
+        "sentencias": sentencias,
+        "sentencias_por_solicitud": round(sentencias / len(resultados), 2) if sentencias is not None and resultados else None,
+        "servidor": servidor,
+        "callbacks": {
+            nombre: {
+                "solicitudes": len(c["duraciones"]),
+                "p50": round(_percentil(c["duraciones"], 50), 4),
+                "p95": round(_percentil(c["duraciones"], 95), 4),
+                "errores": c["errores"],
+                "bytes_promedio": round(c["bytes"] / len(c["duraciones"])),
+            }
+            for nombre, c in por_callback.items()
+        },
+    }
+
+def reporte_nivel(r, top=15):
+    print(
+        f"--- {r['usuarios']} usuarios: {r['solicitudes']} solicitudes en {r['segundos']:.1f} s "
+        f"({r['solicitudes_por_segundo']:.1f}/s), {r['recorridos_completos']} recorridos ---"
+    )
+    print(
+        f"latencia p50 {r['p50']:.3f} p90 {r['p90']:.3f} p95 {r['p95']:.3f} p99 {r['p99']:.3f} máx {r['maximo']:.3f} s | "
+        f"errores {r['errores']} ({100 * r['tasa_errores']:.1f}%) {r['codigos_error'] or ''}"
+    )
+    if r["servidor"] is not None:
+        for base, d in sorted(r["servidor"].items()):
+            print(
+                f"base {base:<20} {d.get('ecas_sentencias_total', 0):>8.0f} sentencias "
+                f"{d.get('ecas_sentencias_segundos_total', 0):>9.2f} s SQL {d.get('ecas_sentencias_errores_total', 0):>5.0f} errores"
+            )
+        if r["sentencias_por_solicitud"] is not None:
+            print(f"{r['sentencias_por_solicitud']:.2f} sentencias por solicitud")
+    for nombre, c in sorted(r["callbacks"].items(), key=lambda item: item[1]["p95"], reverse=True)[:top]:
+        print(f"{nombre:<55} {c['solicitudes']:>6} sol p50 {c['p50']:>7.3f} p95 {c['p95']:>7.3f} s errores {c['errores']:>4} {c['bytes_promedio'] / 1024:>8.1f} KB")
+
+def reporte_niveles(niveles):
+    print("--- Resumen por cantidad de usuarios ---")
+    print(f"{'usuarios':>8} {'sol/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'errores':>8} {'sent/sol':>9}")
+    for r in niveles:
+        por_solicitud = f"{r['sentencias_por_solicitud']:.2f}" if r["sentencias_por_solicitud"] is not None else "-"
+        print(
+            f"{r['usuarios']:>8} {r['solicitudes_por_segundo']:>8.1f} {r['p50']:>8.3f} {r['p95']:>8.3f} "
+            f"{r['p99']:>8.3f} {100 * r['tasa_errores']:>7.1f}% {por_solicitud:>9}"
+        )
+
+def servidor_en_proceso(puerto=0):
+    """Levanta la app de index.py en un hilo con el servidor de desarrollo de Werkzeug; retorna la URL."""
+    from werkzeug.serving import make_server
+    from index import app
+
+    # Sin una línea de log por solicitud
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    servidor = make_server("127.0.0.1", puerto, app.server, threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{servidor.server_port}"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba de carga con recorridos grabados de callbacks.")
+    parser.add_argument("grabacion", help="archivo .jsonl grabado con ECAS_GRABAR_CALLBACKS")
+    parser.add_argument("--url", default="http://127.0.0.1:8050", help="servidor a probar")
+    parser.add_argument("--en-proceso", action="store_true", help="levantar la app de index.py en este proceso")
+    parser.add_argument("--usuarios", type=int, nargs="+", default=[10], help="usuarios concurrentes; varios valores = un nivel tras otro")
+    parser.add_argument("--duracion", type=float, help="segundos por nivel (sin esto, cada usuario hace --iteraciones recorridos)")
+    parser.add_argument("--iteraciones", type=int, default=1, help="recorridos por usuario si no hay --duracion")
+    parser.add_argument("--rampa", type=float, default=0.0, help="segundos en que van entrando los usuarios")
+    parser.add_argument("--pausas", type=float, default=1.0, help="factor de las pausas grabadas (0 = sin pausas)")
+    parser.add_argument("--pausa-max", type=float, default=10.0, help="tope de cada pausa en segundos")
+    parser.add_argument("--salida", help="archivo JSON con el resultado de cada nivel")
+    argumentos = parser.parse_args()
+
+    recorridos = [r for r in leer_recorridos(argumentos.grabacion) if r]
+    if not recorridos:
+        raise SystemExit(f"La grabación {argumentos.grabacion} no tiene solicitudes")
+    print(f"{len(recorridos)} recorridos, {sum(len(r) for r in recorridos)} solicitudes grabadas")
+    url = servidor_en_proceso() if argumentos.en_proceso else argumentos.url
+
+    niveles = []
+    for usuarios in argumentos.usuarios:
+        resultado = ejecutar_nivel(
+            url, recorridos, usuarios, argumentos.duracion, argumentos.iteraciones,
+            argumentos.rampa, argumentos.pausas, argumentos.pausa_max,
+        )
+        reporte_nivel(resultado)
+        niveles.append(resultado)
+    if len(niveles) > 1:
+        reporte_niveles(niveles)
+
+    if argumentos.salida:
+        with open(argumentos.salida, "w", encoding="utf-8") as archivo:
+            json.dump({"fecha": time.strftime("%Y-%m-%dT%H:%M:%S"), "url": url, "niveles": niveles}, archivo, ensure_ascii=False, indent=2)
+        print(f"Resultado guardado en {argumentos.salida}")
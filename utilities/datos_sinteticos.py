@@ -0,0 +1,874 @@
+"""
+Datos sintéticos con la forma de las tablas de producción, para medir y optimizar sin acceso a los datos reales.
+
+Se simulan alumnos con trayectorias completas (ingreso, permanencia, cambio de jornada en ECAS, deserción,
+traslado a otra institución, titulación y estudios posteriores) y se escriben:
+    <destino>/datos/       matriculas_mrun: un CSV por año, como los de MINEDUC
+    <destino>/titulados/   titulados_mrun: un CSV por año de titulación
+    <destino>/egresados/   egresados_mrun: un CSV por año de egreso, con los nombres de columna de MINEDUC
+    <destino>/umasnet/     MT_ALUMNO, MT_CLIENT, RA_NOTA, RA_EQUIV, RC_Contador y los catálogos que cruzan
+                           las consultas (RA_RAMO, MT_VIADMISION, MT_MODALIDAD, MT_VACANTES)
+    <destino>/parquet/     las mismas tablas con los nombres y tipos de columna de SQL Server
+Los CSV de datos/, titulados/ y egresados/ se cargan con las funciones de tables.py ejecutándolo desde <destino>.
+Para el almacén embebido (ECAS_BACKEND=duckdb), matriculas_mrun.parquet se lee tal cual desde
+ECAS_EMBEBIDO_DIR; las tablas derivadas salen de cargar los CSV en una base de desarrollo y ejecutar
+tablas_derivadas.py con ECAS_EXPORTAR_EMBEBIDO=1.
+
+Uso (desde la raíz del proyecto):
+    python -m utilities.datos_sinteticos                                  # 1M filas de matrículas
+    python -m utilities.datos_sinteticos --filas 100M --destino /datos/sinteticos --formatos parquet
+    python -m utilities.datos_sinteticos --filas 100k --proporcion-ecas 0.05 --semilla 7
+
+--filas es la cantidad aproximada de filas de matriculas_mrun (100k a 100M); las demás tablas crecen en
+proporción. Se genera por bloques de alumnos, así que la memoria no depende de la escala, y con la misma
+semilla y escala el resultado es idéntico.
+"""
+import argparse
+import json
+import math
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+RAIZ_PROYECTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUTA_COMUNAS = os.path.join(RAIZ_PROYECTO, "jsons", "comunas.geojson")
+NOMBRE_ECAS = "IP ESCUELA DE CONTADORES AUDITORES DE SANTIAGO"
+
+ANIO_MIN, ANIO_MAX = 2005, 2025
+# Los egresados de media anteriores a este año no están en los archivos de MINEDUC
+ANIO_MIN_EGRESO = 2002
+ALUMNOS_POR_BLOQUE = 50_000
+# Egresados de media que nunca se matriculan, por cada alumno matriculado
+EGRESADOS_SIN_MATRICULA = 0.4
+
+# Parámetros de la simulación (probabilidades anuales)
+PROPORCION_ECAS = 0.01
+PROPORCION_CONTABLE = 0.12
+P_DESERCION_PRIMER_ANIO = 0.25
+P_DESERCION = 0.10
+P_TITULACION = 0.55
+P_TRASLADO = 0.45
+P_ESTUDIOS_POSTERIORES = 0.30
+P_CAMBIO_JORNADA_ECAS = 0.04
+# Años de más sobre la duración de la carrera antes de abandonar sin titularse
+ANIOS_MAXIMOS_EXTRA = 4
+
+# (cod_region, nombre en matrículas, abreviatura de MINEDUC, peso en la matrícula nacional)
+REGIONES = [
+    (15, "Arica y Parinacota", "AYP", 1.2), (1, "Tarapacá", "TPCA", 2.0), (2, "Antofagasta", "ANTOF", 3.5),
+    (3, "Atacama", "ATCMA", 1.6), (4, "Coquimbo", "COQ", 4.0), (5, "Valparaíso", "VALPO", 10.0),
+    (13, "Metropolitana", "RM", 40.0), (6, "Lib. Gral. B. O'Higgins", "LGBO", 5.0), (7, "Maule", "MAULE", 6.0),
+    (16, "Ñuble", "NUBLE", 2.5), (8, "Biobío", "BBIO", 9.0), (9, "La Araucanía", "ARAUC", 5.5),
+    (14, "Los Ríos", "RIOS", 2.0), (10, "Los Lagos", "LAGOS", 5.0), (11, "Aysén", "AYSEN", 0.6),
+    (12, "Magallanes", "MAG", 0.9),
+]
+
+# (cod_inst, nombre, tipo, años de acreditación (99 = no acreditada), peso, región de la casa central o None si es nacional)
+INSTITUCIONES = [
+    (104, NOMBRE_ECAS, "IP", 99, 1.0, 13),
+    (200, "IP DUOC UC", "IP", 7, 10.0, None),
+    (201, "IP AIEP", "IP", 5, 8.0, None),
+    (202, "IP INACAP", "IP", 7, 9.0, None),
+    (203, "CFT INACAP", "CFT", 7, 7.0, None),
+    (204, "IP SANTO TOMAS", "IP", 4, 5.0, None),
+    (205, "CFT SANTO TOMAS", "CFT", 4, 5.0, None),
+    (206, "IP IPLACEX", "IP", 4, 4.0, None),
+    (207, "IP LOS LEONES", "IP", 4, 3.0, 13),
+    (208, "IP PROVIDENCIA", "IP", 99, 1.0, 13),
+    (209, "CFT ENAC", "CFT", 4, 1.5, 13),
+    (210, "CFT CEDUC UCN", "CFT", 4, 1.0, 4),
+    (211, "IP DE CHILE", "IP", 99, 1.5, None),
+    (212, "IP VIRGINIO GOMEZ", "IP", 4, 1.0, 8),
+    (213, "CFT LOTA ARAUCO", "CFT", 99, 0.5, 8),
+    (214, "IP ESUCOMEX", "IP", 3, 0.5, 13),
+    (70, "UNIVERSIDAD SANTO TOMAS", "UP", 4, 4.0, None),
+    (1, "UNIVERSIDAD DE CHILE", "UE", 7, 6.0, 13),
+    (2, "PONTIFICIA UNIVERSIDAD CATOLICA DE CHILE", "UC", 7, 6.0, 13),
+    (3, "UNIVERSIDAD DE CONCEPCION", "UC", 7, 5.0, 8),
+    (4, "UNIVERSIDAD DE SANTIAGO DE CHILE", "UE", 6, 4.5, 13),
+    (5, "UNIVERSIDAD DE VALPARAISO", "UE", 6, 3.0, 5),
+    (6, "UNIVERSIDAD DE LA FRONTERA", "UE", 6, 2.5, 9),
+    (50, "UNIVERSIDAD ANDRES BELLO", "UP", 6, 8.0, None),
+    (51, "UNIVERSIDAD SAN SEBASTIAN", "UP", 5, 5.0, None),
+    (52, "UNIVERSIDAD AUTONOMA DE CHILE", "UP", 5, 4.0, None),
+    (53, "UNIVERSIDAD CENTRAL DE CHILE", "UP", 4, 2.5, 13),
+    (54, "UNIVERSIDAD DE LAS AMERICAS", "UP", 4, 5.0, None),
+    (55, "UNIVERSIDAD MAYOR", "UP", 5, 3.5, 13),
+]
+TIPOS_INSTITUCION = {
+    # tipo -> (tipo_inst_1, tipo_inst_2, tipo_inst_3)
+    "IP": ("Institutos Profesionales", "Institutos Profesionales", "Institutos Profesionales"),
+    "CFT": ("Centros de Formación Técnica", "Centros de Formación Técnica", "Centros de Formación Técnica"),
+    "UE": ("Universidades", "Universidades CRUCH", "Universidades Estatales CRUCH"),
+    "UC": ("Universidades", "Universidades CRUCH", "Universidades Privadas CRUCH"),
+    "UP": ("Universidades", "Universidades Privadas", "Universidades Privadas"),
+}
+# Acreditación de ECAS por año (el resto de las instituciones tiene la de INSTITUCIONES)
+ACREDITACION_ECAS = {anio: 99 if anio < 2013 else 3 if anio < 2019 else 4 for anio in range(ANIO_MIN, ANIO_MAX + 1)}
+
+# (nombre, área, nivel_global, nivel_carrera_1, tipos que la imparten, semestres de estudio, semestres de titulación, grupo, popularidad)
+# Grupos: "contable" son las carreras que compiten con ECAS, "otro" el resto del pregrado y "posterior" postítulos y posgrados
+CARRERAS = [
+    ("CONTADOR AUDITOR", "Administración y Comercio", "Pregrado", "Profesional Sin Licenciatura", ("IP", "UP"), 8, 2, "contable", 3.0),
+    ("AUDITORIA", "Administración y Comercio", "Pregrado", "Profesional Sin Licenciatura", ("IP",), 8, 1, "contable", 1.0),
+    ("CONTABILIDAD Y AUDITORIA", "Administración y Comercio", "Pregrado", "Profesional Sin Licenciatura", ("IP",), 7, 1, "contable", 1.0),
+    ("CONTABILIDAD GENERAL", "Administración y Comercio", "Pregrado", "Técnico de Nivel Superior", ("CFT", "IP"), 5, 0, "contable", 2.0),
+    ("CONTADOR TECNICO DE NIVEL SUPERIOR", "Administración y Comercio", "Pregrado", "Técnico de Nivel Superior", ("CFT",), 4, 1, "contable", 1.0),
+    ("CONTADOR PUBLICO Y AUDITOR", "Administración y Comercio", "Pregrado", "Profesional Con Licenciatura", ("UE", "UC", "UP"), 10, 0, "contable", 1.5),
+    ("INGENIERIA COMERCIAL", "Administración y Comercio", "Pregrado", "Profesional Con Licenciatura", ("UE", "UC", "UP"), 10, 0, "otro", 3.0),
+    ("DERECHO", "Derecho", "Pregrado", "Profesional Con Licenciatura", ("UE", "UC", "UP"), 10, 0, "otro", 2.5),
+    ("ENFERMERIA", "Salud", "Pregrado", "Profesional Con Licenciatura", ("UE", "UC", "UP"), 10, 0, "otro", 2.5),
+    ("PSICOLOGIA", "Ciencias Sociales", "Pregrado", "Profesional Con Licenciatura", ("UE", "UC", "UP"), 10, 0, "otro", 2.0),
+    ("INGENIERIA CIVIL INDUSTRIAL", "Tecnología", "Pregrado", "Profesional Con Licenciatura", ("UE", "UC", "UP"), 12, 0, "otro", 2.0),
+    ("PEDAGOGIA EN EDUCACION BASICA", "Educación", "Pregrado", "Profesional Con Licenciatura", ("UE", "UC", "UP"), 10, 0, "otro", 1.5),
+    ("INGENIERIA EN ADMINISTRACION DE EMPRESAS", "Administración y Comercio", "Pregrado", "Profesional Sin Licenciatura", ("IP",), 8, 1, "otro", 3.0),
+    ("INGENIERIA EN INFORMATICA", "Tecnología", "Pregrado", "Profesional Sin Licenciatura", ("IP",), 8, 1, "otro", 2.5),
+    ("TRABAJO SOCIAL", "Ciencias Sociales", "Pregrado", "Profesional Sin Licenciatura", ("IP", "UP"), 8, 1, "otro", 1.5),
+    ("DISEÑO GRAFICO", "Arte y Arquitectura", "Pregrado", "Profesional Sin Licenciatura", ("IP",), 8, 0, "otro", 1.0),
+    ("TECNICO EN ENFERMERIA", "Salud", "Pregrado", "Técnico de Nivel Superior", ("CFT", "IP"), 5, 0, "otro", 3.0),
+    ("TECNICO EN ADMINISTRACION", "Administración y Comercio", "Pregrado", "Técnico de Nivel Superior", ("CFT", "IP"), 4, 1, "otro", 2.5),
+    ("TECNICO EN LOGISTICA", "Administración y Comercio", "Pregrado", "Técnico de Nivel Superior", ("CFT", "IP"), 4, 1, "otro", 1.5),
+    ("TECNICO EN MECANICA AUTOMOTRIZ", "Tecnología", "Pregrado", "Técnico de Nivel Superior", ("CFT", "IP"), 5, 0, "otro", 2.0),
+    ("GASTRONOMIA", "Servicios", "Pregrado", "Técnico de Nivel Superior", ("CFT", "IP"), 4, 1, "otro", 1.5),
+    ("MAGISTER EN TRIBUTACION", "Administración y Comercio", "Posgrado", "Magister", ("UE", "UC", "UP"), 4, 0, "posterior", 2.0),
+    ("MAGISTER EN ADMINISTRACION DE EMPRESAS", "Administración y Comercio", "Posgrado", "Magister", ("UE", "UC", "UP"), 4, 0, "posterior", 2.0),
+    ("DIPLOMADO EN NORMAS IFRS", "Administración y Comercio", "Postítulo", "Postítulo", ("UE", "UC", "UP", "IP"), 2, 0, "posterior", 1.5),
+    ("DIPLOMADO EN GESTION TRIBUTARIA", "Administración y Comercio", "Postítulo", "Postítulo", ("UE", "UC", "UP", "IP"), 2, 0, "posterior", 1.5),
+]
+NIVEL_CARRERA_2 = {
+    "Profesional Sin Licenciatura": "Carreras Profesionales",
+    "Profesional Con Licenciatura": "Carreras Profesionales",
+    "Técnico de Nivel Superior": "Carreras Técnicas",
+    "Magister": "Magister",
+    "Postítulo": "Postítulo",
+}
+GRUPOS = ("ecas", "contable", "otro", "posterior")
+
+# Edad al ingresar a la primera carrera
+EDADES_INGRESO = (np.arange(17, 56), np.array(
+    [0.02, 0.35, 0.18, 0.09, 0.06, 0.05, 0.04, 0.035, 0.03, 0.025, 0.02, 0.017, 0.015, 0.013]
+    + [0.011] * 10 + [0.005] * 15
+))
+RANGOS_EDAD = np.array(["15 a 19 años", "20 a 24 años", "25 a 29 años", "30 a 34 años", "35 a 39 años", "40 y más años"])
+LIMITES_EDAD = np.array([20, 25, 30, 35, 40])
+
+# umasnet
+NACIONALIDADES = (["CHILENA", "VENEZOLANA", "PERUANA", "COLOMBIANA", "HAITIANA", "BOLIVIANA"], [0.92, 0.03, 0.02, 0.015, 0.01, 0.005])
+VIAS_ADMISION = [(1, "ADMISION REGULAR", 0.70), (2, "ADMISION ESPECIAL", 0.08), (3, "CONTINUIDAD DE ESTUDIOS", 0.10), (4, "CONVALIDACION", 0.10), (5, "PACE", 0.02)]
+MODALIDADES = [(1, "PRESENCIAL", 0.85), (2, "SEMIPRESENCIAL", 0.10), (3, "ONLINE", 0.05)]
+# Ramos por semestre del plan de ECAS; el plan "CA" rige hasta la cohorte 2015 y el "CB" desde 2016
+ASIGNATURAS = ["CONTABILIDAD", "MATEMATICA", "DERECHO", "ECONOMIA", "TRIBUTACION"]
+SEMESTRES_PLAN = 10
+COHORTE_PLAN_NUEVO = 2016
+ROMANOS = ["I", "II", "III", "IV", "V", "VI", "VII", "VIII", "IX", "X"]
+
+COLUMNAS_MATRICULAS = [
+    # Mismo orden que tables.DTYPE_MAP
+    "cat_periodo", "codigo_unico", "mrun", "gen_alu", "rango_edad", "fec_nac_alu", "anio_ing_carr_ori", "sem_ing_carr_ori",
+    "anio_ing_carr_act", "sem_ing_carr_act", "tipo_inst_1", "tipo_inst_2", "tipo_inst_3", "cod_inst", "nomb_inst", "cod_sede",
+    "nomb_sede", "cod_carrera", "nomb_carrera", "modalidad", "jornada", "version", "tipo_plan_carr", "dur_estudio_carr",
+    "dur_proceso_tit", "dur_total_carr", "region_sede", "provincia_sede", "comuna_sede", "nivel_global", "nivel_carrera_1",
+    "nivel_carrera_2", "requisito_ingreso", "vigencia_carrera", "valor_matricula", "valor_arancel", "codigo_demre",
+    "area_conocimiento", "cine_f_97_area", "cine_f_97_subarea", "area_carrera_generica", "cine_f_13_area", "cine_f_13_subarea",
+    "acreditada_carr", "acreditada_inst", "acre_inst_desde_hasta", "acre_inst_anio", "costo_proceso_titulacion",
+    "costo_obtencion_titulo_diploma", "forma_de_ingreso",
+]
+COLUMNAS_TITULADOS = [
+    # Los nombres que usa tablas_derivadas.py sobre titulados_mrun
+    "cat_periodo", "codigo_unico", "mrun", "gen_alu", "fec_nac_alu", "rango_edad", "anio_ing_carr_ori", "sem_ing_carr_ori",
+    "anio_ing_carr_act", "sem_ing_carr_act", "nombre_titulo_obtenido", "nombre_grado_obtenido", "fecha_obtencion_titulo",
+    "tipo_inst_1", "tipo_inst_2", "tipo_inst_3", "cod_inst", "nomb_inst", "cod_sede", "nomb_sede", "cod_carrera",
+    "nomb_carrera", "nivel_global", "nivel_carrera_1", "nivel_carrera_2", "dur_estudio_carr", "dur_proceso_tit",
+    "dur_total_carr", "region_sede", "provincia_sede", "comuna_sede", "jornada", "modalidad", "version", "tipo_plan_carr",
+    "area_conocimiento",
+]
+COLUMNAS_EGRESADOS = {
+    # Columna del CSV de MINEDUC -> columna de egresados_mrun (tables.cargar_egresados)
+    "AGNO": "periodo", "MRUN": "mrun", "MRUN_IPE": "mascara_provisoria", "RBD": "rbd", "COD_REG_RBD": "cod_region",
+    "NOM_REG_RBD_A": "nomb_region", "COD_PRO_RBD": "cod_provincia", "COD_COM_RBD": "cod_comuna", "NOM_COM_RBD": "nomb_comuna",
+    "COD_DEPROV_RBD": "cod_departamento", "NOM_DEPROV_RBD": "nomb_departamento", "COD_ENSE": "cod_ensenianza",
+    "COD_GRADO": "cod_grado", "COD_DEPE": "cod_dependencia", "COD_DEPE2": "cod_dep_agrupado", "RURAL_RBD": "indice_rural",
+    "PROM_NOTAS_ALU": "prom_notas_alu", "ORIGEN": "origen_dato", "ENSE_COMPLETA": "ense_completa", "MARCA_EGRESO": "marca_egreso",
+}
+
+# Tipos de las columnas en SQL Server (tables.py); lo que no está aquí es texto
+ENTEROS_MATRICULAS = {
+    "cat_periodo", "gen_alu", "fec_nac_alu", "anio_ing_carr_ori", "anio_ing_carr_act", "cod_inst", "cod_sede",
+    "cod_carrera", "dur_estudio_carr", "dur_proceso_tit", "dur_total_carr", "acre_inst_anio",
+}
+ENTEROS_EGRESADOS = {
+    "periodo", "mrun", "mascara_provisoria", "rbd", "cod_region", "cod_provincia", "cod_comuna", "cod_departamento",
+    "cod_ensenianza", "cod_grado", "cod_dependencia", "cod_dep_agrupado", "indice_rural", "ense_completa", "marca_egreso",
+}
+
+# --- Catálogos ---
+
+def _cargar_comunas():
+    """{cod_region: (códigos, nombres en mayúsculas, provincias)} desde el GeoJSON de comunas del proyecto."""
+    with open(RUTA_COMUNAS, encoding="utf-8") as archivo:
+        features = json.load(archivo)["features"]
+    comunas = {}
+    for feature in features:
+        p = feature["properties"]
+        if p.get("codregion"):
+            comunas.setdefault(int(p["codregion"]), []).append((int(p["cod_comuna"]), p["Comuna"].upper(), p["Provincia"]))
+    return {region: tuple(np.array(valores) for valores in zip(*sorted(filas))) for region, filas in comunas.items()}
+
+def _catalogo(rng):
+    """
+    Programas (institución x carrera x jornada) como arreglos de numpy, más las tablas por región. Los textos
+    también quedan como arreglos de Arrow para armar las columnas con take() (mucho más rápido que con strings de Python).
+    """
+    comunas = _cargar_comunas()
+    cod_regiones = np.array([r[0] for r in REGIONES])
+    pesos_region = np.array([r[3] for r in REGIONES], dtype=float)
+
+    # Por región: nombre, abreviatura y comuna capital (XX101) para las sedes
+    region = {}
+    for cod, nombre, abreviatura, _ in REGIONES:
+        codigos, nombres, provincias = comunas[cod]
+        capital = int(np.flatnonzero(codigos == cod * 1000 + 101)[0]) if (codigos == cod * 1000 + 101).any() else 0
+        region[cod] = {"nombre": nombre, "abreviatura": abreviatura, "comuna": nombres[capital].title(), "provincia": provincias[capital]}
+    # Textos por región indexados por cod_region
+    por_region = {
+        campo: pa.array([region[cod][campo] if cod in region else None for cod in range(max(region) + 1)], pa.string())
+        for campo in ("nombre", "abreviatura", "comuna", "provincia")
+    }
+    por_region["sede"] = pa.array([f"SEDE {region[cod]['comuna'].upper()}" if cod in region else None for cod in range(max(region) + 1)], pa.string())
+    por_region["departamento"] = pa.array([f"DEPROV {region[cod]['abreviatura']}" if cod in region else None for cod in range(max(region) + 1)], pa.string())
+
+    programas = []
+    for cod_inst, nombre_inst, tipo, acreditacion, peso_inst, region_central in INSTITUCIONES:
+        for i, (carrera, area, nivel, nivel_1, tipos, semestres, titulacion, grupo, popularidad) in enumerate(CARRERAS):
+            # ECAS solo imparte Contador Auditor
+            if cod_inst == 104 and carrera != "CONTADOR AUDITOR":
+                continue
+            if tipo not in tipos:
+                continue
+            for jornada, peso_jornada in (("Diurna", 0.45), ("Vespertina", 0.55)) if cod_inst == 104 else (("Diurna", 0.65), ("Vespertina", 0.35)):
+                programas.append({
+                    "cod_inst": cod_inst, "nomb_inst": nombre_inst, "tipo": tipo, "acreditacion": acreditacion,
+                    "region_central": region_central or 0, "cod_carrera": cod_inst * 1000 + i * 10 + (jornada == "Vespertina"),
+                    "nomb_carrera": carrera, "area": area, "nivel_global": nivel, "nivel_carrera_1": nivel_1,
+                    "nivel_carrera_2": NIVEL_CARRERA_2[nivel_1], "dur_estudio_carr": semestres, "dur_proceso_tit": titulacion,
+                    "dur_total_carr": semestres + titulacion, "jornada": jornada,
+                    "grupo": "ecas" if cod_inst == 104 else grupo, "peso": peso_inst * popularidad * peso_jornada,
+                    "acreditada_carr": "ACREDITADA" if rng.random() < 0.6 else "NO ACREDITADA",
+                    "valor_arancel": str(int(rng.integers(180, 600)) * 10_000),
+                })
+    programas = pd.DataFrame(programas)
+    for tipo, (tipo_1, tipo_2, tipo_3) in TIPOS_INSTITUCION.items():
+        es_tipo = programas["tipo"] == tipo
+        programas.loc[es_tipo, ["tipo_inst_1", "tipo_inst_2", "tipo_inst_3"]] = (tipo_1, tipo_2, tipo_3)
+    programas["duracion_anios"] = np.ceil(programas["dur_total_carr"] / 2).astype(int)
+    programas["grado"] = np.where(programas["nivel_carrera_1"] == "Profesional Con Licenciatura", "LICENCIADO EN " + programas["area"].str.upper(), None)
+    # Programa de ECAS de la otra jornada (para los cambios de jornada)
+    ecas = programas.index[programas["cod_inst"] == 104]
+    programas["otra_jornada"] = -1
+    programas.loc[ecas, "otra_jornada"] = ecas[::-1]
+
+    por_grupo = {}
+    for grupo in GRUPOS:
+        indices = np.flatnonzero(programas["grupo"] == grupo)
+        pesos = programas["peso"].to_numpy()[indices]
+        por_grupo[grupo] = (indices, pesos / pesos.sum())
+
+    return {
+        "programas": programas,
+        "columnas": {columna: programas[columna].to_numpy() for columna in programas.columns},
+        "textos": {columna: pa.array(programas[columna].tolist(), pa.string()) for columna in programas.columns if programas[columna].dtype == object},
+        "por_region": por_region,
+        "por_grupo": por_grupo,
+        "cod_regiones": cod_regiones,
+        "pesos_region": pesos_region / pesos_region.sum(),
+        "region": region,
+        "comunas": comunas,
+    }
+
+def _elegir_programas(rng, catalogo, grupos):
+    """Un programa por elemento de `grupos` (índices de GRUPOS), según los pesos de cada grupo."""
+    programas = np.empty(len(grupos), dtype=np.int64)
+    for g, grupo in enumerate(GRUPOS):
+        mascara = grupos == g
+        if mascara.any():
+            indices, pesos = catalogo["por_grupo"][grupo]
+            programas[mascara] = rng.choice(indices, size=int(mascara.sum()), p=pesos)
+    return programas
+
+def _elegir_grupos(rng, n, probabilidades):
+    return rng.choice(len(GRUPOS), size=n, p=probabilidades)
+
+# --- Simulación ---
+
+def _simular_bloque(rng, catalogo, primer_mrun, alumnos, proporcion_ecas):
+    """
+    Trayectorias de `alumnos` personas con mrun consecutivos desde `primer_mrun`, más los egresados de media
+    que no se matriculan. Retorna los arreglos de personas, filas de matrícula y titulaciones.
+    """
+    c = catalogo["columnas"]
+    anios = np.arange(ANIO_MIN, ANIO_MAX + 1)
+    pesos_cohorte = 1 + 0.03 * (anios - ANIO_MIN)
+    cohorte = rng.choice(anios, size=alumnos, p=pesos_cohorte / pesos_cohorte.sum())
+    edad_ingreso = rng.choice(EDADES_INGRESO[0], size=alumnos, p=EDADES_INGRESO[1] / EDADES_INGRESO[1].sum())
+    personas = {
+        "gen_alu": rng.choice([1, 2], size=alumnos, p=[0.46, 0.54]),
+        "nacimiento": cohorte - edad_ingreso,
+        "mes_nacimiento": rng.integers(1, 13, size=alumnos),
+        "region": rng.choice(catalogo["cod_regiones"], size=alumnos, p=catalogo["pesos_region"]),
+        "nem": np.round(np.clip(rng.normal(5.6, 0.45, size=alumnos), 4.0, 7.0), 1),
+        "semestre_ingreso": np.where(rng.random(alumnos) < 0.92, 1, 2),
+        "cohorte": cohorte,
+    }
+    # El rendimiento escolar pesa en la deserción y la titulación
+    habilidad = (personas["nem"] - 5.6) / 0.45
+
+    otro = 1 - proporcion_ecas - PROPORCION_CONTABLE
+    proximo = _elegir_programas(rng, catalogo, _elegir_grupos(rng, alumnos, [proporcion_ecas, PROPORCION_CONTABLE, otro, 0.0]))
+    programa = np.full(alumnos, -1)
+    ingreso = np.zeros(alumnos, dtype=np.int64)
+    sede = np.zeros(alumnos, dtype=np.int64)
+    reanuda = cohorte.copy()
+    traslado = np.zeros(alumnos, dtype=bool)
+
+    matriculas, titulaciones = [], []
+    for anio in anios:
+        empieza = np.flatnonzero((programa < 0) & (reanuda == anio))
+        programa[empieza] = proximo[empieza]
+        ingreso[empieza] = anio
+        nacional = c["region_central"][programa[empieza]] == 0
+        sede[empieza] = np.where(nacional, personas["region"][empieza], c["region_central"][programa[empieza]])
+
+        activos = np.flatnonzero(programa >= 0)
+        matriculas.append((activos, np.full(len(activos), anio), programa[activos], ingreso[activos], sede[activos], traslado[activos]))
+        if anio == ANIO_MAX:
+            break
+
+        p = programa[activos]
+        cursados = anio - ingreso[activos] + 1
+        puede_titularse = cursados >= c["duracion_anios"][p]
+        h = habilidad[activos]
+        p_titulacion = np.where(puede_titularse, np.clip(P_TITULACION * np.exp(0.3 * h), 0, 0.95), 0.0)
+        p_desercion = np.where(cursados == 1, P_DESERCION_PRIMER_ANIO, np.where(puede_titularse, P_DESERCION / 2, P_DESERCION))
+        p_desercion = np.clip(p_desercion * np.exp(-0.4 * h), 0, 0.9)
+        p_desercion[cursados >= c["duracion_anios"][p] + ANIOS_MAXIMOS_EXTRA] = 1.0
+        azar = rng.random(len(activos))
+        titula = azar < p_titulacion
+        deserta = ~titula & (azar < p_titulacion + p_desercion)
+
+        tit = activos[titula]
+        titulaciones.append((tit, np.full(len(tit), anio), programa[tit], ingreso[tit], sede[tit], traslado[tit]))
+
+        # Después de titularse o desertar: estudios posteriores / traslado, o fin de la trayectoria
+        salen = activos[titula | deserta]
+        titulado = titula[titula | deserta]
+        programa[salen] = -1
+        continua = rng.random(len(salen)) < np.where(titulado, P_ESTUDIOS_POSTERIORES, P_TRASLADO)
+        reanuda[salen[~continua]] = ANIO_MAX + 1
+        siguen, siguen_titulados = salen[continua], titulado[continua]
+        pausa = np.where(
+            siguen_titulados,
+            rng.choice([1, 2, 3, 4], size=len(siguen), p=[0.4, 0.3, 0.2, 0.1]),
+            rng.choice([1, 2, 3, 4], size=len(siguen), p=[0.55, 0.25, 0.12, 0.08]),
+        )
+        reanuda[siguen] = anio + pausa
+        traslado[siguen] = ~siguen_titulados
+        grupos = np.empty(len(siguen), dtype=np.int64)
+        grupo_anterior = pd.Series(catalogo["programas"]["grupo"].to_numpy()[p[titula | deserta][continua]])
+        desde_contable = grupo_anterior.isin(["ecas", "contable"]).to_numpy()
+        tras_titulo = siguen_titulados
+        casos = (
+            (tras_titulo, [0.0, 0.10, 0.30, 0.60]),
+            (~tras_titulo & desde_contable, [0.05, 0.40, 0.55, 0.0]),
+            (~tras_titulo & ~desde_contable, [min(2 * proporcion_ecas, 0.5), 0.10, 0.90 - min(2 * proporcion_ecas, 0.5), 0.0]),
+        )
+        for mascara, probabilidades in casos:
+            grupos[mascara] = _elegir_grupos(rng, int(mascara.sum()), probabilidades)
+        proximo[siguen] = _elegir_programas(rng, catalogo, grupos)
+
+        # Cambio de jornada dentro de ECAS (mantiene el año de ingreso)
+        quedan = activos[~(titula | deserta)]
+        en_ecas = quedan[c["otra_jornada"][programa[quedan]] >= 0]
+        cambian = en_ecas[rng.random(len(en_ecas)) < P_CAMBIO_JORNADA_ECAS]
+        programa[cambian] = c["otra_jornada"][programa[cambian]]
+
+    def _unir(partes):
+        return [np.concatenate(columna) for columna in zip(*partes)]
+
+    return {
+        "primer_mrun": primer_mrun,
+        "personas": personas,
+        "matriculas": _unir(matriculas),
+        "titulaciones": _unir(titulaciones),
+    }
+
+def _tomar(valores, indices):
+    """valores[indices] con valores un arreglo de Arrow (textos de un catálogo chico)."""
+    return valores.take(pa.array(indices))
+
+def _constante(valor, n):
+    return _tomar(pa.array([valor], pa.string()), np.zeros(n, dtype=np.int32))
+
+def _textos_por_clave(claves, formato):
+    """Un texto por fila calculado solo para cada clave distinta (formato recibe la clave)."""
+    distintas, inversa = np.unique(claves, return_inverse=True)
+    return _tomar(pa.array([formato(int(clave)) for clave in distintas], pa.string()), inversa)
+
+def _rango_edad(edad):
+    return _tomar(pa.array(RANGOS_EDAD), np.searchsorted(LIMITES_EDAD, edad, side="right"))
+
+def _columnas_programa(catalogo, programa, sede, anio):
+    """Columnas de matrícula/titulación que dependen del programa, la sede y el año."""
+    c, textos, por_region = catalogo["columnas"], catalogo["textos"], catalogo["por_region"]
+    cod_inst = c["cod_inst"][programa]
+    acreditacion = c["acreditacion"][programa].copy()
+    es_ecas = cod_inst == 104
+    if es_ecas.any():
+        acreditacion[es_ecas] = np.array([ACREDITACION_ECAS[a] for a in range(ANIO_MIN, ANIO_MAX + 1)])[anio[es_ecas] - ANIO_MIN]
+    # Período de acreditación vigente: tramos de `acreditacion` años contados desde 2000
+    desde = anio - (anio - 2000) % np.where(acreditacion < 99, acreditacion, 1)
+    codigo_programa = len(c["cod_inst"]) * sede + programa
+    n = len(programa)
+    return {
+        "codigo_unico": _textos_por_clave(
+            codigo_programa, lambda clave: f"I{c['cod_inst'][clave % len(c['cod_inst'])]}S{clave // len(c['cod_inst'])}C{c['cod_carrera'][clave % len(c['cod_inst'])]}V1"
+        ),
+        "tipo_inst_1": _tomar(textos["tipo_inst_1"], programa),
+        "tipo_inst_2": _tomar(textos["tipo_inst_2"], programa),
+        "tipo_inst_3": _tomar(textos["tipo_inst_3"], programa),
+        "cod_inst": cod_inst,
+        "nomb_inst": _tomar(textos["nomb_inst"], programa),
+        "cod_sede": cod_inst * 100 + sede,
+        "nomb_sede": _tomar(por_region["sede"], sede),
+        "cod_carrera": c["cod_carrera"][programa],
+        "nomb_carrera": _tomar(textos["nomb_carrera"], programa),
+        "modalidad": _constante("Presencial", n),
+        "jornada": _tomar(textos["jornada"], programa),
+        "version": _constante("1", n),
+        "tipo_plan_carr": _constante("Plan Regular", n),
+        "dur_estudio_carr": c["dur_estudio_carr"][programa],
+        "dur_proceso_tit": c["dur_proceso_tit"][programa],
+        "dur_total_carr": c["dur_total_carr"][programa],
+        "region_sede": _tomar(por_region["nombre"], sede),
+        "provincia_sede": _tomar(por_region["provincia"], sede),
+        "comuna_sede": _tomar(por_region["comuna"], sede),
+        "nivel_global": _tomar(textos["nivel_global"], programa),
+        "nivel_carrera_1": _tomar(textos["nivel_carrera_1"], programa),
+        "nivel_carrera_2": _tomar(textos["nivel_carrera_2"], programa),
+        "area_conocimiento": _tomar(textos["area"], programa),
+        "acreditada_carr": _tomar(textos["acreditada_carr"], programa),
+        "acreditada_inst": _tomar(pa.array(["ACREDITADA", "NO ACREDITADA"]), (acreditacion >= 99).astype(np.int32)),
+        "acre_inst_desde_hasta": _textos_por_clave(
+            np.where(acreditacion < 99, desde * 100 + acreditacion, 0),
+            lambda clave: f"{clave // 100}-{clave // 100 + clave % 100}" if clave else None,
+        ),
+        "acre_inst_anio": acreditacion,
+        "valor_arancel": _tomar(textos["valor_arancel"], programa),
+        "grado": _tomar(textos["grado"], programa),
+    }
+
+def _tabla_matriculas(bloque, catalogo):
+    personas = bloque["personas"]
+    alumno, anio, programa, ingreso, sede, traslado = bloque["matriculas"]
+    columnas = _columnas_programa(catalogo, programa, sede, anio)
+    semestre = _tomar(pa.array(["1", "2"]), personas["semestre_ingreso"][alumno] - 1)
+    n = len(alumno)
+    columnas.update({
+        "cat_periodo": anio,
+        "mrun": pa.array(bloque["primer_mrun"] + alumno).cast(pa.string()),
+        "gen_alu": personas["gen_alu"][alumno],
+        "rango_edad": _rango_edad(anio - personas["nacimiento"][alumno]),
+        "fec_nac_alu": personas["nacimiento"][alumno] * 100 + personas["mes_nacimiento"][alumno],
+        "anio_ing_carr_ori": ingreso,
+        "sem_ing_carr_ori": semestre,
+        "anio_ing_carr_act": ingreso,
+        "sem_ing_carr_act": semestre,
+        "requisito_ingreso": _constante("Educación Media", n),
+        "vigencia_carrera": _constante("Vigente con alumnos nuevos", n),
+        "valor_matricula": _constante("150000", n),
+        "cine_f_97_area": columnas["area_conocimiento"],
+        "cine_f_13_area": columnas["area_conocimiento"],
+        "area_carrera_generica": columnas["nomb_carrera"],
+        "forma_de_ingreso": _tomar(pa.array(["Ingreso Directo (regular)", "Otras formas de ingreso"]), traslado.astype(np.int32)),
+    })
+    return _a_tabla(columnas, COLUMNAS_MATRICULAS, ENTEROS_MATRICULAS)
+
+def _tabla_titulados(rng, bloque, catalogo):
+    personas = bloque["personas"]
+    alumno, anio, programa, ingreso, sede, _ = bloque["titulaciones"]
+    columnas = _columnas_programa(catalogo, programa, sede, anio)
+    # Una parte de los títulos de ECAS viene sin nombre (tables.actualizar_campos_titulados los completa)
+    sin_titulo = (columnas["cod_inst"] == 104) & (rng.random(len(alumno)) < 0.1)
+    mes = rng.choice(np.arange(1, 13), size=len(alumno), p=np.array([3, 2, 1, 1, 1, 1, 2, 1, 1, 1, 2, 4]) / 20)
+    semestre = _tomar(pa.array(["1", "2"]), personas["semestre_ingreso"][alumno] - 1)
+    columnas.update({
+        "cat_periodo": anio,
+        "mrun": pa.array(bloque["primer_mrun"] + alumno).cast(pa.string()),
+        "gen_alu": personas["gen_alu"][alumno],
+        "fec_nac_alu": personas["nacimiento"][alumno] * 100 + personas["mes_nacimiento"][alumno],
+        "rango_edad": _rango_edad(anio - personas["nacimiento"][alumno]),
+        "anio_ing_carr_ori": ingreso,
+        "sem_ing_carr_ori": semestre,
+        "anio_ing_carr_act": ingreso,
+        "sem_ing_carr_act": semestre,
+        "nombre_titulo_obtenido": pc.if_else(pa.array(sin_titulo), pa.scalar(None, pa.string()), columnas["nomb_carrera"]),
+        "nombre_grado_obtenido": columnas["grado"],
+        "fecha_obtencion_titulo": pa.array(anio * 10000 + mes * 100 + rng.integers(1, 29, size=len(alumno))).cast(pa.string()),
+    })
+    return _a_tabla(columnas, COLUMNAS_TITULADOS, ENTEROS_MATRICULAS)
+
+def _egresados(rng, bloque, catalogo, alumnos_sin_matricula):
+    """Egresados de media: uno por alumno (antes de su primera matrícula) y los que no siguen estudios."""
+    personas = bloque["personas"]
+    n = len(personas["cohorte"])
+    egreso = np.minimum(personas["cohorte"] - 1, personas["nacimiento"] + 17 + rng.integers(0, 2, size=n))
+    region = personas["region"]
+    nem = personas["nem"]
+    mrun = bloque["primer_mrun"] + np.arange(n)
+    # Quienes eligen carreras contables vienen más seguido de la enseñanza técnico-profesional comercial
+    alumno, _, programa, _, _, _ = bloque["matriculas"]
+    matriculados, primera = np.unique(alumno, return_index=True)
+    contable = np.zeros(n, dtype=bool)
+    contable[matriculados] = np.isin(catalogo["columnas"]["grupo"][programa[primera]], ["ecas", "contable"])
+
+    extra = alumnos_sin_matricula
+    egreso = np.concatenate([egreso, rng.integers(ANIO_MIN_EGRESO, ANIO_MAX + 1, size=extra)])
+    region = np.concatenate([region, rng.choice(catalogo["cod_regiones"], size=extra, p=catalogo["pesos_region"])])
+    nem = np.concatenate([nem, np.round(np.clip(rng.normal(5.3, 0.5, size=extra), 4.0, 7.0), 1)])
+    mrun = np.concatenate([mrun, bloque["primer_mrun"] + n + np.arange(extra)])
+    contable = np.concatenate([contable, np.zeros(extra, dtype=bool)])
+
+    validos = egreso >= ANIO_MIN_EGRESO
+    egreso, region, nem, mrun, contable = egreso[validos], region[validos], nem[validos], mrun[validos], contable[validos]
+    total = len(mrun)
+
+    # Comuna del establecimiento dentro de la región (las primeras de cada región concentran más egresados)
+    comuna = np.zeros(total, dtype=np.int64)
+    for cod, (codigos, _, _) in catalogo["comunas"].items():
+        en_region = np.flatnonzero(region == cod)
+        if len(en_region):
+            pesos = 1.0 / np.arange(1, len(codigos) + 1)
+            comuna[en_region] = codigos[rng.choice(len(codigos), size=len(en_region), p=pesos / pesos.sum())]
+    nombres_comuna = {codigo: nombre for codigos, nombres, _ in catalogo["comunas"].values() for codigo, nombre in zip(codigos.tolist(), nombres.tolist())}
+
+    ensenianza = np.where(
+        contable & (rng.random(total) < 0.35), 410,
+        rng.choice([310, 410, 510, 610, 710, 810], size=total, p=[0.62, 0.15, 0.12, 0.05, 0.04, 0.02]),
+    )
+    dependencia = np.where(
+        egreso >= 2018,
+        rng.choice([1, 2, 3, 4, 5], size=total, p=[0.30, 0.53, 0.08, 0.02, 0.07]),
+        rng.choice([1, 2, 3, 4, 5], size=total, p=[0.36, 0.53, 0.08, 0.03, 0.0]),
+    )
+    columnas = {
+        "periodo": egreso,
+        "mrun": mrun,
+        "mascara_provisoria": None,
+        "rbd": region * 2000 + rng.integers(1, 2000, size=total),
+        "cod_region": region,
+        "nomb_region": _tomar(catalogo["por_region"]["abreviatura"], region),
+        "cod_provincia": comuna // 100,
+        "cod_comuna": comuna,
+        "nomb_comuna": _textos_por_clave(comuna, nombres_comuna.get),
+        "cod_departamento": region * 10 + 1,
+        "nomb_departamento": _tomar(catalogo["por_region"]["departamento"], region),
+        "cod_ensenianza": ensenianza,
+        "cod_grado": np.full(total, 4),
+        "cod_dependencia": dependencia,
+        # Administración delegada y servicios locales se agrupan con los municipales
+        "cod_dep_agrupado": np.where(np.isin(dependencia, [4, 5]), 1, dependencia),
+        "indice_rural": (rng.random(total) < 0.12).astype(int),
+        "prom_notas_alu": nem,
+        "origen_dato": _constante("1", total),
+        "ense_completa": np.ones(total, dtype=int),
+        "marca_egreso": np.ones(total, dtype=int),
+    }
+    tipos = {columna: pa.int64() if columna in ("mrun", "mascara_provisoria") else pa.int32() for columna in ENTEROS_EGRESADOS}
+    tipos["prom_notas_alu"] = pa.float64()
+    parquet = _a_tabla(columnas, list(COLUMNAS_EGRESADOS.values()), tipos)
+
+    # El CSV de MINEDUC usa coma decimal en el promedio de notas
+    decimas = np.round(nem * 10).astype(np.int64)
+    texto = dict(columnas, prom_notas_alu=_textos_por_clave(decimas, lambda d: f"{d // 10},{d % 10}"))
+    csv = _a_tabla(texto, list(COLUMNAS_EGRESADOS.values()), {c: t for c, t in tipos.items() if c != "prom_notas_alu"})
+    csv = csv.rename_columns(list(COLUMNAS_EGRESADOS))
+    return parquet, csv
+
+# --- umasnet (sistema académico de ECAS) ---
+
+def _rut(numeros):
+    """RUT con dígito verificador (módulo 11) para cada número."""
+    resultado = []
+    for numero in numeros.tolist():
+        suma, factor, resto = 0, 2, numero
+        while resto:
+            suma += (resto % 10) * factor
+            resto //= 10
+            factor = factor + 1 if factor < 7 else 2
+        digito = 11 - suma % 11
+        resultado.append(f"{numero}-{'0' if digito == 11 else 'K' if digito == 10 else digito}")
+    return np.array(resultado, dtype=object)
+
+def _umasnet(rng, bloque, catalogo, estado):
+    """MT_ALUMNO, MT_CLIENT y RA_NOTA de los alumnos de ECAS del bloque; acumula los conteos de RC_Contador."""
+    personas = bloque["personas"]
+    alumno, anio, programa, ingreso, _, traslado = bloque["matriculas"]
+    en_ecas = catalogo["columnas"]["cod_inst"][programa] == 104
+    alumno, anio, programa, ingreso, traslado = alumno[en_ecas], anio[en_ecas], programa[en_ecas], ingreso[en_ecas], traslado[en_ecas]
+    jornada = np.where(catalogo["columnas"]["jornada"][programa] == "Diurna", "D", "V")
+
+    # Una estadía en ECAS (alumno, año de ingreso) = un CODCLI; la jornada es la de la primera matrícula
+    filas = pd.DataFrame({"alumno": alumno, "anio": anio, "ingreso": ingreso, "jornada": jornada, "traslado": traslado})
+    estadias = filas.sort_values("anio").groupby(["alumno", "ingreso"], sort=True).agg(
+        jornada=("jornada", "first"), ultimo=("anio", "max"), traslado=("traslado", "first")
+    ).reset_index()
+    t_alumno, t_anio, t_programa, t_ingreso, _, _ = bloque["titulaciones"]
+    tituladas = pd.DataFrame({"alumno": t_alumno, "ingreso": t_ingreso, "ANOTIT": t_anio})[catalogo["columnas"]["cod_inst"][t_programa] == 104]
+    estadias = estadias.merge(tituladas, on=["alumno", "ingreso"], how="left")
+
+    codigos = []
+    for ano in estadias["ingreso"].to_numpy():
+        secuencia = estado["secuencias"].get(ano, 0) + 1
+        estado["secuencias"][ano] = secuencia
+        codigos.append(f"{ano % 100:02d}{secuencia:06d}")
+    estadias["CODCLI"] = codigos
+    estadias["RUT"] = _rut(10_000_000 + bloque["primer_mrun"] + estadias["alumno"].to_numpy())
+    estadias["PERIODO"] = personas["semestre_ingreso"][estadias["alumno"].to_numpy()]
+    titulado = estadias["ANOTIT"].notna().to_numpy()
+    vigente = estadias["ultimo"].to_numpy() == ANIO_MAX
+    estadias["ESTACAD"] = np.where(titulado, "TITULADO", np.where(vigente, "VIGENTE", np.where(rng.random(len(estadias)) < 0.7, "RETIRADO", "ELIMINADO")))
+    estadias["CODCARR"] = "CA"
+    alumnos = estadias.rename(columns={"ingreso": "ANO", "jornada": "JORNADA"})
+    mt_alumno = alumnos[["CODCLI", "RUT", "CODCARR", "ANO", "PERIODO", "JORNADA", "ESTACAD", "ANOTIT"]].astype({"ANOTIT": "Int32"})
+
+    unicos = alumnos.drop_duplicates("RUT")
+    a = unicos["alumno"].to_numpy()
+    vias = np.array([v[0] for v in VIAS_ADMISION])
+    via = rng.choice(vias, size=len(a), p=[v[2] for v in VIAS_ADMISION])
+    via[unicos["traslado"].to_numpy()] = 4
+    comunas = catalogo["comunas"][13]
+    mt_client = pd.DataFrame({
+        "CODCLI": unicos["RUT"].to_numpy(),
+        "SEXO": np.where(personas["gen_alu"][a] == 1, "M", "F"),
+        "FECNAC": pd.to_datetime(pd.DataFrame({
+            "year": personas["nacimiento"][a], "month": personas["mes_nacimiento"][a], "day": rng.integers(1, 29, size=len(a)),
+        })).dt.date,
+        "NACIONALIDAD": rng.choice(NACIONALIDADES[0], size=len(a), p=NACIONALIDADES[1]),
+        "COMUNA": rng.choice(comunas[1], size=len(a)),
+        "VIADMISION": via,
+        "CodModalidad": rng.choice([m[0] for m in MODALIDADES], size=len(a), p=[m[2] for m in MODALIDADES]),
+    })
+
+    # RA_NOTA: cinco ramos por semestre cursado
+    codcli = filas.merge(alumnos[["alumno", "ANO", "CODCLI", "PERIODO"]], left_on=["alumno", "ingreso"], right_on=["alumno", "ANO"])
+    n = len(codcli)
+    semestres = np.tile([1, 2], n)
+    fila = np.repeat(np.arange(n), 2)
+    # Quien ingresa en el segundo semestre no tiene notas del primero de su año de ingreso
+    cursado = ~((semestres == 1) & (codcli["PERIODO"].to_numpy()[fila] == 2) & (codcli["anio"].to_numpy()[fila] == codcli["ANO"].to_numpy()[fila]))
+    fila, semestres = fila[cursado], semestres[cursado]
+    fila, semestres = np.repeat(fila, len(ASIGNATURAS)), np.repeat(semestres, len(ASIGNATURAS))
+    ramo = np.tile(np.arange(len(ASIGNATURAS)), len(fila) // len(ASIGNATURAS))
+    anio_nota = codcli["anio"].to_numpy()[fila]
+    ano = codcli["ANO"].to_numpy()[fila]
+    nivel = np.minimum((anio_nota - ano) * 2 + semestres, SEMESTRES_PLAN)
+    plan = (ano >= COHORTE_PLAN_NUEVO).astype(int)
+    habilidad = (personas["nem"][codcli["alumno"].to_numpy()[fila]] - 5.6) / 0.45
+    nota = np.round(np.clip(rng.normal(4.8 + 0.6 * habilidad, 1.0), 1.0, 7.0), 1)
+    ra_nota = pd.DataFrame({
+        "CODCLI": codcli["CODCLI"].to_numpy()[fila],
+        "ANO": anio_nota,
+        "PERIODO": semestres,
+        "CODRAMO": estado["codigos_ramo"][(plan * SEMESTRES_PLAN + nivel - 1) * len(ASIGNATURAS) + ramo],
+        "NOTA": nota,
+        "ESTADO": np.where(nota >= 4.0, "A", "R"),
+    })
+
+    # RC_Contador: nuevos (año de ingreso) y antiguos por año y jornada
+    nuevos = codcli["anio"].to_numpy() == codcli["ANO"].to_numpy()
+    conteo = pd.DataFrame({"anio": codcli["anio"], "jornada": codcli["jornada"], "nuevo": nuevos}).value_counts()
+    for (anio_conteo, jornada_conteo, nuevo), cantidad in conteo.items():
+        clave = (int(anio_conteo), jornada_conteo, bool(nuevo))
+        estado["contador"][clave] = estado["contador"].get(clave, 0) + int(cantidad)
+
+    return {"MT_ALUMNO": mt_alumno, "MT_CLIENT": mt_client, "RA_NOTA": ra_nota}
+
+def _codigos_ramo():
+    return np.array([
+        f"C{'AB'[plan]}{semestre:02d}{ramo}"
+        for plan in range(2) for semestre in range(1, SEMESTRES_PLAN + 1) for ramo in range(len(ASIGNATURAS))
+    ])
+
+def _catalogos_umasnet(rng, estado):
+    """Tablas de umasnet que no dependen de los alumnos, más RC_Contador y MT_VACANTES con los conteos acumulados."""
+    codigos = estado["codigos_ramo"]
+    nombres = [f"{ASIGNATURAS[ramo]} {ROMANOS[semestre - 1]}" for plan in range(2) for semestre in range(1, SEMESTRES_PLAN + 1) for ramo in range(len(ASIGNATURAS))]
+    mitad = len(codigos) // 2
+    ra_ramo = pd.DataFrame({"CODRAMO": codigos, "NOMBRE": nombres, "ESTADO": ["NO VIGENTE"] * mitad + ["VIGENTE"] * mitad})
+    # Los ramos del plan antiguo convalidan con el mismo ramo del plan nuevo; algunos no tienen equivalente
+    ra_equiv = pd.DataFrame({"CODRAMO": codigos[:mitad], "RAMOEQUIV": np.where(rng.random(mitad) < 0.9, codigos[mitad:], None)})
+
+    filas_contador, vacantes = [], []
+    for anio in range(ANIO_MIN, ANIO_MAX + 1):
+        cantidades = {
+            f"{'Nue' if nuevo else 'Ant'}{'Diurnos' if jornada == 'D' else 'Vesp'}_tot": estado["contador"].get((anio, jornada, nuevo), 0)
+            for jornada in "DV" for nuevo in (True, False)
+        }
+        # Varias fotos por año; la consulta toma la más reciente
+        for mes, avance in ((1, 0.6), (3, 0.9), (4, 1.0)):
+            fila = {columna: int(round(valor * avance)) for columna, valor in cantidades.items()}
+            fila.update({"FECHA": pd.Timestamp(anio, mes, 15).date(), "añomat": anio, "Total_tot": sum(fila.values())})
+            filas_contador.append(fila)
+        for jornada, columna in (("D", "NueDiurnos_tot"), ("V", "NueVesp_tot")):
+            vacantes.append({"ANO": anio, "JORNADA": jornada, "VACANTES": int(cantidades[columna] * rng.uniform(1.05, 1.3)) + 10})
+    rc_contador = pd.DataFrame(filas_contador)[["FECHA", "añomat", "AntDiurnos_tot", "AntVesp_tot", "NueDiurnos_tot", "NueVesp_tot", "Total_tot"]]
+    return {
+        "RA_RAMO": ra_ramo,
+        "RA_EQUIV": ra_equiv,
+        "RC_Contador": rc_contador,
+        "MT_VACANTES": pd.DataFrame(vacantes),
+        "MT_VIADMISION": pd.DataFrame([(cod, descripcion) for cod, descripcion, _ in VIAS_ADMISION], columns=["COD_VIA", "DESCRIPCION"]),
+        "MT_MODALIDAD": pd.DataFrame([(cod, descripcion) for cod, descripcion, _ in MODALIDADES], columns=["CODMODALIDAD", "DESCRIPCION"]),
+    }
+
+# --- Escritura ---
+
+def _a_tabla(columnas, orden, tipos):
+    """Tabla de Arrow con las columnas en `orden`; `tipos` son las enteras (conjunto) o {columna: tipo}."""
+    if not isinstance(tipos, dict):
+        tipos = {columna: pa.int32() for columna in tipos}
+    n = max(len(v) for v in columnas.values() if v is not None)
+    arreglos, campos = [], []
+    for columna in orden:
+        tipo = tipos.get(columna, pa.string())
+        valores = columnas.get(columna)
+        if valores is None:
+            arreglos.append(pa.nulls(n, type=tipo))
+        elif isinstance(valores, pa.Array):
+            arreglos.append(valores.cast(tipo))
+        else:
+            arreglos.append(pa.array(valores, type=tipo, from_pandas=True))
+        campos.append(pa.field(columna, tipo))
+    return pa.Table.from_arrays(arreglos, schema=pa.schema(campos))
+
+def _abrir_escritores(destino, formatos):
+    return {"destino": destino, "formatos": formatos, "csv": {}, "parquet": {}, "filas": {}}
+
+def _escribir(escritores, tabla, datos, carpeta=None, archivo=None, csv=None, bom=False):
+    """
+    Agrega `datos` (tabla de Arrow o DataFrame) al Parquet de `tabla` y, si corresponde, al CSV
+    <carpeta>/<archivo> (por defecto con las mismas columnas; `csv` permite otra versión de los datos).
+    """
+    if isinstance(datos, pd.DataFrame):
+        if datos.empty:
+            # Sin filas no hay tipos que inferir (un bloque pequeño puede no tener alumnos de ECAS)
+            return
+        datos = pa.Table.from_pandas(datos, preserve_index=False)
+    escritores["filas"][tabla] = escritores["filas"].get(tabla, 0) + datos.num_rows
+    if "parquet" in escritores["formatos"]:
+        escritor = escritores["parquet"].get(tabla)
+        if escritor is None:
+            os.makedirs(os.path.join(escritores["destino"], "parquet"), exist_ok=True)
+            ruta = os.path.join(escritores["destino"], "parquet", f"{tabla}.parquet")
+            escritor = escritores["parquet"][tabla] = pq.ParquetWriter(ruta, datos.schema)
+        escritor.write_table(datos)
+    if "csv" in escritores["formatos"] and carpeta:
+        datos_csv = csv if csv is not None else datos
+        ruta = os.path.join(escritores["destino"], carpeta, archivo or f"{tabla}.csv")
+        entrada = escritores["csv"].get(ruta)
+        if entrada is None:
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            salida = open(ruta, "wb")
+            if bom:
+                salida.write("\ufeff".encode("utf-8"))
+            opciones = pa_csv.WriteOptions(delimiter=";", quoting_style="none")
+            entrada = escritores["csv"][ruta] = (salida, pa_csv.CSVWriter(salida, datos_csv.schema, write_options=opciones))
+        entrada[1].write_table(datos_csv)
+
+def _escribir_por_anio(escritores, tabla, datos, columna_anio, carpeta, prefijo, csv=None, bom=False):
+    """Un CSV por año (como los publica MINEDUC) y un solo Parquet por tabla."""
+    anios = datos.column(columna_anio).to_numpy(zero_copy_only=False)
+    for anio in np.unique(anios):
+        filas = np.flatnonzero(anios == anio)
+        _escribir(
+            escritores, tabla, datos.take(filas), carpeta, f"{prefijo}_{anio}.csv",
+            csv=csv.take(filas) if csv is not None else None, bom=bom,
+        )
+
+def _cerrar_escritores(escritores):
+    for salida, escritor in escritores["csv"].values():
+        escritor.close()
+        salida.close()
+    for escritor in escritores["parquet"].values():
+        escritor.close()
+
+# --- Generación ---
+
+def leer_escala(texto):
+    """'100k', '2.5M', '100M' o un entero -> cantidad de filas."""
+    texto = str(texto).strip().lower().replace("_", "")
+    multiplicador = {"k": 1_000, "m": 1_000_000}.get(texto[-1:], 1)
+    return int(float(texto[:-1] if multiplicador > 1 else texto) * multiplicador)
+
+def generar(filas=1_000_000, destino="datos_sinteticos", semilla=42, proporcion_ecas=PROPORCION_ECAS, formatos=("csv", "parquet")):
+    """Genera todas las tablas en `destino`; retorna {tabla: filas escritas}."""
+    rng = np.random.default_rng(semilla)
+    catalogo = _catalogo(rng)
+    estado = {"secuencias": {}, "contador": {}, "codigos_ramo": _codigos_ramo()}
+    escritores = _abrir_escritores(destino, set(formatos))
+    inicio = time.perf_counter()
+    print(f"--- Generando ~{filas:,} matrículas en {destino} (semilla {semilla}, ECAS {proporcion_ecas:.1%}) ---")
+
+    # Se corrige con cada bloque; el primero es chico para calibrar la escala
+    filas_por_alumno = 4.0
+    siguiente_mrun = 1
+    escritas = 0
+    try:
+        while escritas < filas:
+            alumnos = int(min(ALUMNOS_POR_BLOQUE, max(1000, math.ceil((filas - escritas) / filas_por_alumno))))
+            if not escritas:
+                alumnos = max(1000, alumnos // 4)
+            bloque = _simular_bloque(rng, catalogo, siguiente_mrun, alumnos, proporcion_ecas)
+            sin_matricula = int(alumnos * EGRESADOS_SIN_MATRICULA)
+
+            matriculas = _tabla_matriculas(bloque, catalogo)
+            _escribir_por_anio(escritores, "matriculas_mrun", matriculas, "cat_periodo", "datos", "matriculas")
+            titulados = _tabla_titulados(rng, bloque, catalogo)
+            _escribir_por_anio(escritores, "titulados_mrun", titulados, "cat_periodo", "titulados", "titulados")
+            egresados, egresados_csv = _egresados(rng, bloque, catalogo, sin_matricula)
+            _escribir_por_anio(escritores, "egresados_mrun", egresados, "periodo", "egresados", "egresados", csv=egresados_csv, bom=True)
+            for tabla, datos in _umasnet(rng, bloque, catalogo, estado).items():
+                _escribir(escritores, tabla, datos, "umasnet")
+
+            escritas += matriculas.num_rows
+            filas_por_alumno = max(matriculas.num_rows / alumnos, 1.0)
+            siguiente_mrun += alumnos + sin_matricula
+            print(f"{escritas:>14,} matrículas ({min(escritas / filas, 1):.0%}) {time.perf_counter() - inicio:>8.1f} s")
+
+        for tabla, datos in _catalogos_umasnet(rng, estado).items():
+            _escribir(escritores, tabla, datos, "umasnet")
+    finally:
+        _cerrar_escritores(escritores)
+
+    print(f"Datos sintéticos generados en {time.perf_counter() - inicio:.1f} s:")
+    for tabla, cantidad in escritores["filas"].items():
+        print(f"{tabla:<20} {cantidad:>14,} filas")
+    return dict(escritores["filas"])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera datos sintéticos con la forma de las tablas de producción.")
+    parser.add_argument("--filas", default="1M", help="filas aproximadas de matriculas_mrun (100k a 100M)")
+    parser.add_argument("--destino", default=os.path.join(RAIZ_PROYECTO, "datos_sinteticos"))
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--proporcion-ecas", type=float, default=PROPORCION_ECAS, help="fracción de los ingresos que son a ECAS (cod_inst 104)")
+    parser.add_argument("--formatos", default="csv,parquet", help="csv, parquet o ambos separados por coma")
+    argumentos = parser.parse_args()
+    generar(
+        leer_escala(argumentos.filas), argumentos.destino, argumentos.semilla,
+        argumentos.proporcion_ecas, tuple(f.strip() for f in argumentos.formatos.split(",")),
+    )
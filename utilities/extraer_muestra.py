@@ -0,0 +1,284 @@
+"""
+Extracción de una muestra anonimizada de matriculas_mrun, titulados_mrun y egresados_mrun.
+
+Los datos sintéticos no reproducen el sesgo real (pocas instituciones muy grandes, alumnos con muchas
+re-matrículas); esta muestra sí, y se puede llevar fuera de la red para medir con datos realistas.
+La muestra se toma por alumno: un mrun entra si (mrun * 2654435761 + semilla) % 1.000.000 cae bajo la
+fracción pedida, con la misma expresión en las tres tablas. Así cada alumno elegido llega con toda su
+historia (todas sus matrículas, títulos y egresos de media) y los cruces por mrun conservan su cardinalidad.
+Con --todos-ecas se agregan además todos los alumnos que alguna vez se matricularon en ECAS (cod_inst 104),
+que en una muestra uniforme quedarían muy pocos para los dashboards.
+
+Anonimización:
+    mrun                 se reemplaza por un hash BLAKE2b de 63 bits con sal (el mismo mrun da el mismo hash
+                         en las tres tablas, y con la misma sal en extracciones distintas)
+    mascara_provisoria   (MRUN_IPE de egresados) igual que mrun, en su propio espacio de hashes
+    fec_nac_alu          se deja solo el año (AAAA01); --conservar-nacimiento la mantiene
+La sal se toma de --sal o de ECAS_SAL_ANONIMIZACION; si no se indica se genera una al azar y no se guarda,
+así los hashes no se pueden revertir ni cruzar con otra extracción. Nunca se escribe en la salida.
+
+Se escribe con la misma estructura que utilities.datos_sinteticos:
+    <destino>/datos/       matriculas_mrun: un CSV por año (tables.cargar_matriculas_con_mapeo)
+    <destino>/titulados/   titulados_mrun: un CSV por año (tables.cargar_titulados_con_mapeo)
+    <destino>/egresados/   egresados_mrun: un CSV por año con los nombres de columna de MINEDUC (tables.cargar_egresados)
+    <destino>/parquet/     las tres tablas con los nombres y tipos de columna de SQL Server
+
+Uso (desde la raíz del proyecto):
+    python -m utilities.extraer_muestra --fraccion 0.02 --todos-ecas --sal "$ECAS_SAL_ANONIMIZACION"
+    python -m utilities.extraer_muestra --origen datos_sinteticos/parquet --fraccion 0.1 --formatos parquet
+    python -m utilities.extraer_muestra --fraccion 0.01 --verificar
+
+--origen lee los Parquet de un directorio (<tabla>.parquet o parquet/<tabla>.parquet) en vez de SQL Server.
+--verificar compara la muestra con el origen completo: alumnos, filas por alumno y participación de las
+instituciones más grandes en las matrículas.
+"""
+import argparse
+import hashlib
+import os
+import secrets
+import time
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from utilities.datos_sinteticos import COLUMNAS_EGRESADOS, _abrir_escritores, _cerrar_escritores, _escribir_por_anio
+
+RAIZ_PROYECTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# tabla -> (columna de año, carpeta de los CSV, prefijo de los CSV)
+TABLAS = {
+    "matriculas_mrun": ("cat_periodo", "datos", "matriculas"),
+    "titulados_mrun": ("cat_periodo", "titulados", "titulados"),
+    "egresados_mrun": ("periodo", "egresados", "egresados"),
+}
+COD_INST_ECAS = 104
+# Multiplicador de Knuth: reparte los mrun consecutivos de forma pareja entre las clases del módulo
+MULTIPLICADOR_MUESTRA = 2654435761
+MODULO_MUESTRA = 1_000_000
+FILAS_POR_LOTE = 200_000
+INSTITUCIONES_VERIFICACION = 5
+
+# --- Origen de los datos ---
+
+def abrir_origen(directorio=None):
+    """SQL Server (DATOSACADEMICOS) o, con `directorio`, DuckDB sobre los Parquet de ese directorio."""
+    if directorio is None:
+        from conn_db import DATABASE2, get_engine
+        return {"tipo": "mssql", "engine": get_engine(DATABASE2), "descripcion": DATABASE2}
+
+    import duckdb
+    con = duckdb.connect()
+    for tabla in TABLAS:
+        for ruta in (os.path.join(directorio, f"{tabla}.parquet"), os.path.join(directorio, "parquet", f"{tabla}.parquet")):
+            if os.path.exists(ruta):
+                ruta_sql = ruta.replace("\\", "/").replace("'", "''")
+                con.execute(f"CREATE VIEW {tabla} AS SELECT * FROM read_parquet('{ruta_sql}')")
+                break
+        else:
+            raise FileNotFoundError(f"No se encontró {tabla}.parquet en {directorio}")
+    return {"tipo": "duckdb", "con": con, "descripcion": directorio}
+
+def _lotes(origen, sql, lote=FILAS_POR_LOTE):
+    """Resultado de `sql` (T-SQL) por lotes, como tablas de Arrow con el mismo esquema."""
+    if origen["tipo"] == "duckdb":
+        from conn_db import traducir_sql
+        lector = origen["con"].execute(traducir_sql(sql)).to_arrow_reader(lote)
+        for lote_arrow in lector:
+            yield pa.Table.from_batches([lote_arrow])
+        return
+
+    import decimal
+    from sqlalchemy import text
+    from conn_db import _tipo_arrow
+
+    esquema = None
+    with origen["engine"].connect() as conn:
+        resultado = conn.execution_options(stream_results=True).execute(text(sql))
+        descripcion = resultado.cursor.description
+        decimales = [i for i, col in enumerate(descripcion) if col[1] is decimal.Decimal]
+        while True:
+            filas = resultado.fetchmany(lote)
+            if not filas:
+                break
+            columnas = [list(c) for c in zip(*filas)]
+            for i in decimales:
+                columnas[i] = [None if v is None else float(v) for v in columnas[i]]
+            if esquema is None:
+                esquema = pa.schema([(col[0], _tipo_arrow(col[1], columnas[i])) for i, col in enumerate(descripcion)])
+            yield pa.table(columnas, schema=esquema)
+
+def _consultar(origen, sql):
+    """Resultado completo de una consulta chica (agregados) como lista de dicts."""
+    lotes = list(_lotes(origen, sql))
+    return pa.concat_tables(lotes).to_pylist() if lotes else []
+
+# --- Muestra ---
+
+def filtro_muestra(fraccion, semilla=0, todos_ecas=False):
+    """Condición T-SQL sobre mrun que elige los mismos alumnos en las tres tablas."""
+    umbral = max(1, min(MODULO_MUESTRA, round(fraccion * MODULO_MUESTRA)))
+    # mrun es texto en matriculas_mrun y BIGINT en las otras dos tablas
+    mrun = "TRY_CAST(mrun AS BIGINT)"
+    condicion = f"({mrun} * CAST({MULTIPLICADOR_MUESTRA} AS BIGINT) + {int(semilla)}) % {MODULO_MUESTRA} < {umbral}"
+    if todos_ecas:
+        condicion += f" OR {mrun} IN (SELECT {mrun} FROM matriculas_mrun WHERE cod_inst = {COD_INST_ECAS})"
+    return f"({condicion})"
+
+# --- Anonimización ---
+
+def clave_sal(sal):
+    """Clave de 32 bytes para BLAKE2b a partir de la sal (de cualquier largo)."""
+    return hashlib.sha256(sal.encode("utf-8")).digest()
+
+def _normalizar(valor):
+    # matriculas_mrun guarda mrun como texto y las otras tablas como BIGINT: '00123', '123' y 123 son el mismo alumno
+    texto = str(valor).strip()
+    if not texto:
+        return None
+    try:
+        return str(int(texto))
+    except ValueError:
+        try:
+            return str(int(float(texto)))
+        except ValueError:
+            return texto
+
+def hash_identificador(valor, clave, espacio=b"mrun"):
+    """Hash con sal de un identificador, como entero positivo de 63 bits."""
+    normalizado = _normalizar(valor)
+    if normalizado is None:
+        return None
+    resumen = hashlib.blake2b(normalizado.encode("utf-8"), key=clave, digest_size=8, person=espacio[:16]).digest()
+    return int.from_bytes(resumen, "big") >> 1
+
+def anonimizar_columna(valores, clave, cache, espacio=b"mrun"):
+    """
+    Reemplaza cada identificador por su hash, calculando cada valor distinto una sola vez.
+    `cache` ({(espacio, valor normalizado): hash}) se comparte entre tablas y lotes. Conserva el tipo de la columna.
+    """
+    if isinstance(valores, pa.ChunkedArray):
+        valores = valores.combine_chunks()
+    unicos = pc.unique(valores.drop_null())
+    hashes = []
+    for valor in unicos.to_pylist():
+        normalizado = _normalizar(valor)
+        if normalizado is None:
+            hashes.append(None)
+            continue
+        llave = (espacio, normalizado)
+        if llave not in cache:
+            cache[llave] = hash_identificador(normalizado, clave, espacio)
+        hashes.append(cache[llave])
+    anonimos = pc.take(pa.array(hashes, type=pa.int64()), pc.index_in(valores, value_set=unicos))
+    if pa.types.is_integer(valores.type):
+        return anonimos
+    return anonimos.cast(pa.string()).cast(valores.type)
+
+def anonimizar(tabla, clave, cache, conservar_nacimiento=False):
+    """Tabla de Arrow con los identificadores reemplazados (y la fecha de nacimiento reducida al año)."""
+    for columna, espacio in (("mrun", b"mrun"), ("mascara_provisoria", b"mrun_ipe")):
+        if columna in tabla.column_names:
+            i = tabla.column_names.index(columna)
+            tabla = tabla.set_column(i, columna, anonimizar_columna(tabla.column(columna), clave, cache, espacio))
+    if not conservar_nacimiento and "fec_nac_alu" in tabla.column_names:
+        i = tabla.column_names.index("fec_nac_alu")
+        nacimiento = tabla.column(i)
+        if pa.types.is_integer(nacimiento.type):
+            # AAAAMM -> AAAA01
+            anio = pc.multiply(pc.divide(nacimiento, 100), 100)
+            tabla = tabla.set_column(i, "fec_nac_alu", pc.add(anio, 1).cast(nacimiento.type))
+    return tabla
+
+# --- Verificación ---
+
+def perfil(origen, tabla, filtro="1 = 1"):
+    """Alumnos, filas y filas por alumno de `tabla` bajo `filtro` (y las instituciones más grandes en matrículas)."""
+    fila = _consultar(origen, f"""
+        SELECT COUNT(*) AS alumnos, SUM(n) AS filas, AVG(CAST(n AS FLOAT)) AS filas_por_alumno, MAX(n) AS max_por_alumno
+        FROM (SELECT mrun, COUNT(*) AS n FROM {tabla} WHERE mrun IS NOT NULL AND {filtro} GROUP BY mrun) AS por_alumno
+    """)[0]
+    if tabla == "matriculas_mrun" and fila["filas"]:
+        instituciones = _consultar(origen, f"""
+            SELECT TOP {INSTITUCIONES_VERIFICACION} cod_inst, COUNT(*) AS n
+            FROM {tabla} WHERE {filtro}
+            GROUP BY cod_inst ORDER BY n DESC
+        """)
+        fila["instituciones"] = {i["cod_inst"]: i["n"] / fila["filas"] for i in instituciones}
+    return fila
+
+def reporte_verificacion(completo, muestra):
+    """Imprime el origen completo y la muestra lado a lado."""
+    print("\n--- Muestra vs origen completo ---")
+    print(f"{'tabla':<16} {'':<8} {'alumnos':>12} {'filas':>14} {'filas/alumno':>13} {'máx/alumno':>11}")
+    for tabla in TABLAS:
+        for etiqueta, datos in (("origen", completo[tabla]), ("muestra", muestra[tabla])):
+            print(
+                f"{tabla:<16} {etiqueta:<8} {datos['alumnos'] or 0:>12,} {datos['filas'] or 0:>14,} "
+                f"{datos['filas_por_alumno'] or 0:>13.2f} {datos['max_por_alumno'] or 0:>11,}"
+            )
+    origen_inst = completo["matriculas_mrun"].get("instituciones", {})
+    muestra_inst = muestra["matriculas_mrun"].get("instituciones", {})
+    print(f"\n{'cod_inst':>8} {'% origen':>9} {'% muestra':>10}")
+    for cod_inst in list(origen_inst) + [c for c in muestra_inst if c not in origen_inst]:
+        # Fuera de las más grandes de un lado: se marca con "-"
+        en_origen = f"{origen_inst[cod_inst]:.1%}" if cod_inst in origen_inst else "-"
+        en_muestra = f"{muestra_inst[cod_inst]:.1%}" if cod_inst in muestra_inst else "-"
+        print(f"{cod_inst:>8} {en_origen:>9} {en_muestra:>10}")
+
+# --- Extracción ---
+
+def extraer(fraccion=0.01, destino="muestra_anonimizada", sal=None, semilla=0, todos_ecas=False,
+            origen=None, formatos=("csv", "parquet"), conservar_nacimiento=False, verificar=False):
+    """Extrae la muestra anonimizada en `destino`; retorna {tabla: filas escritas}."""
+    if not sal:
+        sal = secrets.token_hex(16)
+        print("⚠️ Sin --sal ni ECAS_SAL_ANONIMIZACION: se usa una sal al azar, los hashes no coincidirán con otra extracción")
+    clave = clave_sal(sal)
+    datos = abrir_origen(origen)
+    filtro = filtro_muestra(fraccion, semilla, todos_ecas)
+    escritores = _abrir_escritores(destino, set(formatos))
+    egresados_csv = {sql: mineduc for mineduc, sql in COLUMNAS_EGRESADOS.items()}
+    cache = {}
+    inicio = time.perf_counter()
+    print(f"--- Extrayendo {fraccion:.2%} de los alumnos de {datos['descripcion']}"
+          f"{' (más todos los de ECAS)' if todos_ecas else ''} en {destino} ---")
+
+    try:
+        for tabla, (columna_anio, carpeta, prefijo) in TABLAS.items():
+            inicio_tabla = time.perf_counter()
+            for lote in _lotes(datos, f"SELECT * FROM {tabla} WHERE {filtro}"):
+                lote = anonimizar(lote, clave, cache, conservar_nacimiento)
+                csv = None
+                if tabla == "egresados_mrun":
+                    csv = lote.rename_columns([egresados_csv.get(c, c.upper()) for c in lote.column_names])
+                _escribir_por_anio(escritores, tabla, lote, columna_anio, carpeta, prefijo, csv=csv, bom=tabla == "egresados_mrun")
+            print(f"{tabla:<16} {escritores['filas'].get(tabla, 0):>14,} filas {time.perf_counter() - inicio_tabla:>8.1f} s")
+    finally:
+        _cerrar_escritores(escritores)
+
+    alumnos = sum(1 for espacio, _ in cache if espacio == b"mrun")
+    print(f"Muestra extraída en {time.perf_counter() - inicio:.1f} s: {alumnos:,} alumnos anonimizados")
+
+    if verificar:
+        completo = {tabla: perfil(datos, tabla) for tabla in TABLAS}
+        muestra = {tabla: perfil(datos, tabla, filtro) for tabla in TABLAS}
+        reporte_verificacion(completo, muestra)
+    return dict(escritores["filas"])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extrae una muestra anonimizada y consistente por mrun de matrículas, titulados y egresados.")
+    parser.add_argument("--fraccion", type=float, default=0.01, help="fracción de los alumnos (mrun) a extraer")
+    parser.add_argument("--destino", default=os.path.join(RAIZ_PROYECTO, "muestra_anonimizada"))
+    parser.add_argument("--sal", default=os.getenv("ECAS_SAL_ANONIMIZACION"), help="sal de los hashes de mrun (ECAS_SAL_ANONIMIZACION)")
+    parser.add_argument("--semilla", type=int, default=0, help="cambia qué alumnos caen en la muestra")
+    parser.add_argument("--todos-ecas", action="store_true", help=f"incluir todos los alumnos matriculados alguna vez en cod_inst {COD_INST_ECAS}")
+    parser.add_argument("--origen", help="directorio con los Parquet de las tablas (por defecto SQL Server)")
+    parser.add_argument("--formatos", default="csv,parquet", help="csv, parquet o ambos separados por coma")
+    parser.add_argument("--conservar-nacimiento", action="store_true", help="no reducir fec_nac_alu al año")
+    parser.add_argument("--verificar", action="store_true", help="comparar la muestra con el origen completo")
+    argumentos = parser.parse_args()
+    extraer(
+        argumentos.fraccion, argumentos.destino, argumentos.sal, argumentos.semilla, argumentos.todos_ecas,
+        argumentos.origen, tuple(f.strip() for f in argumentos.formatos.split(",")),
+        argumentos.conservar_nacimiento, argumentos.verificar,
+    )
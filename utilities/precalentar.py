@@ -0,0 +1,122 @@
+"""
+Precalentamiento de la caché de consultas con los filtros por defecto de cada página.
+
+Uso (desde la raíz del proyecto):
+    python -m utilities.precalentar                      # todas las páginas
+    python -m utilities.precalentar desertores titulados # solo las indicadas
+
+También se ejecuta al iniciar index.py si ECAS_PRECALENTAR=1.
+"""
+from ejecucion import ejecutar_en_paralelo
+from admision import prioridad
+import sys
+import time
+
+NOMBRE_ECAS = "IP ESCUELA DE CONTADORES AUDITORES DE SANTIAGO"
+
+def _plan_desertores():
+    from dashboard_desertores.metrics import queries_desertores as q
+    # Valores iniciales del layout: slider [2007, 2007], top 10, "Todas", "Todos", sin regiones
+    rango, jornada, genero = [2007, 2007], "Todas", "Todos"
+    plan = [
+        (q.get_regiones_disponibles, (), {}),
+        # actualizar_opciones_selector recorre siempre todas las cohortes
+        (q.get_ingresos_competencia_parametrizado, (), dict(top_n=10, anio_min=2007, anio_max=2025, jornada=jornada, region_sede=None)),
+        (q.get_ingresos_competencia_parametrizado, (10, rango[0], rango[1], jornada, genero), dict(region_sede=None)),
+        (q.get_permanencia_n_n1_competencia, (rango[0], rango[1], jornada, genero), dict(region_sede=None)),
+        (q.get_distribucion_cambio_jornada_ecas, (rango[0], rango[1], jornada, genero), {}),
+        (q.get_supervivencia_vs_titulacion_data, (rango, [NOMBRE_ECAS], genero, jornada), {}),
+        (q.get_tiempo_de_descanso_procesado, (rango, jornada, genero), {}),
+        (q.get_metrica_titulacion_externa, (rango, jornada, genero), {}),
+        (q.get_metrica_exito_captacion, (rango, jornada, genero), {}),
+    ]
+    for orden in range(1, 4):
+        plan.append((q.get_fuga_por_rango, (), dict(columna="inst_destino", orden=orden, rango_anios=rango, jornada=jornada, genero=genero, top_n=6)))
+    return plan
+
+def _plan_titulados():
+    from dashboard_titulados.metrics import queries_titulados as q
+    rango, poblacion, jornada, genero, edad = [2007, 2007], "Todos", "Todas", "Todos", "Todos"
+    return [
+        (q.get_kpis_cabecera, (rango, jornada, genero, edad), {}),
+        (q.get_nivel_post_salida, (), dict(rango_anios=rango, tipo_poblacion=poblacion, criterio="Primero", jornada=jornada, genero=genero, rango_edad=edad)),
+        (q.get_nivel_post_salida, (), dict(rango_anios=rango, tipo_poblacion=poblacion, criterio="Maximo", jornada=jornada, genero=genero, rango_edad=edad)),
+        (q.get_top_destinos_filtrado, (), dict(rango_anios=rango, tipo_poblacion=poblacion, dimension="inst_destino", nivel="Todos", jornada=jornada, genero=genero, rango_edad=edad, top_n=10)),
+        (q.get_demora_reingreso, (), dict(rango_anios=rango, tipo_poblacion=poblacion, nivel="Todos", jornada=jornada, genero=genero, rango_edad=edad)),
+        # Con población "Todos" el pictograma muestra la trayectoria de desertores
+        (q.get_trayectorias_desertores_completa, (), dict(rango_anios=rango, jornada=jornada, genero=genero, rango_edad=edad)),
+        (q.get_continuidad_estudios, (rango, jornada, genero, edad), {}),
+    ]
+
+def _plan_transicion():
+    from dashboard_transicion.metrics import queries_transicion as q
+    # Valores iniciales: ECAS (104), cohortes [2018, 2023], vista nacional
+    cohorte, inst, jornada, genero, region_id = [2018, 2023], 104, "Todas", "Todos", None
+    return [
+        (q.get_info_competencia, (), {}),
+        (q.get_jornadas_por_institucion, (inst,), {}),
+        (q.get_total_titulados_y_matriculados, (cohorte, inst, jornada, genero, region_id), {}),
+        (q.get_data_geografica_unificada_rango, (cohorte, inst, jornada, genero), {}),
+        (q.get_distribucion_dependencia_rango, (cohorte, inst, genero, jornada), dict(region_id=region_id)),
+        (q.get_tasas_articulacion_tipo_establecimiento_rango, (cohorte, inst, jornada, "Todas", genero), dict(region_id=region_id)),
+        (q.get_demora_ingreso_total, (cohorte, inst, "Todas", genero, jornada), dict(region_id=region_id)),
+        (q.get_correlacion_nem_persistencia_rango, (cohorte, inst, jornada, "Todas", genero), dict(region_id=region_id)),
+        (q.get_correlacion_nem_titulacion_rango, (cohorte, inst, jornada, "Todas", genero), dict(region_id=region_id)),
+        (q.get_kpi_ruralidad_seguimiento_rango, (cohorte, inst, jornada, genero), dict(region_id=region_id)),
+        (q.get_titulados_por_dependencia_rango, (cohorte, inst, genero, jornada, region_id), {}),
+    ]
+
+def _plan_acreditacion():
+    from dashboard_acreditacion.metrics import queries_acreditacion as q
+    anio, jornada = 2024, "Todas"
+    return [
+        (q.get_metrics_acreditacion, (anio, jornada), {}),
+        (q.get_movilidad_acreditacion_estricta, (), dict(anio_seleccionado=anio, jornada=jornada, tipo_inst="Todas")),
+        (q.get_detalle_instituciones_fuga, (anio, "Más Acreditada", jornada), {}),
+    ]
+
+# Páginas con su plan: mismas llamadas y argumentos que los callbacks iniciales, para que las claves de caché coincidan
+PLANES = {
+    "desertores": _plan_desertores,
+    "titulados": _plan_titulados,
+    "transicion": _plan_transicion,
+    "acreditacion": _plan_acreditacion,
+}
+
+def _medir(funcion, args, kwargs):
+    inicio = time.perf_counter()
+    try:
+        # Si la app ya atiende usuarios, sus consultas pasan primero
+        with prioridad("segundo_plano"):
+            funcion(*args, **kwargs)
+        error = None
+    except Exception as e:
+        error = e
+    return time.perf_counter() - inicio, error
+
+def precalentar_cache(paginas=None):
+    """Ejecuta las consultas iniciales de cada página e imprime cuánto tardó cada una. Retorna [(página, función, segundos, error)]."""
+    paginas = paginas or list(PLANES)
+    resultados = []
+    inicio_total = time.perf_counter()
+
+    for pagina in paginas:
+        if pagina not in PLANES:
+            print(f"⚠️ Página desconocida: {pagina} (disponibles: {', '.join(PLANES)})")
+            continue
+        plan = PLANES[pagina]()
+        print(f"--- Precalentando /{pagina} ({len(plan)} consultas) ---")
+        tiempos = ejecutar_en_paralelo([
+            (lambda f=f, a=a, k=k: _medir(f, a, k)) for f, a, k in plan
+        ])
+        for (funcion, _, _), (segundos, error) in zip(plan, tiempos):
+            estado = f"ERROR: {error}" if error else "ok"
+            print(f"{funcion.__name__:<55} {segundos:>8.3f} s  {estado}")
+            resultados.append((pagina, funcion.__name__, segundos, error))
+
+    errores = sum(1 for r in resultados if r[3] is not None)
+    print(f"Precalentamiento terminado en {time.perf_counter() - inicio_total:.1f} s ({len(resultados)} consultas, {errores} con error)")
+    return resultados
+
+if __name__ == "__main__":
+    precalentar_cache(sys.argv[1:])
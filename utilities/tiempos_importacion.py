@@ -0,0 +1,132 @@
+"""
+Costo de importación de cada módulo al arrancar index.py (python -X importtime en un proceso aparte).
+
+Se reporta el tiempo total de `import index`, los módulos con más tiempo acumulado (el módulo y todo lo que
+importa) y con más tiempo propio (el cuerpo del módulo: consultas de módulo, lectura de GeoJSON, creación
+de motores), y el tiempo propio sumado por paquete. Los módulos del proyecto se marcan con *.
+Por defecto se mide el arranque con las páginas diferidas (ECAS_PAGINAS_DIFERIDAS=1, ver paginas.py);
+con --todas se importan todas las páginas al arrancar (ECAS_PAGINAS_DIFERIDAS=0), para ver lo que cuesta cada una.
+
+Uso (desde la raíz del proyecto):
+    python -m utilities.tiempos_importacion
+    python -m utilities.tiempos_importacion --todas --top 30
+    python -m utilities.tiempos_importacion --presupuesto 2.5          # código 1 si el arranque lo excede
+    python -m utilities.tiempos_importacion --modulo dashboard_transicion.pages.dashboard_transicion
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+RAIZ_PROYECTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# "import time:       self [us] |  cumulative | imported package" (la sangría del nombre es la profundidad)
+_PATRON_LINEA = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)\s*$")
+
+def _modulo_del_proyecto(nombre):
+    raiz = nombre.split(".")[0]
+    return os.path.exists(os.path.join(RAIZ_PROYECTO, f"{raiz}.py")) or os.path.isdir(os.path.join(RAIZ_PROYECTO, raiz))
+
+def medir_importacion(modulo="index", todas=False, extra_env=None):
+    """
+    Importa `modulo` en un proceso nuevo con -X importtime.
+    Retorna {"modulo", "segundos", "codigo", "error", "avisos", "modulos": [{nombre, propio, acumulado, profundidad, proyecto}]}.
+    """
+    env = dict(os.environ, **(extra_env or {}))
+    # Con todas las páginas, index.py las importa al arrancar (el comportamiento anterior a paginas.py)
+    env["ECAS_PAGINAS_DIFERIDAS"] = "0" if todas else "1"
+    inicio = time.perf_counter()
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=RAIZ_PROYECTO, env=env, capture_output=True, text=True,
+    )
+    segundos = time.perf_counter() - inicio
+
+    modulos, otras = [], []
+    for linea in proceso.stderr.splitlines():
+        coincidencia = _PATRON_LINEA.match(linea)
+        if coincidencia is None:
+            if not linea.startswith("import time:"):
+                otras.append(linea)
+            continue
+        propio, acumulado, sangria, nombre = coincidencia.groups()
+        modulos.append({
+            "nombre": nombre,
+            "propio": int(propio) / 1e6,
+            "acumulado": int(acumulado) / 1e6,
+            "profundidad": len(sangria) // 2,
+            "proyecto": _modulo_del_proyecto(nombre),
+        })
+    return {
+        "modulo": modulo,
+        "segundos": segundos,
+        "codigo": proceso.returncode,
+        "error": "\n".join(otras[-5:]) if proceso.returncode else None,
+        # Páginas que no se pudieron cargar, etc. (paginas.intentar_cargar)
+        "avisos": [linea for linea in proceso.stdout.splitlines() if linea.startswith("⚠️")],
+        "modulos": modulos,
+    }
+
+def por_paquete(modulos):
+    """Tiempo propio sumado por paquete de primer nivel, de mayor a menor."""
+    paquetes = {}
+    for m in modulos:
+        raiz = m["nombre"].split(".")[0]
+        paquetes[raiz] = paquetes.get(raiz, 0.0) + m["propio"]
+    return sorted(paquetes.items(), key=lambda p: p[1], reverse=True)
+
+def tiempo_de(resultado, nombre):
+    """Segundos acumulados de la importación de `nombre` (0 si no se importó)."""
+    return next((m["acumulado"] for m in resultado["modulos"] if m["nombre"] == nombre), 0.0)
+
+def reporte(resultado, top=20):
+    modulos = resultado["modulos"]
+    print(f"--- import {resultado['modulo']}: {tiempo_de(resultado, resultado['modulo']):.2f} s "
+          f"(proceso {resultado['segundos']:.2f} s, {len(modulos)} módulos) ---")
+    if resultado["error"]:
+        print(f"⚠️ La importación terminó con código {resultado['codigo']}:\n{resultado['error']}")
+    for aviso in resultado["avisos"]:
+        print(aviso)
+
+    print("\nMás tiempo acumulado (módulo + lo que importa):")
+    for m in sorted(modulos, key=lambda m: m["acumulado"], reverse=True)[:top]:
+        marca = "*" if m["proyecto"] else " "
+        print(f"{marca} {m['nombre']:<60} {m['acumulado']:>8.3f} s  propio {m['propio']:>7.3f} s")
+
+    print("\nMás tiempo propio (cuerpo del módulo):")
+    for m in sorted(modulos, key=lambda m: m["propio"], reverse=True)[:top]:
+        marca = "*" if m["proyecto"] else " "
+        print(f"{marca} {m['nombre']:<60} {m['propio']:>8.3f} s")
+
+    print("\nTiempo propio por paquete:")
+    for paquete, segundos in por_paquete(modulos)[:top]:
+        marca = "*" if _modulo_del_proyecto(paquete) else " "
+        print(f"{marca} {paquete:<30} {segundos:>8.3f} s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Costo de importación de cada módulo al arrancar la app.")
+    parser.add_argument("--modulo", default="index", help="módulo a importar (por defecto index)")
+    parser.add_argument("--todas", action="store_true", help="importar todas las páginas al arrancar (ECAS_PAGINAS_DIFERIDAS=0)")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--presupuesto", type=float, help="segundos máximos para importar el módulo; si se exceden el código de salida es 1")
+    parser.add_argument("--salida", help="archivo JSON con el detalle por módulo")
+    argumentos = parser.parse_args()
+
+    resultado = medir_importacion(argumentos.modulo, argumentos.todas)
+    reporte(resultado, argumentos.top)
+    if argumentos.salida:
+        with open(argumentos.salida, "w", encoding="utf-8") as salida:
+            json.dump(resultado, salida, ensure_ascii=False, indent=2)
+        print(f"\nDetalle guardado en {argumentos.salida}")
+
+    if resultado["codigo"]:
+        sys.exit(resultado["codigo"])
+    if argumentos.presupuesto is not None:
+        total = tiempo_de(resultado, argumentos.modulo)
+        if total > argumentos.presupuesto:
+            print(f"\n⚠️ import {argumentos.modulo} tomó {total:.2f} s, sobre el presupuesto de {argumentos.presupuesto:.2f} s")
+            sys.exit(1)
+        print(f"\nimport {argumentos.modulo}: {total:.2f} s dentro del presupuesto de {argumentos.presupuesto:.2f} s")